@@ -1,38 +1,60 @@
 import os, time, requests, base64
-from fastapi import APIRouter, HTTPException
-from supabase import create_client
+from fastapi import APIRouter, HTTPException, Query
+from app.core.executors import run_blocking, run_cpu
+from app.db.session import db
+from app.services.entity_cache import bug_cache
+from app.services.ai_suggestions import (
+    AI_SUGGESTION_FALLBACK_TTL, AI_SUGGESTION_TTL, ai_suggestion_cache, suggestion_key,
+)
+from app.services.screenshots import InvalidScreenshot, prepare_screenshot, screenshot_store
 
 router = APIRouter(tags=["AISuggested"])
 
-# --- Supabase client ---
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_KEY")
-)
-
 # --- Models ---
 PRIMARY_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-1.5-pro-latest")
 FALLBACK_MODEL = "models/gemini-1.5-flash-latest"
 GEMINI_BASE = os.getenv("GEMINI_BASE", "https://generativelanguage.googleapis.com/v1beta")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+NO_CANDIDATES = "No candidates returned."
 
 # --- Helpers ---
-def get_bug_context(bug_id: str):
-    res = supabase.table("bugs").select("*").eq("id", bug_id).execute()
-    if res.data:
-        return res.data[0]
-    return None
-
-def get_screenshot_base64(screenshot_url: str) -> str:
-    """Download screenshot and convert to base64"""
+async def get_bug_context(bug_id: str):
+    bug = await bug_cache.get(bug_id)
+    if bug is not None and "code" not in bug:
+        # The cache leaves out heavy columns; the prompt includes the code
+        res = await db.table("bugs").select("code").eq("id", bug_id).limit(1).execute()
+        bug["code"] = res.data[0].get("code") if res.data else None
+    return bug
+
+def get_screenshot_bytes(screenshot_url: str) -> bytes:
+    """Download a screenshot stored before screenshot ingest"""
     try:
         response = requests.get(screenshot_url, timeout=10)
         if response.status_code == 200:
-            return base64.b64encode(response.content).decode('utf-8')
+            return response.content
     except Exception as e:
         print(f"Failed to fetch screenshot: {e}")
     return None
 
+async def get_screenshot_base64(bug: dict) -> str:
+    """Base64 of the bug's Gemini-ready JPEG, made at upload time"""
+    if bug.get('screenshot_hash'):
+        try:
+            return await screenshot_store.ai_image_base64(bug['screenshot_hash'])
+        except Exception as e:
+            print(f"Failed to load stored screenshot: {e}")
+            return None
+    # Older bugs only have the original: download and convert it once per request
+    data = await run_blocking(get_screenshot_bytes, bug['screenshot'])
+    if not data:
+        return None
+    try:
+        prepared = await run_cpu(prepare_screenshot, data)
+    except InvalidScreenshot as e:
+        print(f"Failed to convert screenshot: {e}")
+        return None
+    return base64.b64encode(prepared["ai_jpeg"]).decode('utf-8')
+
 def build_prompt(bug: dict) -> str:
     """Build prompt with code and screenshot context"""
     prompt = f"""
@@ -117,7 +139,7 @@ def call_gemini_with_image(prompt: str, screenshot_base64: str, model: str, retr
                 candidates = data.get("candidates", [])
                 if candidates:
                     return candidates[0]["content"]["parts"][0]["text"]
-                return "No candidates returned."
+                return NO_CANDIDATES
             elif res.status_code in (503, 504):
                 time.sleep(delay)
                 continue
@@ -147,7 +169,7 @@ def call_gemini(prompt: str, model: str, retries: int = 2, delay: int = 5) -> st
                 candidates = data.get("candidates", [])
                 if candidates:
                     return candidates[0]["content"]["parts"][0]["text"]
-                return "No candidates returned."
+                return NO_CANDIDATES
             elif res.status_code in (503, 504):
                 time.sleep(delay)
                 continue
@@ -162,24 +184,26 @@ def call_gemini(prompt: str, model: str, retries: int = 2, delay: int = 5) -> st
 
 # --- Route ---
 @router.get("/{bug_id}")
-def ai_suggested_fix(bug_id: str):
+async def ai_suggested_fix(
+    bug_id: str,
+    refresh: bool = Query(False, description="Generate a new suggestion instead of using the cached one"),
+):
     from app.services.endee_client import endee_service
-    from sentence_transformers import SentenceTransformer
+    from app.services.embedding_batcher import embedding_batcher
     
     print(f"🔵 Generating AI suggestion for bug: {bug_id}")
     
     # Fetch target bug from Supabase
-    bug = get_bug_context(bug_id)
+    bug = await get_bug_context(bug_id)
     if not bug:
         raise HTTPException(status_code=404, detail="Bug not found")
     
     # ✅ RAG STEP 1: Generate embedding for target bug
-    model = SentenceTransformer("all-MiniLM-L6-v2")
     bug_text = f"{bug['title']} {bug.get('description', '')} {bug.get('severity', '')} {bug.get('client_type', '')}"
-    bug_vector = model.encode(bug_text).tolist()
+    bug_vector = await embedding_batcher.embed_async(bug_text)
     
     # ✅ RAG STEP 2: Search Endee for similar SOLVED bugs
-    similar_bugs = endee_service.search_similar_bugs(
+    similar_bugs = await endee_service.search_similar_bugs(
         query_vector=bug_vector,
         top_k=5,
         metadata_filters={"status": "Solved"},
@@ -192,7 +216,7 @@ def ai_suggested_fix(bug_id: str):
     context_solutions = []
     if similar_bugs:
         bug_ids = [sb["id"] for sb in similar_bugs]
-        solutions_res = supabase.table("solutions").select("*").in_("bug_id", bug_ids).execute()
+        solutions_res = await db.table("solutions").select("*").in_("bug_id", bug_ids).execute()
         
         # Group solutions by bug
         solutions_by_bug = {}
@@ -269,39 +293,52 @@ Severity: {bug.get('severity', 'N/A')}
 **Format your code blocks like this:**
 """
     
-    # ✅ Check if screenshot exists
-    screenshot_base64 = None
-    if bug.get('screenshot'):
-        print(f"🖼️ Screenshot found, downloading and encoding...")
-        screenshot_base64 = get_screenshot_base64(bug['screenshot'])
-        if screenshot_base64:
-            print(f"✅ Screenshot encoded ({len(screenshot_base64)} bytes)")
-        else:
-            print(f"⚠️ Failed to encode screenshot")
+    async def generate():
+        # ✅ Check if screenshot exists
+        screenshot_base64 = None
+        if bug.get('screenshot'):
+            print(f"🖼️ Screenshot found, loading AI image...")
+            screenshot_base64 = await get_screenshot_base64(bug)
+            if screenshot_base64:
+                print(f"✅ Screenshot encoded ({len(screenshot_base64)} bytes)")
+            else:
+                print(f"⚠️ Failed to encode screenshot")
 
-    try:
-        # ✅ Use image-capable call if screenshot exists
-        if screenshot_base64:
-            print(f"🤖 Calling Gemini with image using {PRIMARY_MODEL}")
-            suggestion = call_gemini_with_image(prompt, screenshot_base64, PRIMARY_MODEL)
-        else:
-            print(f"🤖 Calling Gemini (text only) using {PRIMARY_MODEL}")
-            suggestion = call_gemini(prompt, PRIMARY_MODEL)
-        
-        model_used = PRIMARY_MODEL
-        print(f"✅ Got response from {PRIMARY_MODEL}")
-    except Exception as e:
-        print(f"⚠️ Primary model failed: {e}, trying fallback...")
         try:
+            # ✅ Use image-capable call if screenshot exists
             if screenshot_base64:
-                suggestion = call_gemini_with_image(prompt, screenshot_base64, FALLBACK_MODEL)
+                print(f"🤖 Calling Gemini with image using {PRIMARY_MODEL}")
+                suggestion = await run_blocking(call_gemini_with_image, prompt, screenshot_base64, PRIMARY_MODEL)
             else:
-                suggestion = call_gemini(prompt, FALLBACK_MODEL)
-            model_used = FALLBACK_MODEL
-            print(f"✅ Got response from {FALLBACK_MODEL}")
-        except Exception as fallback_error:
-            print(f"❌ Both models failed: {fallback_error}")
-            raise HTTPException(status_code=503, detail="AI service unavailable")
+                print(f"🤖 Calling Gemini (text only) using {PRIMARY_MODEL}")
+                suggestion = await run_blocking(call_gemini, prompt, PRIMARY_MODEL)
+            
+            print(f"✅ Got response from {PRIMARY_MODEL}")
+            return suggestion, PRIMARY_MODEL
+        except Exception as e:
+            print(f"⚠️ Primary model failed: {e}, trying fallback...")
+            try:
+                if screenshot_base64:
+                    suggestion = await run_blocking(call_gemini_with_image, prompt, screenshot_base64, FALLBACK_MODEL)
+                else:
+                    suggestion = await run_blocking(call_gemini, prompt, FALLBACK_MODEL)
+                print(f"✅ Got response from {FALLBACK_MODEL}")
+                return suggestion, FALLBACK_MODEL
+            except Exception as fallback_error:
+                print(f"❌ Both models failed: {fallback_error}")
+                raise HTTPException(status_code=503, detail="AI service unavailable")
+
+    # ✅ Same prompt, screenshot and model as an earlier request: reuse its suggestion
+    screenshot_key = bug.get('screenshot_hash') or bug.get('screenshot')
+    key = suggestion_key(prompt, screenshot_key, PRIMARY_MODEL)
+    # The key names the primary model; an answer from the fallback is only kept
+    # briefly under it, so the primary is tried again once it recovers
+    cached_row, cached = await ai_suggestion_cache.get_or_generate(
+        bug_id, key, generate, refresh=refresh, cacheable=lambda suggestion: suggestion != NO_CANDIDATES,
+        ttl=lambda row: AI_SUGGESTION_TTL if row["model_used"] == PRIMARY_MODEL else AI_SUGGESTION_FALLBACK_TTL,
+    )
+    print(f"{'♻️ Cached' if cached else '✅ New'} suggestion from {cached_row['model_used']} "
+          f"({cached_row['generation_ms']} ms to generate)")
 
     return {
         "bug_id": bug_id,
@@ -312,8 +349,11 @@ Severity: {bug.get('severity', 'N/A')}
         "has_code": bool(bug.get("code")),
         "has_screenshot": bool(bug.get("screenshot")),
         "code_language": bug.get("code_language"),
-        "model_used": model_used,
-        "suggestion": suggestion,
+        "model_used": cached_row["model_used"],
+        "suggestion": cached_row["suggestion"],
+        "generation_ms": cached_row["generation_ms"],
+        "generated_at": cached_row["created_at"],
+        "cached": cached,
         "rag_context_count": len(context_solutions),  # ✅ Show how many similar cases were used
         "rag_enabled": True
     }
@@ -1,8 +1,9 @@
 # app/api/bug_clusters.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import List
-from app.core.config import supabase
+from app.db.session import db
+from app.utils.etag import json_with_etag, rows_etag
 
 router = APIRouter()
 
@@ -15,22 +16,23 @@ class PositionsPayload(BaseModel):
     positions: List[Position]
 
 @router.get("/")
-def list_bug_clusters():
+async def list_bug_clusters(request: Request):
     try:
-        res = supabase.table("bug_clusters").select("*").execute()
-        return {"clusters": res.data or []}
+        res = await db.table("bug_clusters").select("*").order("cluster_id").execute()
+        rows = res.data or []
+        return json_with_etag(request, {"clusters": rows}, rows_etag(rows, key="cluster_id"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/positions")
-def upsert_cluster_positions(payload: PositionsPayload):
+async def upsert_cluster_positions(payload: PositionsPayload):
     try:
         rows = [
             {"cluster_id": int(p.cluster_id), "x": float(p.x), "y": float(p.y)}
             for p in payload.positions
         ]
         # upsert requires cluster_id to be a primary key or unique constraint in your table
-        res = supabase.table("bug_clusters").upsert(rows).execute()
+        res = await db.table("bug_clusters").upsert(rows).execute()
         # supabase client may return .error or .status_code depending on version
         if getattr(res, "error", None):
             raise Exception(res.error)
@@ -1,19 +1,24 @@
-from fastapi import APIRouter, Form, UploadFile, File, HTTPException
+from fastapi import APIRouter, Form, UploadFile, File, HTTPException, Request
 from datetime import datetime, timezone
 from fastapi import  Query
 
-import uuid, json
-from app.core.config import supabase  # Supabase client
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Only define globally once, at the module level!
-
+import uuid, json, asyncio
+import orjson
+from fastapi.responses import StreamingResponse
+from app.db.session import db
+from app.services.entity_cache import bug_cache
+from app.services.counters import counters
+from app.services.activity_feed import activity_feed, bug_reported, milestone_completed
+from app.services.vote_buffer import VOTE_BUFFER_ENABLED, vote_buffer
+from app.services.embedding_batcher import embedding_batcher
+from app.services.screenshots import InvalidScreenshot, screenshot_store
+from app.services.lexical_index import bug_document
+from app.utils.pagination import encode_cursor, keyset_after
+from app.utils.etag import etag_headers, etag_matches, not_modified, rows_etag
+from app.utils.fields import select_columns
 
 
 router = APIRouter()
-if "model" not in globals():
-    model = SentenceTransformer("all-MiniLM-L6-v2")
 
 # ✅ ADD THIS HELPER FUNCTION
 async def mark_milestone_complete(user_id: str, milestone_name: str):
@@ -21,12 +26,13 @@ async def mark_milestone_complete(user_id: str, milestone_name: str):
     try:
         print(f"🔵 Marking milestone '{milestone_name}' for user: {user_id}")
         
-        result = supabase.from_("user_milestones").upsert({
+        result = await db.from_("user_milestones").upsert({
             "user_id": user_id,
             "milestone_name": milestone_name,
             "completed_at": datetime.now(timezone.utc).isoformat(),
             "is_completed": True
         }, on_conflict="user_id,milestone_name").execute()
+        activity_feed.record(milestone_completed(user_id, milestone_name))
         
         print(f"✅ Milestone '{milestone_name}' marked as complete")
         return True
@@ -63,9 +69,9 @@ async def submit_bug(
     
     # Generate embedding and check for similar bugs
     new_text = f"{title} {description} {severity} {clientType} {' '.join(tags_list)}"
-    new_vec = model.encode(new_text).tolist()
+    new_vec = await embedding_batcher.embed_async(new_text)
     
-    similar_results = endee_service.search_similar_bugs(
+    similar_results = await endee_service.search_similar_bugs(
         query_vector=new_vec,
         top_k=1,
         metadata_filters={"status": {"$ne": "Closed"}},
@@ -76,7 +82,7 @@ async def submit_bug(
         matched_bug_id = similar_results[0]["id"]
         similarity_score = similar_results[0]["score"]
         
-        solutions_res = supabase.table("solutions").select("id").eq("bug_id", matched_bug_id).execute()
+        solutions_res = await db.table("solutions").select("id").eq("bug_id", matched_bug_id).execute()
         has_solutions = bool(solutions_res.data and len(solutions_res.data) > 0)
         solution_count = len(solutions_res.data or [])
         
@@ -90,6 +96,16 @@ async def submit_bug(
         }
     
 
+    # Stored (or found by content hash) before the bug, so the row can point at it
+    stored_screenshot = None
+    if screenshot:
+        try:
+            stored_screenshot = await screenshot_store.ingest(screenshot)
+        except InvalidScreenshot as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            print("Screenshot upload failed:", e)
+
     bug = {
         "id": bug_id,
         "title": title,
@@ -102,44 +118,36 @@ async def submit_bug(
         "created_at": created_at,
         "user_id": user_id,  # Save user_id
     }
+    if stored_screenshot:
+        bug["screenshot"] = stored_screenshot["original_url"]
+        bug["screenshot_hash"] = stored_screenshot["content_hash"]
 
 
 
     try:
-        supabase.table("bugs").insert(bug).execute()
+        await db.table("bugs").insert(bug).execute()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Supabase bug insert failed: {e}")
+    bug_cache.invalidate(bug_id)
+    activity_feed.record(bug_reported(bug))
     await mark_milestone_complete(user_id, "report-first-bug")
     
-    # Handle screenshot upload and attachment record
-    if screenshot:
-        bucket = "screenshots"
-        file_path = f"{bug_id}/{screenshot.filename}"
-        data = await screenshot.read()
-
+    # Attachment record for the stored screenshot
+    if stored_screenshot:
         try:
-            supabase.storage.from_(bucket).upload(
-                file_path,
-                data,
-                {"contentType": screenshot.content_type or "application/octet-stream"},
-            )
-            file_url = supabase.storage.from_(bucket).get_public_url(file_path)
-
-            # Insert into attachments table
             attachment = {
                 "bug_id": bug_id,
-                "file_path": file_path,
-                "file_url": file_url,
+                "file_path": stored_screenshot["original_path"],
+                "file_url": stored_screenshot["original_url"],
                 "created_at": created_at,
             }
-            supabase.table("attachments").insert(attachment).execute()
-
+            await db.table("attachments").insert(attachment).execute()
         except Exception as e:
-            print("Screenshot upload or attachment insert failed:", e)
+            print("Attachment insert failed:", e)
     
     # ✅ UPSERT VECTOR TO ENDEE
     # Store bug embedding in Endee for future semantic search
-    endee_service.upsert_bug_vector(
+    await endee_service.upsert_bug_vector(
         bug_id=bug_id,
         embedding=new_vec,
         metadata={
@@ -148,74 +156,149 @@ async def submit_bug(
             "status": "Open",
             "tags": tags_list,
             "created_at": created_at
-        }
+        },
+        document=bug_document(bug),
     )
 
     return {"message": "Bug submitted successfully", "bug_id": bug_id}
 from fastapi import Path
 
 @router.post("/{bug_id}/upvote")
-def upvote_bug(bug_id: str = Path(...)):
+async def upvote_bug(bug_id: str = Path(...)):
     try:
-        # Increment votes atomically
-        res = supabase.rpc("increment_votes", {"row_id": bug_id}).execute()
-        # If you don’t have a Postgres function, fallback to manual update:
-        if not res.data:
-            bug = supabase.table("bugs").select("votes").eq("id", bug_id).single().execute()
-            if not bug.data:
-                raise HTTPException(status_code=404, detail="Bug not found")
-            current_votes = bug.data["votes"] or 0
-            supabase.table("bugs").update({"votes": current_votes + 1}).eq("id", bug_id).execute()
-        return {"message": "Upvoted successfully", "bug_id": bug_id}
+        if VOTE_BUFFER_ENABLED:
+            # Coalesced with other votes on this bug and written on the next flush
+            votes = await vote_buffer.upvote_bug(bug_id)
+        else:
+            # Increment votes atomically (one round-trip, returns the new count)
+            votes = await counters.adjust_bug_votes(bug_id, 1)
+            bug_cache.invalidate(bug_id)
+        if votes is None:
+            raise HTTPException(status_code=404, detail="Bug not found")
+        return {"message": "Upvoted successfully", "bug_id": bug_id, "votes": votes}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upvote: {e}")
-@router.get("/")
-def list_bugs(user_id: str = Query(None)):
-    try:
-        # Fetch bugs: filter if user_id provided
-        query = supabase.table("bugs").select("*").order("created_at", desc=True)
-        if user_id:
-            query = query.eq("user_id", user_id)
-        
-        bugs_res = query.execute()
-        bugs = bugs_res.data or []
+LIST_INCLUDES = {"attachments", "solutions"}
+LIST_PAGE_SIZE = 50
+# Rows per request when the whole list is wanted; Supabase caps a response at max-rows (1000)
+FULL_LIST_BATCH = 1000
+# bug_ids per in.() filter, which travels in the URL
+CHILD_BATCH = 200
 
-        # If no bugs found for this user_id
-        if user_id and not bugs:
-            return {"message": "No bugs yet", "bugs": []}
 
-        # Fetch attachments
-        attachments_res = supabase.table("attachments").select("*").execute()
-        attachments = attachments_res.data or []
+def _bugs_query(columns: str, user_id: str, cursor: str = None):
+    query = db.table("bugs").select(columns)
+    if user_id:
+        query = query.eq("user_id", user_id)
+    return keyset_after(query, cursor)
+
 
-        # Fetch solutions
-        solutions_res = supabase.table("solutions").select("*").execute()
-        solutions = solutions_res.data or []
+async def _fetch_all_bugs(columns: str, user_id: str) -> list:
+    """Every matching bug, newest first, read in keyset batches"""
+    bugs, cursor = [], None
+    while True:
+        res = await _bugs_query(columns, user_id, cursor).limit(FULL_LIST_BATCH).execute()
+        batch = res.data or []
+        bugs.extend(batch)
+        if len(batch) < FULL_LIST_BATCH:
+            return bugs
+        cursor = encode_cursor(batch[-1])
 
-        # Group attachments by bug_id
-        attachments_map = {}
-        for att in attachments:
-            attachments_map.setdefault(att["bug_id"], []).append(att)
 
-        # Group solutions by bug_id
-        solutions_map = {}
-        for sol in solutions:
-            solutions_map.setdefault(sol["bug_id"], []).append(sol)
+async def _fetch_children(table: str, bug_ids: list) -> dict:
+    """Rows of `table` for the given bugs only, grouped by bug_id"""
+    results = await asyncio.gather(*[
+        db.table(table).select("*").in_("bug_id", bug_ids[i:i + CHILD_BATCH]).execute()
+        for i in range(0, len(bug_ids), CHILD_BATCH)
+    ])
+    grouped = {}
+    for res in results:
+        for row in res.data or []:
+            grouped.setdefault(row["bug_id"], []).append(row)
+    return grouped
 
-        # Attach to bugs
-        for bug in bugs:
-            bug["attachments"] = attachments_map.get(bug["id"], [])
-            bug["solutions"] = solutions_map.get(bug["id"], [])
 
-        return bugs
+@router.get("/")
+async def list_bugs(
+    request: Request,
+    user_id: str = Query(None),
+    limit: int = Query(None, ge=1, le=200, description=f"Bugs per page (default {LIST_PAGE_SIZE} when paging)"),
+    cursor: str = Query(None, description="X-Next-Cursor value from the previous page"),
+    include: str = Query("attachments,solutions", description="Comma-separated: attachments, solutions"),
+    fields: str = Query(None, description="Comma-separated columns to return (default: all but heavy columns)"),
+):
+    """
+    Bugs, newest first, as a streamed JSON array. Passing limit or cursor
+    asks for one page: the cursor for the next page is returned in the
+    X-Next-Cursor header (absent on the last page). Without either, every
+    bug is returned, as clients written before pagination expect. The weak
+    ETag covers the bugs and included rows, so an unchanged response is
+    answered 304 without being serialized.
+    """
+    includes = {part.strip() for part in include.split(",") if part.strip()}
+    if includes - LIST_INCLUDES:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {sorted(includes - LIST_INCLUDES)}")
+    paged = limit is not None or cursor is not None
+    limit = limit or LIST_PAGE_SIZE
+
+    try:
+        columns = await select_columns("bugs", fields, require=("id", "created_at"))
+        # Fetch one extra row to know whether there is a next page
+        query = _bugs_query(columns, user_id, cursor).limit(limit + 1) if paged else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        if paged:
+            bugs = (await query.execute()).data or []
+            next_cursor = encode_cursor(bugs[limit - 1]) if len(bugs) > limit else None
+            bugs = bugs[:limit]
+        else:
+            bugs = await _fetch_all_bugs(columns, user_id)
+            next_cursor = None
+
+        # If no bugs found for this user_id
+        if user_id and not bugs and not cursor:
+            return {"message": "No bugs yet", "bugs": []}
 
+        # Attachments and solutions for these bugs only, fetched concurrently
+        bug_ids = [bug["id"] for bug in bugs]
+        wanted = [name for name in ("attachments", "solutions") if name in includes and bug_ids]
+        children = dict(zip(wanted, await asyncio.gather(*[_fetch_children(name, bug_ids) for name in wanted])))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bugs: {e}")
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    # Child rows come back in no particular order; sort them so the tag is stable
+    etag = rows_etag(
+        bugs,
+        *[sorted((row for rows in children[name].values() for row in rows), key=lambda r: str(r.get("id")))
+          for name in wanted],
+        extra=f"{columns}|{','.join(wanted)}|{next_cursor or ''}",
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, headers)
+
+    def stream():
+        yield b"["
+        for i, bug in enumerate(bugs):
+            for name, grouped in children.items():
+                bug[name] = grouped.get(bug["id"], [])
+            yield (b"," if i else b"") + orjson.dumps(bug, default=str)
+        yield b"]"
+
+    return StreamingResponse(stream(), media_type="application/json", headers=etag_headers(etag, headers))
     
 @router.get("/{bug_id}/solutions")
-def get_solutions_for_bug(bug_id: str):
+async def get_solutions_for_bug(bug_id: str, fields: str = Query(None, description="Comma-separated columns to return (default: all but heavy columns)")):
+    try:
+        columns = await select_columns("solutions", fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        res = supabase.table("solutions").select("*").eq("bug_id", bug_id).execute()
+        res = await db.table("solutions").select(columns).eq("bug_id", bug_id).execute()
         return res.data or []
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch solutions: {e}")
@@ -247,47 +330,28 @@ async def submit_bug(
             bug_data["code"] = code
             bug_data["code_language"] = code_language or "javascript"
         
-        # ✅ Initialize screenshot_url as None
-        screenshot_url = None
-        
-        # ✅ Handle screenshot upload
+        # ✅ Handle screenshot upload (deduplicated by content hash)
         if screenshot:
             try:
-                # Generate unique filename
-                file_extension = screenshot.filename.split('.')[-1]
-                unique_filename = f"{uuid.uuid4()}.{file_extension}"
-                file_path = f"bug-screenshots/{unique_filename}"
-                
-                # Read file content
-                file_content = await screenshot.read()
-                
-                # Upload to Supabase Storage
-                storage_response = supabase.storage.from_("bug-screenshots").upload(
-                    file_path,
-                    file_content,
-                    {"content-type": screenshot.content_type}
-                )
-                
-                # Get public URL
-                screenshot_url = supabase.storage.from_("bug-screenshots").get_public_url(file_path)
-                
-                print(f"✅ Screenshot uploaded: {screenshot_url}")
-                
+                stored_screenshot = await screenshot_store.ingest(screenshot)
+                bug_data["screenshot"] = stored_screenshot["original_url"]
+                bug_data["screenshot_hash"] = stored_screenshot["content_hash"]
+                print(f"✅ Screenshot stored: {stored_screenshot['original_url']}")
+            except InvalidScreenshot as e:
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as upload_error:
                 print(f"⚠️ Screenshot upload failed: {upload_error}")
                 # Continue without screenshot
         
-        # ✅ Add screenshot URL to bug data if it exists
-        if screenshot_url:
-            bug_data["screenshot"] = screenshot_url
-        
         # Insert bug into database
-        result = supabase.from_("bugs").insert(bug_data).execute()
+        result = await db.from_("bugs").insert(bug_data).execute()
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to insert bug")
         
         bug_id = result.data[0]["id"]
+        bug_cache.invalidate(bug_id)
+        activity_feed.record(bug_reported(result.data[0]))
         
         print(f"✅ Bug created: {bug_id}")
                 # ✅ Mark milestone as complete
@@ -301,6 +365,8 @@ async def submit_bug(
             "has_solutions": False
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Bug submission error: {e}")
         import traceback
@@ -1,6 +1,6 @@
 # app/jobs/cluster_job.py
 from app.core.config import supabase
-from sentence_transformers import SentenceTransformer
+from app.services.embeddings import embedding_service
 from sklearn.cluster import KMeans
 import numpy as np
 import datetime
@@ -28,8 +28,7 @@ def run_dynamic_clustering(k: int = 5):
     ]
 
     # 3. Embed
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = model.encode(texts)
+    embeddings = embedding_service.encode(texts)
 
     # 4. Cluster with KMeans
     kmeans = KMeans(n_clusters=k, random_state=42, n_init="auto")
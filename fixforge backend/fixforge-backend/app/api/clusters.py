@@ -1,48 +1,35 @@
 # app/api/clusters.py
 from fastapi import APIRouter, HTTPException
-from app.core.config import supabase
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import asyncio
+from app.core.executors import run_blocking
+from app.db.session import db
+from app.services.clusters_service import bug_vector, solved_bug_index
 import random
 
 router = APIRouter()
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
 @router.get("/{bug_id}/suggestions")
-def get_related_solutions(bug_id: str):
+async def get_related_solutions(bug_id: str):
     try:
-        # Fetch the new bug
-        bug_res = supabase.table("bugs").select("*").eq("id", bug_id).single().execute()
-        bug = bug_res.data
+        # Fetch the new bug (with its stored vectors, which bug_cache leaves out) and the cluster list together
+        bug_res, clusters_res = await asyncio.gather(
+            db.table("bugs").select(
+                "id, title, description, severity, client_type, tags, embedding, embedding_384"
+            ).eq("id", bug_id).limit(1).execute(),
+            db.table("bug_clusters").select("*").execute(),
+        )
+        bug = bug_res.data[0] if bug_res.data else None
         if not bug:
             raise HTTPException(status_code=404, detail="Bug not found")
 
-        # Embed new bug
-        new_text = f"{bug['title']} {bug['description']} {bug['severity']} {bug['client_type']} {' '.join(bug.get('tags', []))}"
-        new_vec = model.encode(new_text).reshape(1, -1)
-
-        # Fetch solved bugs
-        solved_res = supabase.table("bugs").select("*").eq("status", "Solved").execute()
-        solved_bugs = solved_res.data or []
-
-        if not solved_bugs:
+        # Score against the preloaded solved-bug matrix (stored embeddings, no per-request inference)
+        new_vec = await run_blocking(bug_vector, bug)
+        ranked = await run_blocking(solved_bug_index.top_k, new_vec, k=3)
+        if not ranked:
             return {"clusters": [], "top_suggestions": [], "has_related": False}
 
-        # Embed solved bugs
-        solved_texts = [
-            f"{b['title']} {b['description']} {b['severity']} {b['client_type']} {' '.join(b.get('tags', []))}"
-            for b in solved_bugs
-        ]
-        solved_vecs = model.encode(solved_texts)
-        sims = cosine_similarity(new_vec, solved_vecs)[0]
-
-        # 🔎 Debug logging
-        print("🔍 Similarity scores:", sims.tolist())
-        print("🔍 Top score:", float(max(sims)) if len(sims) > 0 else None)
-
+        print("🔍 Top score:", ranked[0][1])
 
-        # Rank top 3
-        ranked = sorted(zip(solved_bugs, sims), key=lambda x: x[1], reverse=True)
         top_suggestions = [
             {
                 "id": b["id"],
@@ -50,9 +37,8 @@ def get_related_solutions(bug_id: str):
                 "description": b["description"],
                "similarity": round(float(score) * 100, 2),  # cast to float, then percentage
             }
-            for b, score in ranked[:3]
+            for b, score in ranked
         ]
-        clusters_res = supabase.table("bug_clusters").select("*").execute()
         clusters = [
             {
                 "id": c["cluster_id"],
@@ -1,8 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from datetime import datetime, timezone
 import uuid
-from app.core.config import supabase
+import asyncio
+from app.db.session import db
+from app.services.clusters_service import solved_bug_index
+from app.services.search_cache import search_cache
+from app.services.entity_cache import bug_cache, solution_cache, user_cache
+from app.services.counters import counters
+from app.services.activity_feed import activity_feed, milestone_completed, solution_posted
+from app.services.vote_buffer import VOTE_BUFFER_ENABLED, vote_buffer
+from app.services.lexical_index import lexical_index
+from app.utils.fields import project, select_columns
 from typing import Optional
 
 router = APIRouter()
@@ -11,12 +20,13 @@ async def mark_milestone_complete(user_id: str, milestone_name: str):
     try:
         print(f"🔵 Marking milestone '{milestone_name}' for user: {user_id}")
         
-        result = supabase.from_("user_milestones").upsert({
+        result = await db.from_("user_milestones").upsert({
             "user_id": user_id,
             "milestone_name": milestone_name,
             "completed_at": datetime.now(timezone.utc).isoformat(),
             "is_completed": True
         }, on_conflict="user_id,milestone_name").execute()
+        activity_feed.record(milestone_completed(user_id, milestone_name))
         
         print(f"✅ Milestone '{milestone_name}' marked as complete")
         return True
@@ -72,29 +82,35 @@ async def submit_solution(payload: SolutionIn):
     }
 
     try:
-        # 1. Verify bug exists
-        bug_check = supabase.table("bugs").select("id").eq("id", payload.bug_id).execute()
-        if not bug_check.data:
+        # 1. Verify bug and user exist (cached; misses run concurrently)
+        bug, user = await asyncio.gather(
+            bug_cache.exists(payload.bug_id),
+            user_cache.exists(payload.user_id),
+        )
+        if not bug:
             raise HTTPException(status_code=404, detail=f"Bug {payload.bug_id} not found")
-        
-        # 2. Verify user exists
-        user_check = supabase.table("users").select("id").eq("id", payload.user_id).execute()
-        if not user_check.data:
+        if not user:
             raise HTTPException(status_code=404, detail=f"User {payload.user_id} not found")
         
-        # 3. Insert the solution
-        insert_result = supabase.table("solutions").insert(solution).execute()
+        # 2. Insert the solution
+        insert_result = await db.table("solutions").insert(solution).execute()
         
         if not insert_result.data:
             raise HTTPException(status_code=500, detail="Failed to insert solution")
 
-        # 4. Mark the related bug as solved
-        supabase.table("bugs").update({"status": "Solved"}).eq("id", payload.bug_id).execute()
+        # 3. Mark the related bug as solved and record the milestone together
+        await asyncio.gather(
+            db.table("bugs").update({"status": "Solved"}).eq("id", payload.bug_id).execute(),
+            mark_milestone_complete(payload.user_id, "post-first-solution"),
+        )
+        bug_cache.invalidate(payload.bug_id)
+        solution_cache.invalidate(solution_id)
+        activity_feed.record(solution_posted(insert_result.data[0]))
+        solved_bug_index.invalidate()
+        lexical_index.update_metadata(payload.bug_id, {"status": "Solved"})
+        search_cache.invalidate()
         
         print(f"✅ Solution {solution_id} created successfully")
-        # ✅ Mark milestone as complete
-        await mark_milestone_complete(payload.user_id, "post-first-solution")                           
-
         
         return {
             "message": "Solution submitted and bug marked as Solved",
@@ -110,16 +126,20 @@ async def submit_solution(payload: SolutionIn):
         raise HTTPException(status_code=500, detail=f"Failed to insert solution: {str(e)}")
 
 @router.get("/bug/{bug_id}")
-def get_solutions_for_bug(bug_id: str):
+async def get_solutions_for_bug(bug_id: str, fields: str = Query(None, description="Comma-separated columns to return (default: all but heavy columns)")):
     """
     Get all solutions for a specific bug.
     Returns solutions with author info and vote counts.
     """
+    try:
+        columns = await select_columns("solutions", fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         print(f"🔍 Fetching solutions for bug: {bug_id}")
         
-        res = supabase.table("solutions")\
-            .select("*")\
+        res = await db.table("solutions")\
+            .select(columns)\
             .eq("bug_id", bug_id)\
             .order("votes", desc=True)\
             .execute()
@@ -133,27 +153,26 @@ def get_solutions_for_bug(bug_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to fetch solutions: {str(e)}")
 
 @router.get("/{solution_id}")
-def get_solution(solution_id: str):
+async def get_solution(solution_id: str, fields: str = Query(None, description="Comma-separated columns to return (default: all but heavy columns)")):
     """
     Get a specific solution by ID.
     """
     try:
-        res = supabase.table("solutions")\
-            .select("*")\
-            .eq("id", solution_id)\
-            .execute()
+        solution = await solution_cache.get(solution_id)
         
-        if not res.data:
+        if not solution:
             raise HTTPException(status_code=404, detail="Solution not found")
         
-        return res.data[0]
+        return project(solution, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch solution: {str(e)}")
 
 @router.post("/{solution_id}/upvote")
-def toggle_upvote(solution_id: str, payload: UpvoteRequest):
+async def toggle_upvote(solution_id: str, payload: UpvoteRequest):
     """
     Toggle upvote for a solution using existing votes table.
     - If user hasn't upvoted: Add upvote
@@ -164,64 +183,19 @@ def toggle_upvote(solution_id: str, payload: UpvoteRequest):
         user_id = payload.user_id
         print(f"👍 Toggle upvote: solution={solution_id}, user={user_id}")
         
-        # ✅ Check if solution exists
-        solution_check = supabase.table("solutions")\
-            .select("id")\
-            .eq("id", solution_id)\
-            .execute()
-        
-        if not solution_check.data or len(solution_check.data) == 0:
-            raise HTTPException(status_code=404, detail="Solution not found")
-        
-        # ✅ Check if user already upvoted this solution
-        existing_vote = supabase.table("votes")\
-            .select("*")\
-            .eq("solution_id", solution_id)\
-            .eq("user_id", user_id)\
-            .eq("vote_type", "upvote")\
-            .execute()
-        
-        has_upvoted = len(existing_vote.data) > 0
-        
-        if has_upvoted:
-            # ✅ Remove upvote
-            supabase.table("votes")\
-                .delete()\
-                .eq("solution_id", solution_id)\
-                .eq("user_id", user_id)\
-                .execute()
-            
-            message = "Upvote removed"
-            new_status = False
-            print(f"➖ Upvote removed")
+        if VOTE_BUFFER_ENABLED:
+            # ✅ Buffered; the user's final state is written on the next flush
+            toggled = await vote_buffer.toggle_solution_upvote(solution_id, user_id)
         else:
-            # ✅ Add upvote
-            supabase.table("votes")\
-                .insert({
-                    "solution_id": solution_id,
-                    "user_id": user_id,
-                    "vote_type": "upvote"
-                })\
-                .execute()
-            
-            message = "Upvoted successfully"
-            new_status = True
-            print(f"➕ Upvote added")
-        
-        # ✅ Count total upvotes for this solution
-        total_upvotes = supabase.table("votes")\
-            .select("*", count="exact")\
-            .eq("solution_id", solution_id)\
-            .eq("vote_type", "upvote")\
-            .execute()
-        
-        vote_count = total_upvotes.count or 0
+            # ✅ Vote row and solutions.votes change together in one round-trip
+            toggled = await counters.toggle_solution_upvote(solution_id, user_id)
+            solution_cache.invalidate(solution_id)
+        if toggled is None:
+            raise HTTPException(status_code=404, detail="Solution not found")
         
-        # ✅ Update votes count in solutions table for caching
-        supabase.table("solutions")\
-            .update({"votes": vote_count})\
-            .eq("id", solution_id)\
-            .execute()
+        new_status, vote_count = toggled
+        message = "Upvoted successfully" if new_status else "Upvote removed"
+        print(f"{'➕' if new_status else '➖'} {message}")
         
         print(f"✅ Final vote count: {vote_count}")
         
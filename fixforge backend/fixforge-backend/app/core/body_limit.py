@@ -0,0 +1,71 @@
+"""
+Request body size limit.
+
+Multipart uploads are parsed (and spooled to disk) before an endpoint sees
+them, so a per-file check in the endpoint comes too late to stop a client
+sending gigabytes. This middleware rejects a request with 413 as soon as its
+Content-Length, or the bytes actually received, pass MAX_REQUEST_BODY_BYTES.
+
+Past the limit the wrapped receive() raises _BodyTooLarge. It is an
+HTTPException because FastAPI turns any other error raised while it reads
+the body into a 400 ("There was an error parsing the body"), but re-raises
+HTTPExceptions, which the app's exception handler answers with their 413.
+If the app doesn't answer, this middleware sends the 413 itself.
+"""
+
+import os
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Largest upload (a 10MB screenshot) plus room for the form fields
+MAX_REQUEST_BODY_BYTES = int(os.getenv("MAX_REQUEST_BODY_BYTES", str(12 * 1024 * 1024)))
+
+
+class _BodyTooLarge(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=413, detail="Request body too large")
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, max_bytes: int = MAX_REQUEST_BODY_BYTES) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        too_large = PlainTextResponse("Request body too large", status_code=413)
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await too_large(scope, receive, send)
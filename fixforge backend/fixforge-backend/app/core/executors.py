@@ -0,0 +1,86 @@
+"""
+Bounded executors for work that must not run on the asyncio event loop.
+
+- run_blocking(): synchronous I/O (Supabase client, requests, storage uploads)
+  on a dedicated thread pool of IO_POOL_WORKERS threads.
+- run_cpu(): CPU-bound work (model inference, image processing) on a process
+  pool of CPU_POOL_WORKERS processes; with CPU_POOL_WORKERS=0 it uses a small
+  in-process thread pool instead (one model copy, no pickling overhead).
+
+Async routes call these instead of invoking blocking code directly. Code that
+already runs off the loop on its own thread (the embedding batcher's
+dispatcher) submits to cpu_pool() directly and waits for the result.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "32"))
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "0"))
+CPU_THREAD_WORKERS = int(os.getenv("CPU_THREAD_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_lock = threading.Lock()
+_io_pool: Optional[ThreadPoolExecutor] = None
+_cpu_pool: Optional[Executor] = None
+
+
+def io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        with _lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="io")
+    return _io_pool
+
+
+def cpu_pool() -> Executor:
+    global _cpu_pool
+    if _cpu_pool is None:
+        with _lock:
+            if _cpu_pool is None:
+                if CPU_POOL_WORKERS > 0:
+                    # spawn, not fork: forking a process that already runs threads (and torch) is unsafe
+                    _cpu_pool = ProcessPoolExecutor(
+                        max_workers=CPU_POOL_WORKERS,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    _cpu_pool = ThreadPoolExecutor(max_workers=CPU_THREAD_WORKERS, thread_name_prefix="cpu")
+    return _cpu_pool
+
+
+def uses_process_pool() -> bool:
+    return CPU_POOL_WORKERS > 0
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking I/O on the I/O thread pool and await the result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_pool(), partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound work on the CPU pool; with a process pool ``fn`` and its arguments must be picklable"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    global _io_pool, _cpu_pool
+    with _lock:
+        for pool in (_io_pool, _cpu_pool):
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        _io_pool = None
+        _cpu_pool = None
+    logger.info("✅ Executors shut down")
@@ -0,0 +1,159 @@
+"""
+Async Supabase access for the routers.
+
+`db` wraps an AsyncPostgrestClient and an AsyncStorageClient, each on its own
+pooled keep-alive httpx.AsyncClient (they can't share one: both clients
+rewrite the base_url of the client they are given). The pools are opened in
+the app's startup event and closed on shutdown; routers use `db` the same
+way they used the sync client, but await `execute()`:
+
+    res = await db.table("bugs").select("*").eq("id", bug_id).execute()
+
+The synchronous `app.core.config.supabase` client remains for scripts, jobs
+and thread-pool code.
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from storage3 import AsyncStorageClient
+
+from app.core.config import SUPABASE_URL, SUPABASE_KEY
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "50"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() in ("1", "true", "yes")
+SUPABASE_POOL_SHARD_SIZE = int(os.getenv("SUPABASE_POOL_SHARD_SIZE", "10"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "30"))
+SUPABASE_STORAGE_TIMEOUT = float(os.getenv("SUPABASE_STORAGE_TIMEOUT", "60"))
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _ShardedTransport(httpx.AsyncBaseTransport):
+    """
+    Spreads requests over several small connection pools.
+
+    httpcore's pool re-checks every connection against every other one each
+    time a request starts or finishes, so one pool of 100 keep-alive
+    connections spends more CPU on bookkeeping than on HTTP. Shards of
+    SUPABASE_POOL_SHARD_SIZE connections keep that cost flat; each request
+    goes to the shard with the fewest requests in flight.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive: int, http2: bool):
+        shards = max(1, -(-max_connections // SUPABASE_POOL_SHARD_SIZE))
+        self._shards = [
+            httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=-(-max_connections // shards),
+                    max_keepalive_connections=-(-max_keepalive // shards),
+                ),
+                http2=http2,
+            )
+            for _ in range(shards)
+        ]
+        self._in_flight = [0] * shards
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        i = min(range(len(self._shards)), key=self._in_flight.__getitem__)
+        self._in_flight[i] += 1
+        try:
+            response = await self._shards[i].handle_async_request(request)
+            # Read the body here so the in-flight count covers the transfer too
+            await response.aread()
+            return response
+        finally:
+            self._in_flight[i] -= 1
+
+    async def aclose(self) -> None:
+        for shard in self._shards:
+            await shard.aclose()
+
+
+class AsyncSupabase:
+    """Pooled async PostgREST + Storage clients sharing the service key"""
+
+    def __init__(self, url: str = SUPABASE_URL, key: str = SUPABASE_KEY):
+        self.url = url.rstrip("/")
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+        self._postgrest: Optional[AsyncPostgrestClient] = None
+        self._storage: Optional[AsyncStorageClient] = None
+        self._http: list = []
+
+    def _http_client(self, timeout: float) -> httpx.AsyncClient:
+        client = httpx.AsyncClient(
+            transport=_ShardedTransport(
+                SUPABASE_MAX_CONNECTIONS,
+                SUPABASE_MAX_KEEPALIVE,
+                http2=SUPABASE_HTTP2 and _http2_available(),
+            ),
+            timeout=timeout,
+        )
+        self._http.append(client)
+        return client
+
+    async def start(self) -> None:
+        if self._postgrest is not None:
+            return
+        self._postgrest = AsyncPostgrestClient(
+            f"{self.url}/rest/v1",
+            headers={"Accept": "application/json", "Content-Type": "application/json", **self.headers},
+            http_client=self._http_client(SUPABASE_TIMEOUT),
+        )
+        self._storage = AsyncStorageClient(
+            f"{self.url}/storage/v1",
+            headers=dict(self.headers),
+            http_client=self._http_client(SUPABASE_STORAGE_TIMEOUT),
+        )
+        logger.info(f"🔗 Async Supabase pools opened (max {SUPABASE_MAX_CONNECTIONS} connections)")
+
+    async def close(self) -> None:
+        for client in self._http:
+            await client.aclose()
+        self._http.clear()
+        self._postgrest = None
+        self._storage = None
+
+    @property
+    def postgrest(self) -> AsyncPostgrestClient:
+        if self._postgrest is None:
+            raise RuntimeError("Async Supabase client not started (db.start() runs on app startup)")
+        return self._postgrest
+
+    @property
+    def storage(self) -> AsyncStorageClient:
+        if self._storage is None:
+            raise RuntimeError("Async Supabase client not started (db.start() runs on app startup)")
+        return self._storage
+
+    def table(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None):
+        return self.postgrest.rpc(fn, params or {})
+
+    async def table_columns(self) -> Dict[str, List[str]]:
+        """Column names of every exposed table/view, from PostgREST's OpenAPI description"""
+        res = await self.postgrest.session.get("/")
+        res.raise_for_status()
+        definitions = res.json().get("definitions") or {}
+        return {name: list((spec.get("properties") or {}).keys()) for name, spec in definitions.items()}
+
+
+# Singleton instance
+db = AsyncSupabase()
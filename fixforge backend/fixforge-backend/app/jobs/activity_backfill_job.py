@@ -0,0 +1,104 @@
+"""
+Backfill job for the activities table.
+
+The write endpoints append activities as they happen (app/services/activity_feed.py);
+this job creates the same events for history that predates that: account
+creation and profile achievements, reported bugs, posted and accepted
+solutions. Rows are keyed by event_key and existing keys are skipped, so it
+is safe to run against a live database and to re-run.
+
+Usage:
+    python -m app.jobs.activity_backfill_job
+    python -m app.jobs.activity_backfill_job --batch-size 1000
+    python -m app.jobs.activity_backfill_job --user <user_id>
+"""
+
+import time
+import argparse
+from typing import Iterator, List, Optional
+
+from postgrest.types import ReturnMethod
+
+from app.core.config import supabase
+from app.services.activity_feed import (
+    ACCEPTED_STATUS,
+    Activity,
+    account_created,
+    bug_reported,
+    profile_activities,
+    solution_accepted,
+    solution_posted,
+)
+
+
+def iter_rows(table: str, columns: str, batch_size: int, user_id: Optional[str] = None,
+              user_column: str = "user_id") -> Iterator[List[dict]]:
+    """Pages of a table in id order (keyset pagination)"""
+    last_id = None
+    while True:
+        query = supabase.table(table).select(columns).order("id").limit(batch_size)
+        if user_id:
+            query = query.eq(user_column, user_id)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data or []
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield rows
+
+
+def write(events: List[Activity]) -> int:
+    if not events:
+        return 0
+    supabase.table("activities").upsert(
+        events, on_conflict="event_key", ignore_duplicates=True, returning=ReturnMethod.minimal
+    ).execute()
+    return len(events)
+
+
+def run_backfill(batch_size: int = 500, user_id: Optional[str] = None) -> int:
+    total = 0
+    start = time.perf_counter()
+
+    for users in iter_rows("users", "id, display_name, bio, avatar, expertise, created_at",
+                           batch_size, user_id, user_column="id"):
+        events = []
+        for user in users:
+            if user.get("created_at"):
+                events.append(account_created(user))
+            events.extend(profile_activities(user, backfill=True))
+        total += write(events)
+    print(f"   users done: {total} events ({time.perf_counter() - start:.1f}s)")
+
+    for bugs in iter_rows("bugs", "id, user_id, title, created_at", batch_size, user_id):
+        total += write([bug_reported(b) for b in bugs if b.get("user_id")])
+    print(f"   bugs done: {total} events ({time.perf_counter() - start:.1f}s)")
+
+    for solutions in iter_rows("solutions", "id, user_id, title, status, created_at", batch_size, user_id):
+        events = []
+        for s in solutions:
+            if not s.get("user_id"):
+                continue
+            events.append(solution_posted(s))
+            if s.get("status") == ACCEPTED_STATUS:
+                events.append(solution_accepted(s, s.get("created_at")))
+        total += write(events)
+    print(f"   solutions done: {total} events ({time.perf_counter() - start:.1f}s)")
+
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the activity feed from history")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per page and per insert")
+    parser.add_argument("--user", type=str, default=None, help="Only backfill this user")
+    args = parser.parse_args()
+
+    print("🔵 Backfilling activities...")
+    total = run_backfill(args.batch_size, args.user)
+    print(f"✅ Submitted {total} events (existing ones skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Move base64 avatars out of the users table into blob storage.
+
+Uploads made before avatars went to storage left data: URLs of up to 5MB in
+users.avatar. This job pages through users whose avatar is still a data:
+URL, renders and uploads the thumbnails the same way POST
+/users/{id}/upload/avatar does (app/services/avatars.py) and replaces the
+column with the thumbnail URL and avatar_hash. A row is only updated while
+its avatar is still inline, so it is safe to run against a live database
+and to re-run.
+
+Usage:
+    python -m app.jobs.avatar_migration_job
+    python -m app.jobs.avatar_migration_job --batch-size 20 --concurrency 4
+    python -m app.jobs.avatar_migration_job --user <user_id>
+"""
+
+import time
+import asyncio
+import argparse
+from typing import List, Optional
+
+from app.db.session import db
+from app.services.avatars import InvalidImage, data_url_bytes, store_avatar
+from app.services.entity_cache import user_cache
+
+
+async def fetch_page(batch_size: int, after: Optional[str], user_id: Optional[str]) -> List[dict]:
+    """Users with an inline avatar, in id order (keyset pagination)"""
+    query = db.table("users").select("id, avatar").like("avatar", "data:%").order("id").limit(batch_size)
+    if user_id:
+        query = query.eq("id", user_id)
+    if after is not None:
+        query = query.gt("id", after)
+    return (await query.execute()).data or []
+
+
+async def migrate(user: dict) -> bool:
+    user_id = str(user["id"])
+    try:
+        stored = await store_avatar(user_id, data_url_bytes(user["avatar"]))
+    except InvalidImage as e:
+        print(f"   ⚠️ {user_id}: {e}; left as is")
+        return False
+    # Skipped if the user has set a new avatar since the page was read
+    res = await db.table("users").update({
+        "avatar": stored["avatar"],
+        "avatar_hash": stored["avatar_hash"],
+    }).eq("id", user_id).like("avatar", "data:%").execute()
+    user_cache.invalidate(user_id)
+    return bool(res.data)
+
+
+async def run_migration(batch_size: int = 50, concurrency: int = 4, user_id: Optional[str] = None) -> int:
+    await db.start()
+    migrated = 0
+    last_id = None
+    start = time.perf_counter()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(user: dict) -> bool:
+        async with sem:
+            return await migrate(user)
+
+    try:
+        while True:
+            users = await fetch_page(batch_size, last_id, user_id)
+            if not users:
+                break
+            last_id = users[-1]["id"]
+            migrated += sum(await asyncio.gather(*(one(user) for user in users)))
+            print(f"   {migrated} avatars moved ({time.perf_counter() - start:.1f}s)")
+    finally:
+        await db.close()
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move base64 avatars into blob storage")
+    # Rows hold up to 5MB each, so pages are small
+    parser.add_argument("--batch-size", type=int, default=50, help="Users read per page")
+    parser.add_argument("--concurrency", type=int, default=4, help="Avatars processed at once")
+    parser.add_argument("--user", help="Only migrate this user")
+    args = parser.parse_args()
+
+    print("🔵 Moving inline avatars to storage...")
+    total = asyncio.run(run_migration(args.batch_size, args.concurrency, args.user))
+    print(f"✅ Moved {total} avatars")
+
+
+if __name__ == "__main__":
+    main()
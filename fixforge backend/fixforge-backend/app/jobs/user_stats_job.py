@@ -0,0 +1,75 @@
+"""
+Backfill / repair job for the user_stats table.
+
+Triggers keep user_stats current from the moment the migration
+(supabase/migrations/20261017120000_user_stats.sql) is applied; this job
+rebuilds rows from the full history of solutions, bugs and votes, for
+existing data or after a manual fix in the database. It pages through the
+users table and rebuilds each page with one rebuild_user_stats RPC, so no
+single statement has to scan the whole history.
+
+Usage:
+    python -m app.jobs.user_stats_job
+    python -m app.jobs.user_stats_job --batch-size 200
+    python -m app.jobs.user_stats_job --user <user_id> --user <user_id>
+    python -m app.jobs.user_stats_job --all   # one statement, every author
+"""
+
+import time
+import argparse
+from typing import Iterator, List, Optional
+
+from app.core.config import supabase
+
+
+def rebuild(user_ids: Optional[List[str]] = None) -> int:
+    """Rebuild the given users' stats (every author when None); returns rows written"""
+    res = supabase.rpc("rebuild_user_stats", {"p_user_ids": user_ids}).execute()
+    data = res.data
+    if isinstance(data, list):
+        data = data[0] if data else 0
+    return int(data or 0)
+
+
+def iter_user_ids(batch_size: int) -> Iterator[List[str]]:
+    """Pages of user ids in id order (keyset pagination)"""
+    last_id = None
+    while True:
+        query = supabase.table("users").select("id").order("id").limit(batch_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data or []
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield [str(r["id"]) for r in rows]
+
+
+def run_backfill(batch_size: int = 500) -> int:
+    total = 0
+    start = time.perf_counter()
+    for page, user_ids in enumerate(iter_user_ids(batch_size), 1):
+        total += rebuild(user_ids)
+        print(f"   page {page}: {total} users rebuilt ({time.perf_counter() - start:.1f}s)")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild user_stats from history")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per rebuild_user_stats call")
+    parser.add_argument("--user", action="append", default=[], help="Only rebuild this user (repeatable)")
+    parser.add_argument("--all", action="store_true", help="Rebuild every author in a single statement")
+    args = parser.parse_args()
+
+    print("🔵 Rebuilding user_stats...")
+    if args.user:
+        total = rebuild(args.user)
+    elif args.all:
+        total = rebuild(None)
+    else:
+        total = run_backfill(args.batch_size)
+    print(f"✅ Rebuilt stats for {total} users")
+
+
+if __name__ == "__main__":
+    main()
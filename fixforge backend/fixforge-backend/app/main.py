@@ -1,7 +1,12 @@
 # app/main.py
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import supabase
+from app.utils.file_storage import FILE_STORAGE_BUCKET, FILE_STORAGE_DIR, FILE_STORAGE_URL_PATH, uses_local_storage
 
 # Import existing API routes
 from app.api import bugs, solutions , clusters, aisuggested, bug_clusters, cluster_routes
@@ -10,8 +15,10 @@ from app.api import bugs, solutions , clusters, aisuggested, bug_clusters, clust
 from app.routers import getsolution, users, auth, api_keys, moderation, search
 from app.routers import comments
 
-app = FastAPI(title="FixForge Backend", version="1.0.0")
+app = FastAPI(title="FixForge Backend", version="1.0.0", default_response_class=ORJSONResponse)
 
+# Oversized uploads are refused before they are parsed (inside CORS, so the 413 is readable)
+app.add_middleware(BodySizeLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -22,7 +29,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Outermost, so CORS headers and 304s pass through it unchanged
+app.add_middleware(CompressionMiddleware)
 
 # Register existing api routes - prefixes included explicitly
 app.include_router(bugs.router, prefix="/bugs", tags=["Bugs"])
@@ -45,17 +55,75 @@ app.include_router(comments.router, prefix="/comments", tags=["Comments"])
 # ✅ ENDEE: Register semantic search router
 app.include_router(search.router, prefix="/search", tags=["Semantic Search"])
 
+# Local stand-in for blob storage (FILE_STORAGE_BACKEND=local)
+if uses_local_storage():
+    from fastapi.staticfiles import StaticFiles
+    os.makedirs(FILE_STORAGE_DIR, exist_ok=True)
+    app.mount(FILE_STORAGE_URL_PATH, StaticFiles(directory=FILE_STORAGE_DIR), name="media")
+
+
+@app.on_event("startup")
+async def open_supabase_pool():
+    """Open the pooled async Supabase clients the routers share"""
+    from app.db.session import db
+    from app.services.vote_buffer import VOTE_BUFFER_ENABLED, vote_buffer
+    from app.services.activity_feed import activity_feed
+    await db.start()
+    print("✅ Async Supabase pool opened")
+    if VOTE_BUFFER_ENABLED:
+        vote_buffer.start()
+    activity_feed.start()
 
 @app.on_event("startup")
 def startup_event():
     """Initialize services on startup"""
     # Initialize Endee connection
+    # Endee connections and index verification are lazy (first request)
     from app.services.endee_client import endee_service
     print("✅ Endee service initialized")
+
+    # Load the shared embedding model before the first request needs it
+    from app.services.embeddings import embedding_service
+    embedding_service.warmup()
+    print("✅ Embedding model loaded")
+
+    # Build the BM25 index for hybrid search in the background
+    from app.services.lexical_index import LEXICAL_INDEX_BOOTSTRAP, bootstrap_from_supabase, lexical_index
+    if LEXICAL_INDEX_BOOTSTRAP:
+        from app.core.executors import io_pool
+        future = io_pool().submit(bootstrap_from_supabase, lexical_index)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"⚠️ Lexical index bootstrap failed: {f.exception()}")
+        )
+
+    # Fill the local Endee mirror (search failover) with bugs the snapshot doesn't hold
+    from app.services.local_vector_index import LOCAL_VECTOR_INDEX_BOOTSTRAP, bootstrap_from_supabase as bootstrap_local_vectors
+    if LOCAL_VECTOR_INDEX_BOOTSTRAP:
+        from app.core.executors import io_pool
+        future = io_pool().submit(bootstrap_local_vectors, endee_service.local)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"⚠️ Local vector index bootstrap failed: {f.exception()}")
+        )
     
     # Ensure storage bucket exists
     ensure_storage_bucket()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled connections and release executor threads/processes"""
+    from app.services.endee_client import endee_service
+    from app.core.executors import shutdown_executors
+    from app.db.session import db
+    from app.services.vote_buffer import vote_buffer
+    from app.services.activity_feed import activity_feed
+    await endee_service.aclose()
+    # Flush buffered votes and activities while the Supabase pool is still open
+    await vote_buffer.close()
+    await activity_feed.close()
+    await db.close()
+    endee_service.local.save_if_dirty()
+    shutdown_executors()
+
 @app.on_event("startup")
 def ensure_storage_bucket():
     try:
@@ -82,6 +150,13 @@ def ensure_storage_bucket():
                 print("Failed to create 'screenshots' bucket:", e)
         else:
             print("Bucket 'screenshots' already exists.")
+
+        if not uses_local_storage() and FILE_STORAGE_BUCKET not in bucket_names:
+            try:
+                supabase.storage.create_bucket(FILE_STORAGE_BUCKET, options={"public": True})
+                print(f"Created '{FILE_STORAGE_BUCKET}' bucket.")
+            except Exception as e:
+                print(f"Failed to create '{FILE_STORAGE_BUCKET}' bucket:", e)
     except Exception as e:
         print("Storage bucket check failed:", e)
 
@@ -92,3 +167,31 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "version": "1.0.0"}
+
+@app.get("/health/caches")
+def cache_stats():
+    """Hit/miss counters for the in-process caches, for tuning"""
+    from app.services.embeddings import embedding_service
+    from app.services.embedding_batcher import embedding_batcher
+    from app.services.endee_client import endee_service
+    from app.services.search_cache import search_cache
+    from app.services.lexical_index import lexical_index
+    from app.services.entity_cache import entity_cache_stats
+    from app.services.vote_buffer import vote_buffer
+    from app.services.activity_feed import activity_feed
+    from app.services.api_keys import api_key_cache
+    from app.services.screenshots import screenshot_store
+    from app.services.ai_suggestions import ai_suggestion_cache
+    return {
+        "embeddings": embedding_service.cache_stats(),
+        "embedding_batches": embedding_batcher.stats(),
+        "local_vector_index": endee_service.local.stats(),
+        "search": search_cache.stats(),
+        "lexical_index": lexical_index.stats(),
+        "entities": entity_cache_stats(),
+        "vote_buffer": vote_buffer.stats(),
+        "activity_feed": activity_feed.stats(),
+        "api_keys": api_key_cache.stats(),
+        "screenshots": screenshot_store.stats(),
+        "ai_suggestions": ai_suggestion_cache.stats(),
+    }
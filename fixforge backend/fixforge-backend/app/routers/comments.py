@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from app.core.config import supabase
+from app.db.session import db
+from app.services.entity_cache import solution_cache
+from app.services.counters import counters
 from typing import Optional
 from datetime import datetime
 import uuid
@@ -16,11 +18,11 @@ class CommentUpdate(BaseModel):
     content: str
 
 @router.get("/solution/{solution_id}")
-def get_comments(solution_id: str):
+async def get_comments(solution_id: str):
     """Get all comments for a solution with user info."""
     try:
         # Join with users table to get user details
-        res = supabase.table("comments").select(
+        res = await db.table("comments").select(
             "*, users(id, email, username, display_name)"
         ).eq("solution_id", solution_id).order("created_at", desc=False).execute()
         
@@ -50,7 +52,7 @@ def get_comments(solution_id: str):
 
 
 @router.post("")
-def create_comment(comment: CommentCreate):
+async def create_comment(comment: CommentCreate):
     """Create a new comment."""
     try:
         if not comment.content.strip():
@@ -66,13 +68,11 @@ def create_comment(comment: CommentCreate):
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        res = supabase.table("comments").insert(new_comment).execute()
+        res = await db.table("comments").insert(new_comment).execute()
         
         # Update solution comment count
-        solution_res = supabase.table("solutions").select("comments").eq("id", comment.solution_id).execute()
-        if solution_res.data:
-            current_count = solution_res.data[0].get("comments", 0) or 0
-            supabase.table("solutions").update({"comments": current_count + 1}).eq("id", comment.solution_id).execute()
+        await counters.adjust_solution_comments(comment.solution_id, 1)
+        solution_cache.invalidate(comment.solution_id)
         
         return {"message": "Comment created successfully", "comment": res.data[0] if res.data else new_comment}
     except HTTPException:
@@ -83,7 +83,7 @@ def create_comment(comment: CommentCreate):
 
 
 @router.put("/{comment_id}")
-def update_comment(comment_id: str, comment_update: CommentUpdate):
+async def update_comment(comment_id: str, comment_update: CommentUpdate):
     """Update a comment."""
     try:
         if not comment_update.content.strip():
@@ -94,7 +94,7 @@ def update_comment(comment_id: str, comment_update: CommentUpdate):
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        res = supabase.table("comments").update(update_data).eq("id", comment_id).execute()
+        res = await db.table("comments").update(update_data).eq("id", comment_id).execute()
         
         if not res.data:
             raise HTTPException(status_code=404, detail="Comment not found")
@@ -108,22 +108,18 @@ def update_comment(comment_id: str, comment_update: CommentUpdate):
 
 
 @router.delete("/{comment_id}")
-def delete_comment(comment_id: str, solution_id: str = Query(...)):
+async def delete_comment(comment_id: str, solution_id: str = Query(...)):
     """Delete a comment."""
     try:
-        # Check if comment exists
-        check = supabase.table("comments").select("id").eq("id", comment_id).execute()
-        if not check.data:
+        # Delete comment (the deleted row comes back, so a miss means it didn't exist)
+        deleted = await db.table("comments").delete().eq("id", comment_id).execute()
+        if not deleted.data:
             raise HTTPException(status_code=404, detail="Comment not found")
         
-        # Delete comment
-        supabase.table("comments").delete().eq("id", comment_id).execute()
-        
         # Update solution comment count
-        solution_res = supabase.table("solutions").select("comments").eq("id", solution_id).execute()
-        if solution_res.data:
-            current_count = solution_res.data[0].get("comments", 0) or 0
-            supabase.table("solutions").update({"comments": max(0, current_count - 1)}).eq("id", solution_id).execute()
+        solution_id = deleted.data[0].get("solution_id") or solution_id
+        await counters.adjust_solution_comments(solution_id, -1)
+        solution_cache.invalidate(solution_id)
         
         return {"message": "Comment deleted successfully", "comment_id": comment_id}
     except HTTPException:
@@ -1,17 +1,24 @@
-from fastapi import APIRouter, HTTPException, Query,Depends
+from fastapi import APIRouter, HTTPException, Query,Depends, Request
 from pydantic import BaseModel
-from app.core.config import supabase
+from app.db.session import db
+from app.services.entity_cache import solution_cache
+from app.services.vote_buffer import vote_buffer
+from app.services.activity_feed import ACCEPTED_STATUS, activity_feed, solution_accepted
 from typing import Optional
 from app.dependencies import get_user_from_api_key
+from app.utils.etag import json_with_etag, rows_etag
+from app.utils.fields import project, select_columns
 router = APIRouter()
 
 class StatusUpdate(BaseModel):
     status: str  # "Open", "In Progress", "Solved", "Needs Review"
 
 @router.get("")
-def get_solutions(
+async def get_solutions(
+    request: Request,
     user_id: str = Query(None), 
     bug_id: str = Query(None),
+    fields: str = Query(None, description="Comma-separated columns to return (default: all but heavy columns)"),
     # ✅ Add this optional dependency
     api_key_user_id: Optional[str] = Depends(get_user_from_api_key)
 ):
@@ -21,7 +28,11 @@ def get_solutions(
     - If no API Key: Works as a public/normal endpoint.
     """
     try:
-        query = supabase.table("solutions").select("*")
+        columns = await select_columns("solutions", fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        query = db.table("solutions").select(columns)
         
         # Logic: If API key is used, default to showing THAT user's solutions
         # unless they explicitly asked for someone else's (user_id param)
@@ -36,25 +47,35 @@ def get_solutions(
         if bug_id:
             query = query.eq("bug_id", bug_id)
         
-        res = query.order("created_at", desc=True).execute()
-        return res.data or []
+        res = await query.order("created_at", desc=True).execute()
+        rows = res.data or []
+        # 304 for pollers whose copy is current; otherwise orjson straight from the rows
+        return json_with_etag(request, rows, rows_etag(rows, extra=columns))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch solutions: {e}")
 @router.get("/{solution_id}")
-def get_solution_detail(solution_id: str, user_id: str = Query(None)):
+async def get_solution_detail(
+    solution_id: str,
+    user_id: str = Query(None),
+    fields: str = Query(None, description="Comma-separated columns to return (default: all but heavy columns)"),
+):
     """Get detailed information for a specific solution."""
     try:
-        res = supabase.table("solutions").select("*").eq("id", solution_id).execute()
+        solution = await solution_cache.get(solution_id)
         
-        if not res.data or len(res.data) == 0:
+        if not solution:
             raise HTTPException(status_code=404, detail="Solution not found")
         
-        solution = res.data[0]
+        # ✅ Include votes still waiting in the write-behind buffer
+        solution["votes"] = max(0, (solution.get("votes") or 0) + vote_buffer.pending_solution_votes(solution_id))
         
         # ✅ Check if current user has upvoted this solution
-        if user_id:
-            upvote_check = supabase.table("votes")\
+        pending = vote_buffer.pending_upvote(solution_id, user_id) if user_id else None
+        if pending is not None:
+            solution["has_upvoted"] = pending
+        elif user_id:
+            upvote_check = await db.table("votes")\
                 .select("*")\
                 .eq("solution_id", solution_id)\
                 .eq("user_id", user_id)\
@@ -65,27 +86,29 @@ def get_solution_detail(solution_id: str, user_id: str = Query(None)):
         else:
             solution["has_upvoted"] = False
         
-        return solution
+        return project(solution, fields, require=("id", "has_upvoted"))
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch solution: {e}")
 
 @router.put("/{solution_id}")
-def update_solution(solution_id: str, update_data: dict):
+async def update_solution(solution_id: str, update_data: dict):
     """Update a solution (for edit functionality)."""
     try:
         user_id = update_data.get("user_id")
         
         # Check if solution exists and get owner
-        check = supabase.table("solutions").select("id, user_id").eq("id", solution_id).execute()
+        check = await solution_cache.get(solution_id)
         
-        if not check.data or len(check.data) == 0:
+        if not check:
             raise HTTPException(status_code=404, detail="Solution not found")
         
         # ✅ Verify ownership
-        solution_owner = check.data[0]["user_id"]
+        solution_owner = check["user_id"]
         if user_id and solution_owner != user_id:
             raise HTTPException(status_code=403, detail="You can only edit your own solutions")
         
@@ -93,10 +116,13 @@ def update_solution(solution_id: str, update_data: dict):
         update_payload = {k: v for k, v in update_data.items() if k != "user_id"}
         
         # Update the solution
-        res = supabase.table("solutions")\
+        res = await db.table("solutions")\
             .update(update_payload)\
             .eq("id", solution_id)\
             .execute()
+        solution_cache.invalidate(solution_id)
+        if res.data and res.data[0].get("status") == ACCEPTED_STATUS and check.get("status") != ACCEPTED_STATUS:
+            activity_feed.record(solution_accepted(res.data[0]))
         
         return {
             "message": "Solution updated successfully", 
@@ -109,7 +135,7 @@ def update_solution(solution_id: str, update_data: dict):
         raise HTTPException(status_code=500, detail=f"Failed to update solution: {e}")
 
 @router.patch("/{solution_id}/status")
-def update_solution_status(solution_id: str, status_update: StatusUpdate):
+async def update_solution_status(solution_id: str, status_update: StatusUpdate):
     """Update only the status of a solution."""
     try:
         valid_statuses = ["Open", "In Progress", "Solved", "Needs Review"]
@@ -120,10 +146,11 @@ def update_solution_status(solution_id: str, status_update: StatusUpdate):
             )
         
         # Update and immediately fetch the result
-        res = supabase.table("solutions")\
+        res = await db.table("solutions")\
             .update({"status": status_update.status})\
             .eq("id", solution_id)\
             .execute()
+        solution_cache.invalidate(solution_id)
         
         if not res.data or len(res.data) == 0:
             raise HTTPException(status_code=404, detail="Solution not found")
@@ -140,20 +167,17 @@ def update_solution_status(solution_id: str, status_update: StatusUpdate):
         raise HTTPException(status_code=500, detail=f"Failed to update status: {e}")
 
 @router.delete("/{solution_id}")
-def delete_solution(solution_id: str, user_id: str = Query(...)):
+async def delete_solution(solution_id: str, user_id: str = Query(...)):
     """Delete a solution by ID - only if user owns it."""
     try:
         # Check if solution exists AND get its owner
-        check = supabase.table("solutions")\
-            .select("id, user_id")\
-            .eq("id", solution_id)\
-            .execute()
+        check = await solution_cache.get(solution_id)
         
-        if not check.data or len(check.data) == 0:
+        if not check:
             raise HTTPException(status_code=404, detail="Solution not found")
         
         # ✅ Verify ownership
-        solution_owner = check.data[0]["user_id"]
+        solution_owner = check["user_id"]
         if solution_owner != user_id:
             raise HTTPException(
                 status_code=403, 
@@ -161,7 +185,8 @@ def delete_solution(solution_id: str, user_id: str = Query(...)):
             )
         
         # Delete the solution (votes will cascade delete automatically)
-        supabase.table("solutions").delete().eq("id", solution_id).execute()
+        await db.table("solutions").delete().eq("id", solution_id).execute()
+        solution_cache.invalidate(solution_id)
         
         return {
             "message": "Solution deleted successfully", 
@@ -1,7 +1,7 @@
 # routers/moderation.py
 from fastapi import APIRouter, HTTPException, Header
 from typing import Optional
-from app.core.config import supabase
+from app.db.session import db
 
 router = APIRouter( tags=["moderation"])
 
@@ -13,12 +13,12 @@ async def update_moderation_settings(
 ):
     try:
         # Verify user is moderator/admin
-        user = supabase.table("users").select("role").eq("id", user_id).execute()
+        user = await db.table("users").select("role").eq("id", user_id).execute()
         if not user.data or user.data[0].get("role") not in ["moderator", "admin"]:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         
         # Update settings
-        result = supabase.table("moderation_settings").upsert({
+        result = await db.table("moderation_settings").upsert({
             "user_id": user_id,
             **settings
         }).execute()
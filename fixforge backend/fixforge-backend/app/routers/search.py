@@ -1,40 +1,109 @@
 """
 Semantic search endpoint using Endee vector similarity.
+
+mode=hybrid also runs a BM25 lookup over the in-process lexical index and
+fuses both rankings with reciprocal rank fusion, which helps queries made of
+exact error strings, stack-trace symbols or tags. Hybrid results carry
+similarity_score (cosine, from Endee), lexical_score (BM25) and fusion_score;
+a ranker's score is null when the bug was not among its candidates, so a
+lexical-only hit has similarity_score null.
 """
 
+import os
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from app.services.endee_client import endee_service
-from app.core.config import supabase
-from sentence_transformers import SentenceTransformer
+from app.db.session import db
+from app.core.executors import run_blocking
+from app.services.embedding_batcher import embedding_batcher
+from app.services.search_cache import search_cache, search_key
+from app.services.lexical_index import lexical_index, reciprocal_rank_fusion
+from app.utils.fields import select_columns
 from typing import List, Dict, Any
 
 router = APIRouter()
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Each ranker contributes top_k * this many candidates to the fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "4"))
 
 
 @router.get("/semantic")
-def semantic_search(
+async def semantic_search(
     query: str = Query(..., description="Natural language search query", min_length=3),
     top_k: int = Query(10, ge=1, le=50),
     severity: str = Query(None),
-    status: str = Query(None)
+    status: str = Query(None),
+    mode: str = Query("vector", pattern="^(vector|hybrid)$", description="vector, or hybrid (BM25 + vector, RRF)"),
+    fields: str = Query(None, description="Comma-separated columns to return (default: all but heavy columns)"),
 ):
-    
-    query_vector = model.encode(query).tolist()
-    
+    try:
+        columns = await select_columns("bugs", fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     filters = {}
     if severity:
         filters["severity"] = severity
     if status:
         filters["status"] = status
-    
-    search_results = endee_service.search_similar_bugs(
+
+    # Only the ranking is cached; rows are read fresh so votes, status and
+    # solution counts are current even on a cache hit
+    key = search_key(query, top_k, severity, status, mode)
+    ranking = await search_cache.get_or_compute(key, lambda: _rank(query, top_k, filters, mode))
+    return await _hydrate(query, ranking, filters, mode, columns)
+
+
+async def _hybrid_search(query: str, top_k: int, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """Fuse vector and BM25 rankings; returns Endee-shaped items with the extra scores"""
+    candidates = min(100, top_k * HYBRID_CANDIDATES)
+
+    async def vector_search() -> List[Dict[str, Any]]:
+        query_vector = await embedding_batcher.embed_async(query)
+        return await endee_service.search_similar_bugs(
+            query_vector=query_vector,
+            top_k=candidates,
+            metadata_filters=filters
+        )
+
+    # BM25 runs alongside the embedding and Endee calls; gather raises the first
+    # failure and still collects the other side, so nothing is left unawaited
+    vector_results, lexical_results = await asyncio.gather(
+        vector_search(),
+        run_blocking(lexical_index.search, query, candidates, filters),
+    )
+
+    vector_scores = {r["id"]: r["score"] for r in vector_results}
+    lexical_scores = {r["id"]: r["score"] for r in lexical_results}
+    fused = reciprocal_rank_fusion([vector_results, lexical_results], k=RRF_K)[:top_k]
+    return [
+        {
+            "id": bug_id,
+            # None (null in the response) when only one ranker found the bug
+            "score": vector_scores.get(bug_id),
+            "lexical_score": lexical_scores.get(bug_id),
+            "fusion_score": fusion_score,
+        }
+        for bug_id, fusion_score in fused
+    ]
+
+
+async def _rank(query: str, top_k: int, filters: Dict[str, Any], mode: str) -> List[Dict[str, Any]]:
+    """Ranked [{"id", "score", ...}] for a query; what the search cache stores"""
+    if mode == "hybrid":
+        return await _hybrid_search(query, top_k, filters if filters else None)
+    query_vector = await embedding_batcher.embed_async(query)
+    results = await endee_service.search_similar_bugs(
         query_vector=query_vector,
         top_k=top_k,
         metadata_filters=filters if filters else None
     )
-    
+    return [{"id": r["id"], "score": r["score"]} for r in results]
+
+
+async def _hydrate(
+    query: str, search_results: List[Dict[str, Any]], filters: Dict[str, Any], mode: str, columns: str = "*"
+) -> Dict[str, Any]:
     if not search_results:
         return {
             "query": query,
@@ -44,22 +113,21 @@ def semantic_search(
         }
     
     bug_ids = [r["id"] for r in search_results]
+    bugs_res, solutions_res = await asyncio.gather(
+        db.table("bugs").select(columns).in_("id", bug_ids).execute(),
+        db.table("solutions").select("bug_id, id").in_("bug_id", bug_ids).execute(),
+        return_exceptions=True,
+    )
+
+    if isinstance(bugs_res, Exception):
+        raise HTTPException(status_code=500, detail=f"Failed to fetch bug metadata: {bugs_res}")
+    bugs_map = {b["id"]: b for b in (bugs_res.data or [])}
     
-    try:
-        bugs_res = supabase.table("bugs").select("*").in_("id", bug_ids).execute()
-        bugs_map = {b["id"]: b for b in (bugs_res.data or [])}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch bug metadata: {e}")
-    
-    
-    try:
-        solutions_res = supabase.table("solutions").select("bug_id, id").in_("bug_id", bug_ids).execute()
-        solutions_map = {}
+    solutions_map = {}
+    if not isinstance(solutions_res, Exception):
         for sol in (solutions_res.data or []):
             bug_id = sol["bug_id"]
             solutions_map[bug_id] = solutions_map.get(bug_id, 0) + 1
-    except Exception:
-        solutions_map = {}
     
     results = []
     for item in search_results:
@@ -71,18 +139,20 @@ def semantic_search(
                 **bug,
                 "similarity_score": item["score"],
                 "search_rank": len(results) + 1,
-                "solution_count": solutions_map.get(bug_id, 0)
+                "solution_count": solutions_map.get(bug_id, 0),
+                **{k: item[k] for k in ("lexical_score", "fusion_score") if k in item}
             })
     
     return {
         "query": query,
         "total_results": len(results),
         "bugs": results,
-        "filters_applied": filters if filters else None
+        "filters_applied": filters if filters else None,
+        "mode": mode
     }
 
 
 @router.get("/stats")
-def search_stats():
-    stats = endee_service.get_collection_stats()
+async def search_stats():
+    stats = await endee_service.get_collection_stats()
     return stats
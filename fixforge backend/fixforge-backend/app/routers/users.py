@@ -1,11 +1,23 @@
 # app/routers/users.py
-from fastapi import APIRouter, HTTPException, UploadFile, File  # ✅ Add UploadFile and File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response  # ✅ Add UploadFile and File
 from pydantic import BaseModel
 from typing import Optional, List
-from app.core.config import supabase
+from app.db.session import db
+from app.services.entity_cache import user_cache
+from app.services.api_keys import api_key_cache, display_prefix, generate_api_key as new_api_key, hash_api_key
+from app.services.activity_feed import activity_feed, avatar_set, milestone_completed, profile_activities
+from app.services.avatars import (
+    AVATAR_MAX_BYTES,
+    InvalidImage,
+    data_url_bytes,
+    delete_avatar,
+    is_data_url,
+    store_avatar,
+    thumbnail_urls,
+)
+from app.utils.pagination import encode_cursor, keyset_after
+from app.utils.fields import project
 from datetime import datetime
-import uuid
-import base64 
 from datetime import datetime, timedelta, timezone
 
 
@@ -42,20 +54,26 @@ class PreferencesUpdate(BaseModel):
 # --- Core User Endpoints ---
 
 @router.get("/{user_id}")
-async def get_user_profile(user_id: str):
+async def get_user_profile(
+    user_id: str,
+    fields: str = Query(None, description="Comma-separated fields to return (default: the whole profile)"),
+):
     """Get complete user profile with all fields"""
     try:
-        response = supabase.from_("users").select("*").eq("id", user_id).limit(1).execute()
-        if not response.data:
+        user = await user_cache.get(user_id)
+        if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = response.data[0]
-        
         # ✅ Map 'avatar' to 'avatar_url' for frontend compatibility
         if 'avatar' in user and user['avatar']:
-            user['avatar_url'] = user['avatar']
-        
-        return user
+            user = {**user, 'avatar_url': user['avatar']}
+            thumbnails = thumbnail_urls(user)
+            if thumbnails:
+                user['avatar_thumbnails'] = thumbnails
+        
+        return project(user, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -72,22 +90,45 @@ async def update_user_profile(user_id: str, user_data: UserUpdate):
         if 'avatar_url' in updates:
             updates['avatar'] = updates.pop('avatar_url')
         
+        previous = None
+        if 'avatar' in updates:
+            previous = await user_cache.get(user_id)
+            if is_data_url(updates['avatar']):
+                # Inline images go to blob storage like uploads; the row keeps only the URL
+                try:
+                    stored = await store_avatar(user_id, data_url_bytes(updates['avatar']))
+                except InvalidImage as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                updates['avatar'] = stored['avatar']
+                updates['avatar_hash'] = stored['avatar_hash']
+            elif updates['avatar'] != (previous or {}).get('avatar'):
+                # A preset or external URL replaces the stored upload
+                updates['avatar_hash'] = None
+        
         # ✅ Add updated_at timestamp
         updates['updated_at'] = datetime.now().isoformat()
         
         print(f"🔵 Updating user {user_id} with data:", updates)
         
         # Update the user
-        result = supabase.from_("users").update(updates).eq("id", user_id).execute()
+        result = await db.from_("users").update(updates).eq("id", user_id).execute()
+        user_cache.invalidate(user_id)
         
         if not result.data:
             raise HTTPException(status_code=404, detail="User not found")
         
         updated_user = result.data[0]
+        if 'avatar_hash' in updates:
+            await _discard_previous_avatar(user_id, previous, updates['avatar_hash'])
+        # Achievements for the fields set by this update (each one is recorded once)
+        activity_feed.record(*profile_activities({"id": user_id, **updates}))
         
         # ✅ Map 'avatar' back to 'avatar_url' for response
         if 'avatar' in updated_user and updated_user['avatar']:
             updated_user['avatar_url'] = updated_user['avatar']
+            thumbnails = thumbnail_urls(updated_user)
+            if thumbnails:
+                updated_user['avatar_thumbnails'] = thumbnails
         
         print(f"🔵 Update successful:", updated_user)
         return updated_user
@@ -107,7 +148,7 @@ async def partial_update_user_profile(user_id: str, user_data: UserUpdate):
 @router.get("/{user_id}/preferences")
 async def get_user_preferences(user_id: str):
     try:
-        res = supabase.from_("user_preferences").select("*").eq("user_id", user_id).single().execute()
+        res = await db.from_("user_preferences").select("*").eq("user_id", user_id).single().execute()
         
         if res.data:
             prefs = res.data
@@ -172,7 +213,7 @@ async def update_user_preferences(user_id: str, prefs: PreferencesUpdate):
         }
         
         # Upsert to Database
-        supabase.from_("user_preferences").upsert(data).execute()
+        await db.from_("user_preferences").upsert(data).execute()
         
         return {"message": "Preferences updated", "data": data}
     except Exception as e:
@@ -189,7 +230,7 @@ async def get_api_keys(user_id: str):
     """Fetch the active API key for a user"""
     try:
         # Fetch only the most recent active key
-        res = supabase.from_("api_keys")\
+        res = await db.from_("api_keys")\
             .select("*")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
@@ -197,7 +238,11 @@ async def get_api_keys(user_id: str):
             .execute()
             
         if res.data and len(res.data) > 0:
-            return res.data[0] # Return single key object
+            key = res.data[0] # Return single key object
+            # Only the digest is stored; show the prefix so the user can recognise the key
+            key.pop("key_hash", None)
+            key["key"] = f"{key.get('key_prefix') or ''}…"
+            return key
         return {} # Return empty if no key exists
     except Exception as e:
         print(f"Error fetching API keys: {e}")
@@ -218,18 +263,19 @@ async def get_api_stats(user_id: str):
 async def generate_api_key(user_id: str):
     """Generate a new API key"""
     try:
-        new_key = f"fx_{uuid.uuid4().hex[:24]}" # Production-style prefix
+        new_key = new_api_key() # Production-style prefix
         
         key_data = {
             "user_id": user_id,
             "name": "Production Key",
-            "key": new_key,
+            "key_hash": hash_api_key(new_key),  # the plaintext is only returned once, below
+            "key_prefix": display_prefix(new_key),
             "created_at": datetime.now().isoformat(),
             "is_active": True
         }
         
         # Insert new key
-        res = supabase.from_("api_keys").insert(key_data).execute()
+        res = await db.from_("api_keys").insert(key_data).execute()
         
         if res.data:
             return {"api_key": new_key, "created_at": key_data["created_at"]}
@@ -244,7 +290,8 @@ async def revoke_api_key(user_id: str):
     """Revoke (delete) all API keys for this user"""
     try:
         # Delete all keys for this user
-        supabase.from_("api_keys").delete().eq("user_id", user_id).execute()
+        await db.from_("api_keys").delete().eq("user_id", user_id).execute()
+        api_key_cache.invalidate_user(user_id)
         return {"message": "Key revoked successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -255,7 +302,7 @@ async def export_user_data(user_id: str):
     """Export user data as JSON"""
     try:
         # Fetch user's solutions/bugs/profile
-        solutions = supabase.from_("solutions").select("*").eq("user_id", user_id).execute()
+        solutions = await db.from_("solutions").select("*").eq("user_id", user_id).execute()
         
         export_data = {
             "user_id": user_id,
@@ -273,158 +320,48 @@ async def export_user_data(user_id: str):
 # app/routers/users.py
 
 @router.get("/{user_id}/activities")
-async def get_user_activities(user_id: str):
-    """Get user's recent activities - includes profile AND bugs/solutions"""
+async def get_user_activities(
+    user_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None, description="X-Next-Cursor value from the previous page"),
+):
+    """
+    One page of the user's activity feed, newest first. Activities are written
+    by the endpoints that cause them (app/services/activity_feed.py); the
+    cursor for the next page is returned in the X-Next-Cursor header.
+    """
     try:
-        print(f"🔵 Fetching activities for user: {user_id}")
-        
-        # Try to fetch from activities table
-        res = supabase.from_("activities").select("*").eq("user_id", user_id).order("created_at", desc=True).limit(20).execute()
-        
-        if res.data and len(res.data) > 0:
-            print(f"✅ Found {len(res.data)} activities from database")
-            return res.data
-        
-        # If no activities, generate from user data
-        print(f"🔵 No activities found, generating from user data...")
-        
-        from datetime import datetime, timedelta
-        generated_activities = []
-        
-        # === FETCH REAL BUGS REPORTED BY USER ===
-        print(f"📊 Fetching bugs reported by user...")
-        bugs_res = supabase.from_("bugs").select(
-            "id, title, created_at"
-        ).eq("user_id", user_id).order("created_at", desc=True).limit(10).execute()
-        
-        bugs = bugs_res.data if bugs_res.data else []
-        print(f"✅ Found {len(bugs)} bugs reported")
-        
-        # Add bug activities
-        for bug in bugs:
-            generated_activities.append({
-                "id": f"bug-{bug['id']}",
-                "user_id": user_id,
-                "type": "bug_reported",
-                "title": "Bug Reported",
-                "description": f"You reported: {bug['title'][:50]}...",
-                "created_at": bug['created_at'],
-                "badge": "Bug Report",
-                "points": 10,
-                "metadata": {"bug_id": bug['id']}
-            })
-        
-        # === FETCH REAL SOLUTIONS POSTED BY USER ===
-        print(f"📊 Fetching solutions posted by user...")
-        solutions_res = supabase.from_("solutions").select(
-            "id, title, created_at, status"
-        ).eq("user_id", user_id).order("created_at", desc=True).limit(10).execute()
-        
-        solutions = solutions_res.data if solutions_res.data else []
-        print(f"✅ Found {len(solutions)} solutions posted")
-        
-        # Add solution activities
-        for solution in solutions:
-            is_accepted = solution.get('status') == 'accepted'
-            activity_type = "solution_accepted" if is_accepted else "solution_posted"
-            badge = "Accepted ✓" if is_accepted else "Solution"
-            points = 25 if is_accepted else 15
-            
-            generated_activities.append({
-                "id": f"solution-{solution['id']}",
-                "user_id": user_id,
-                "type": activity_type,
-                "title": "Solution Posted" if not is_accepted else "Solution Accepted",
-                "description": f"You posted: {solution['title'][:50]}...",
-                "created_at": solution['created_at'],
-                "badge": badge,
-                "points": points,
-                "metadata": {"solution_id": solution['id']}
-            })
-        
-        # === FETCH USER PROFILE FOR ACHIEVEMENTS ===
-        print(f"👤 Fetching user profile...")
-        user_res = supabase.from_("users").select("*").eq("id", user_id).limit(1).execute()
-        
-        if user_res.data:
-            user = user_res.data[0]
-            
-            # Activity: Account Created
-            if user.get('created_at'):
-                created_date = user['created_at']
-                generated_activities.append({
-                    "id": f"auto-{user_id}-created",
-                    "user_id": user_id,
-                    "type": "achievement",
-                    "title": "Account Created",
-                    "description": f"Welcome to FixForge, {user.get('display_name', 'User')}!",
-                    "created_at": created_date,
-                    "badge": "Joined",
-                    "points": 0,
-                    "metadata": {}
-                })
-            
-            # Activity: Profile Completed
-            if user.get('bio') and user['bio'].strip():
-                activity_date = datetime.fromisoformat(user['created_at'].replace('Z', '+00:00')) + timedelta(hours=1)
-                generated_activities.append({
-                    "id": f"auto-{user_id}-bio",
-                    "user_id": user_id,
-                    "type": "achievement",
-                    "title": "Profile Completed",
-                    "description": "You added a bio to your profile",
-                    "created_at": activity_date.isoformat(),
-                    "badge": "Profile",
-                    "points": 5,
-                    "metadata": {}
-                })
-            
-            # Activity: Avatar Set
-            if user.get('avatar') and user['avatar']:
-                activity_date = datetime.fromisoformat(user['created_at'].replace('Z', '+00:00')) + timedelta(hours=2)
-                generated_activities.append({
-                    "id": f"auto-{user_id}-avatar",
-                    "user_id": user_id,
-                    "type": "achievement",
-                    "title": "Avatar Set",
-                    "description": "You uploaded a profile picture",
-                    "created_at": activity_date.isoformat(),
-                    "badge": "Avatar",
-                    "points": 3,
-                    "metadata": {}
-                })
-            
-            # Activity: Expertise Added
-            if user.get('expertise') and isinstance(user['expertise'], list) and len(user['expertise']) > 0:
-                activity_date = datetime.fromisoformat(user['created_at'].replace('Z', '+00:00')) + timedelta(hours=3)
-                tags = ", ".join(user['expertise'][:3])
-                generated_activities.append({
-                    "id": f"auto-{user_id}-expertise",
-                    "user_id": user_id,
-                    "type": "achievement",
-                    "title": "Expertise Added",
-                    "description": f"You added expertise tags: {tags}",
-                    "created_at": activity_date.isoformat(),
-                    "badge": "Skills",
-                    "points": 5,
-                    "metadata": {"tags": user['expertise']}
-                })
-        
-        # Sort by created_at (newest first)
-        generated_activities.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        print(f"✅ Generated {len(generated_activities)} total activities")
-        print(f"   - {len(bugs)} bug reports")
-        print(f"   - {len(solutions)} solutions")
-        print(f"   - Profile achievements")
-        
-        return generated_activities
-        
+        query = db.from_("activities").select("*").eq("user_id", user_id)
+        query = keyset_after(query, cursor).limit(limit + 1)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        res = await query.execute()
+        activities = res.data or []
+        if len(activities) > limit:
+            response.headers["X-Next-Cursor"] = encode_cursor(activities[limit - 1])
+        activities = activities[:limit]
+
+        if not cursor:
+            # The user's latest events may still be waiting for the next flush
+            stored = {a.get("event_key") for a in activities}
+            pending = [
+                {"id": e["event_key"], **e}
+                for e in activity_feed.pending_for(user_id) if e["event_key"] not in stored
+            ]
+            if pending:
+                activities = sorted(pending + activities, key=lambda a: a["created_at"], reverse=True)
+
+        return activities
+
     except Exception as e:
         print(f"❌ Error fetching activities: {e}")
         import traceback
         traceback.print_exc()
         return []
+
 @router.post("/{user_id}/complete-milestone")
 async def complete_milestone(user_id: str, task: str):
     """
@@ -437,12 +374,13 @@ async def complete_milestone(user_id: str, task: str):
         from datetime import datetime, timezone
         
         # Insert or update milestone record
-        result = supabase.from_("user_milestones").upsert({
+        result = await db.from_("user_milestones").upsert({
             "user_id": user_id,
             "milestone_name": task,
             "completed_at": datetime.now(timezone.utc).isoformat(),
             "is_completed": True
         }, on_conflict="user_id,milestone_name").execute()
+        activity_feed.record(milestone_completed(user_id, task))
         
         print(f"✅ Milestone '{task}' marked as complete")
         return {"status": "completed", "milestone": task}
@@ -458,7 +396,7 @@ async def complete_milestone(user_id: str, task: str):
 async def get_user_milestones(user_id: str):
     """Get all completed milestones for a user"""
     try:
-        res = supabase.from_("user_milestones").select("*").eq("user_id", user_id).execute()
+        res = await db.from_("user_milestones").select("*").eq("user_id", user_id).execute()
         return res.data if res.data else []
     except Exception as e:
         print(f"❌ Error fetching milestones: {e}")
@@ -474,7 +412,8 @@ async def export_user_data(user_id: str):
 @router.post("/{user_id}/upload/avatar")
 async def upload_avatar(user_id: str, file: UploadFile = File(...)):
     """
-    Upload user avatar image and store as base64 in database.
+    Upload user avatar image. Thumbnails go to blob storage (app/services/avatars.py);
+    the user row keeps the URL and a content hash.
     """
     try:
         print(f"🔵 Avatar upload request for user: {user_id}")
@@ -485,51 +424,56 @@ async def upload_avatar(user_id: str, file: UploadFile = File(...)):
             print(f"❌ Invalid file type: {file.content_type}")
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Read file contents
+        # Read file contents (one byte past the limit is enough to reject it)
         try:
-            contents = await file.read()
+            contents = await file.read(AVATAR_MAX_BYTES + 1)
             print(f"🔵 File size: {len(contents)} bytes")
         except Exception as read_error:
             print(f"❌ Error reading file: {read_error}")
             raise HTTPException(status_code=400, detail="Failed to read file")
         
-        # Validate file size (5MB max)
-        if len(contents) > 5 * 1024 * 1024:
-            print(f"❌ File too large: {len(contents)} bytes")
-            raise HTTPException(status_code=400, detail="File size must be less than 5MB")
-        
-        # Encode to base64
+        # Resize and upload off the event loop
         try:
-            base64_image = base64.b64encode(contents).decode('utf-8')
-            avatar_url = f"data:{file.content_type};base64,{base64_image}"
-            print(f"🔵 Base64 encoded, length: {len(avatar_url)}")
-        except Exception as encode_error:
-            print(f"❌ Error encoding image: {encode_error}")
-            raise HTTPException(status_code=500, detail="Failed to encode image")
+            stored = await store_avatar(user_id, contents)
+            print(f"🔵 Stored {len(stored['thumbnails'])} thumbnails: {stored['avatar']}")
+        except InvalidImage as image_error:
+            print(f"❌ Invalid image: {image_error}")
+            raise HTTPException(status_code=400, detail=str(image_error))
+        except Exception as storage_error:
+            print(f"❌ Error storing avatar: {storage_error}")
+            raise HTTPException(status_code=500, detail=f"Failed to store avatar: {storage_error}")
+        
+        previous = await user_cache.get(user_id)
         
         # Update user's avatar in database
         try:
             print(f"🔵 Updating database for user {user_id}")
-            result = supabase.from_("users").update({
-                "avatar": avatar_url,
+            result = await db.from_("users").update({
+                "avatar": stored["avatar"],
+                "avatar_hash": stored["avatar_hash"],
                 "updated_at": datetime.now().isoformat()
             }).eq("id", user_id).execute()
-            
-            print(f"🔵 Database response: {result}")
+            user_cache.invalidate(user_id)
             
             if not result.data:
                 print(f"❌ User not found: {user_id}")
                 raise HTTPException(status_code=404, detail="User not found")
             
+        except HTTPException:
+            raise
         except Exception as db_error:
             print(f"❌ Database error: {db_error}")
             raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
         
+        await _discard_previous_avatar(user_id, previous, stored["avatar_hash"])
+        activity_feed.record(avatar_set(user_id))
         print(f"✅ Avatar updated successfully for user {user_id}")
         
         return {
-            "url": avatar_url,
-            "avatar_url": avatar_url,
+            "url": stored["avatar"],
+            "avatar_url": stored["avatar"],
+            "avatar_hash": stored["avatar_hash"],
+            "avatar_thumbnails": stored["thumbnails"],
             "message": "Avatar uploaded successfully"
         }
         
@@ -540,119 +484,66 @@ async def upload_avatar(user_id: str, file: UploadFile = File(...)):
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+async def _discard_previous_avatar(user_id: str, previous: Optional[dict], current_hash: Optional[str]) -> None:
+    """Delete the thumbnails of the avatar a user just replaced (best effort)"""
+    previous_hash = (previous or {}).get("avatar_hash")
+    if not previous_hash or previous_hash == current_hash:
+        return
+    try:
+        await delete_avatar(user_id, previous_hash)
+    except Exception as e:
+        print(f"⚠️ Could not delete old avatar {previous_hash} of {user_id}: {e}")
     
 @router.get("/{user_id}/contribution-stats")
 async def get_contribution_stats(user_id: str):
     """
-    Calculate contribution stats from actual database schema
+    Contribution stats from the user_stats row, which triggers on solutions,
+    bugs and votes keep current (supabase/migrations/20261017120000_user_stats.sql)
     """
     try:
-        print(f"🔵 Calculating stats for user: {user_id}")
-        
-        # Fetch all solutions by this user
-        solutions_res = supabase.from_("solutions").select(
-            "id, user_id, status, created_at"
-        ).eq("user_id", user_id).execute()
-        
-        solutions = solutions_res.data if solutions_res.data else []
-        print(f"✅ Found {len(solutions)} solutions")
-
-        # Fetch all bugs by this user
-        bugs_res = supabase.from_("bugs").select(
-            "id, user_id, created_at"
-        ).eq("user_id", user_id).execute()
-        
-        bugs = bugs_res.data if bugs_res.data else []
-        print(f"✅ Found {len(bugs)} bugs")
-
-        # Get solution IDs to count upvotes
-        solution_ids = [s["id"] for s in solutions]
-        total_upvotes = 0
-        
-        if solution_ids:
-            votes_res = supabase.from_("votes").select("id").in_(
-                "solution_id", solution_ids
-            ).eq("vote_type", "upvote").execute()
-            
-            total_upvotes = len(votes_res.data) if votes_res.data else 0
-            print(f"✅ Found {total_upvotes} upvotes")
-
-        # === CALCULATE BASIC COUNTS ===
-        total_solutions = len(solutions)
-        total_bugs = len(bugs)
-        accepted_solutions = len([s for s in solutions if s.get("status") == "accepted"])
+        res = await db.table("user_stats").select("*").eq("user_id", user_id).limit(1).execute()
+        row = res.data[0] if res.data else {}
+
+        # === BASIC COUNTS ===
+        total_solutions = row.get("total_solutions") or 0
+        accepted_solutions = row.get("accepted_solutions") or 0
+        total_upvotes = row.get("total_upvotes") or 0
+        total_bugs = row.get("total_bugs") or 0
         acceptance_rate = round((accepted_solutions / total_solutions * 100)) if total_solutions > 0 else 0
 
-        # === CALCULATE THIS WEEK / THIS MONTH ===
-        # USE TIMEZONE-AWARE DATETIME
-        from datetime import timezone
-        now = datetime.now(timezone.utc)  # ← FIX: Make it timezone-aware
-        one_week_ago = now - timedelta(days=7)
-        one_month_ago = now - timedelta(days=30)
-        
-        this_week = len([s for s in solutions 
-                        if datetime.fromisoformat(s["created_at"].replace("Z", "+00:00")) > one_week_ago])
-        
-        this_month = len([s for s in solutions 
-                         if datetime.fromisoformat(s["created_at"].replace("Z", "+00:00")) > one_month_ago])
-        
-        print(f"✅ This week: {this_week}, This month: {this_month}")
-
-        # === CALCULATE STREAK ===
-        sorted_solutions = sorted(solutions, key=lambda x: x["created_at"], reverse=True)
+        # === THIS WEEK / THIS MONTH ===
+        # recent_counts[i] = solutions on recent_day - i days; age them to today
+        today = datetime.now(timezone.utc).date()
+        this_week = this_month = 0
+        if row.get("recent_day"):
+            offset = (today - datetime.fromisoformat(row["recent_day"]).date()).days
+            for i, count in enumerate(row.get("recent_counts") or []):
+                age = offset + i
+                this_week += count if age < 7 else 0
+                this_month += count if age < 30 else 0
+
+        # === STREAK ===
+        # The stored run ends on the last day with a solution; it's current until a day is missed
         current_streak = 0
-        longest_streak = 0
-
-        if sorted_solutions:
-            today = datetime.now(timezone.utc).date()  # ← FIX: Timezone-aware
-            current_date = today
-            temp_streak = 0
-            
-            for solution in sorted_solutions:
-                solution_date = datetime.fromisoformat(
-                    solution["created_at"].replace("Z", "+00:00")
-                ).date()
-                
-                day_diff = (current_date - solution_date).days
-                
-                # If this solution is from today or yesterday (consecutive)
-                if day_diff == temp_streak:
-                    temp_streak += 1
-                else:
-                    # Streak broken
-                    longest_streak = max(longest_streak, temp_streak)
-                    if day_diff <= 1:  # Start new streak if yesterday or today
-                        temp_streak = 1
-                    else:
-                        temp_streak = 0
-                
-                current_date = solution_date  # Move to next date
-            
-            longest_streak = max(longest_streak, temp_streak)
-            current_streak = temp_streak if (today - datetime.fromisoformat(sorted_solutions[0]["created_at"].replace("Z", "+00:00")).date()).days <= 1 else 0
-
-        print(f"✅ Streak: {current_streak}, Longest: {longest_streak}")
+        if row.get("streak_last_day"):
+            last_day = datetime.fromisoformat(row["streak_last_day"]).date()
+            if (today - last_day).days <= 1:
+                current_streak = row.get("streak_length") or 0
+        longest_streak = row.get("longest_streak") or 0
 
-        # === CALCULATE RANK ===
+        # === RANK ===
         rank = max(1, round(10000 / (total_solutions + accepted_solutions + total_upvotes + 1)))
 
-        # === CALCULATE AVG RESPONSE TIME ===
+        # === AVG RESPONSE TIME ===
+        # Mean gap between consecutive solutions = (last - first) / (n - 1)
         avg_response_time = "0h"
-        if solutions:
-            # Calculate average time between solution creation
-            solution_times = [
-                datetime.fromisoformat(s["created_at"].replace("Z", "+00:00")) 
-                for s in solutions
-            ]
-            solution_times.sort()
-            
-            if len(solution_times) > 1:
-                time_diffs = [
-                    (solution_times[i+1] - solution_times[i]).total_seconds() / 3600
-                    for i in range(len(solution_times) - 1)
-                ]
-                avg_hours = sum(time_diffs) / len(time_diffs)
-                avg_response_time = f"{round(avg_hours)}h"
+        if total_solutions > 1 and row.get("first_solution_at") and row.get("last_solution_at"):
+            first = datetime.fromisoformat(row["first_solution_at"].replace("Z", "+00:00"))
+            last = datetime.fromisoformat(row["last_solution_at"].replace("Z", "+00:00"))
+            avg_hours = (last - first).total_seconds() / 3600 / (total_solutions - 1)
+            avg_response_time = f"{round(avg_hours)}h"
 
         # === BUILD RESPONSE ===
         result = {
@@ -668,10 +559,9 @@ async def get_contribution_stats(user_id: str):
             "this_week": this_week,
             "this_month": this_month
         }
-        
-        print(f"✅ Stats calculated: {result}")
+
         return result
-    
+
     except Exception as e:
         print(f"❌ Error calculating contribution stats: {e}")
         import traceback
@@ -0,0 +1,311 @@
+"""
+Activity feed, materialized on write.
+
+Write endpoints describe what happened with the builders below (bug_reported,
+solution_posted, ...) and hand the rows to activity_feed.record(), which
+returns immediately. The writer appends them to the activities table in
+batches, every ACTIVITY_FLUSH_INTERVAL seconds or once ACTIVITY_FLUSH_SIZE
+rows are pending, with one insert per flush. The feed endpoint then reads a
+single indexed range (supabase/migrations/20261017130000_activity_feed.sql).
+
+Every row carries an event_key naming the event, and inserts skip keys that
+already exist. That makes a retried flush harmless, lets one-time
+achievements (avatar set, first bug milestone) be recorded on every update,
+and lets app/jobs/activity_backfill_job.py replay history over live data.
+
+Rows still waiting for a flush are served from pending_for(), so users see
+their own activity at once. A failed flush is retried on the next interval
+(at most ACTIVITY_MAX_PENDING rows are kept); a hard crash loses at most one
+interval of events. Once the oldest event has failed ACTIVITY_MAX_RETRIES
+times, each retry sends half as many rows, so the rest of a batch the
+database rejects for one bad row (say, oversized metadata) gets through, and
+an event rejected on its own is dropped instead of blocking the queue.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+
+from app.db.session import db
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "1.0"))
+ACTIVITY_FLUSH_SIZE = int(os.getenv("ACTIVITY_FLUSH_SIZE", "200"))
+ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "10000"))
+ACTIVITY_MAX_RETRIES = int(os.getenv("ACTIVITY_MAX_RETRIES", "3"))
+
+ACCEPTED_STATUS = "accepted"
+
+Activity = Dict[str, Any]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _after(created_at: str, hours: int) -> str:
+    return (datetime.fromisoformat(created_at.replace("Z", "+00:00")) + timedelta(hours=hours)).isoformat()
+
+
+def activity(
+    user_id: str,
+    type: str,
+    title: str,
+    description: str,
+    badge: str,
+    points: int,
+    event_key: str,
+    created_at: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Activity:
+    return {
+        "user_id": user_id,
+        "type": type,
+        "title": title,
+        "description": description,
+        "badge": badge,
+        "points": points,
+        "metadata": metadata or {},
+        "event_key": event_key,
+        "created_at": created_at or _now(),
+    }
+
+
+# --- events (shared by the write endpoints and the backfill job) -----------
+
+def bug_reported(bug: Dict[str, Any]) -> Activity:
+    return activity(
+        bug["user_id"], "bug_reported", "Bug Reported",
+        f"You reported: {(bug.get('title') or '')[:50]}...", "Bug Report", 10,
+        f"bug-{bug['id']}", bug.get("created_at"), {"bug_id": bug["id"]},
+    )
+
+
+def solution_posted(solution: Dict[str, Any]) -> Activity:
+    return activity(
+        solution["user_id"], "solution_posted", "Solution Posted",
+        f"You posted: {(solution.get('title') or '')[:50]}...", "Solution", 15,
+        f"solution-{solution['id']}", solution.get("created_at"), {"solution_id": solution["id"]},
+    )
+
+
+def solution_accepted(solution: Dict[str, Any], created_at: Optional[str] = None) -> Activity:
+    return activity(
+        solution["user_id"], "solution_accepted", "Solution Accepted",
+        f"Your solution was accepted: {(solution.get('title') or '')[:50]}...", "Accepted ✓", 25,
+        f"solution-accepted-{solution['id']}", created_at, {"solution_id": solution["id"]},
+    )
+
+
+def account_created(user: Dict[str, Any]) -> Activity:
+    return activity(
+        user["id"], "achievement", "Account Created",
+        f"Welcome to FixForge, {user.get('display_name') or 'User'}!", "Joined", 0,
+        f"{user['id']}-created", user.get("created_at"),
+    )
+
+
+def profile_completed(user_id: str, created_at: Optional[str] = None) -> Activity:
+    return activity(
+        user_id, "achievement", "Profile Completed", "You added a bio to your profile",
+        "Profile", 5, f"{user_id}-bio", created_at,
+    )
+
+
+def avatar_set(user_id: str, created_at: Optional[str] = None) -> Activity:
+    return activity(
+        user_id, "achievement", "Avatar Set", "You uploaded a profile picture",
+        "Avatar", 3, f"{user_id}-avatar", created_at,
+    )
+
+
+def expertise_added(user_id: str, expertise: List[str], created_at: Optional[str] = None) -> Activity:
+    return activity(
+        user_id, "achievement", "Expertise Added", f"You added expertise tags: {', '.join(expertise[:3])}",
+        "Skills", 5, f"{user_id}-expertise", created_at, {"tags": expertise},
+    )
+
+
+def milestone_completed(user_id: str, milestone_name: str, created_at: Optional[str] = None) -> Activity:
+    return activity(
+        user_id, "milestone", "Milestone Completed",
+        f"You completed: {milestone_name.replace('-', ' ')}", "Milestone", 5,
+        f"{user_id}-milestone-{milestone_name}", created_at, {"milestone": milestone_name},
+    )
+
+
+def profile_activities(user: Dict[str, Any], backfill: bool = False) -> List[Activity]:
+    """
+    Achievements a user row qualifies for, dated now; the backfill dates them
+    just after account creation instead
+    """
+    created = user.get("created_at")
+    when = (lambda hours: _after(created, hours)) if backfill and created else (lambda hours: None)
+    user_id = user["id"]
+    events = []
+    if user.get("bio") and str(user["bio"]).strip():
+        events.append(profile_completed(user_id, when(1)))
+    if user.get("avatar"):
+        events.append(avatar_set(user_id, when(2)))
+    if isinstance(user.get("expertise"), list) and user["expertise"]:
+        events.append(expertise_added(user_id, user["expertise"], when(3)))
+    return events
+
+
+# --- writer ----------------------------------------------------------------
+
+class ActivityWriter:
+    """Buffers activity rows and appends them to the activities table in batches"""
+
+    def __init__(
+        self,
+        interval: float = ACTIVITY_FLUSH_INTERVAL,
+        batch_size: int = ACTIVITY_FLUSH_SIZE,
+        max_pending: int = ACTIVITY_MAX_PENDING,
+        max_retries: int = ACTIVITY_MAX_RETRIES,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._pending: Dict[str, Activity] = {}  # by event_key, oldest first
+        self._flushing: Dict[str, Activity] = {}
+        self._failures: Dict[str, int] = {}  # failed flushes per pending event_key
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._size_flush: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+
+    # --- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and write out everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending and await self.flush():
+            pass
+        if self._pending:
+            logger.error(f"❌ Activity feed closed with {len(self._pending)} unwritten events")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # Shielded: stopping the loop must not abandon a flush halfway
+            while self._pending and await asyncio.shield(self.flush()):
+                pass
+
+    # --- recording -------------------------------------------------------
+
+    def record(self, *events: Activity) -> None:
+        """Queue events for the next flush; never blocks the request"""
+        for event in events:
+            if not event.get("user_id"):
+                continue
+            self._pending.setdefault(event["event_key"], event)
+            self.recorded += 1
+        self._trim()
+        if len(self._pending) >= self.batch_size and self._task is not None \
+                and (self._size_flush is None or self._size_flush.done()):
+            self._size_flush = asyncio.ensure_future(self.flush())
+
+    def pending_for(self, user_id: str) -> List[Activity]:
+        """A user's events that haven't been written yet, newest first"""
+        events = [e for e in (*self._flushing.values(), *self._pending.values()) if e["user_id"] == user_id]
+        return sorted(events, key=lambda e: e["created_at"], reverse=True)
+
+    def _trim(self) -> None:
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            for key in list(self._pending)[:overflow]:
+                del self._pending[key]
+                self._failures.pop(key, None)
+            self.dropped += overflow
+            logger.warning(f"⚠️ Activity feed backlog full, dropped {overflow} oldest events")
+
+    # --- flushing --------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Insert up to batch_size pending events in one statement; returns events flushed"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            keys = list(self._pending)[:self._batch_limit()]
+            self._flushing = {key: self._pending.pop(key) for key in keys}
+
+            start = time.perf_counter()
+            try:
+                await db.table("activities").upsert(
+                    list(self._flushing.values()),
+                    on_conflict="event_key",
+                    ignore_duplicates=True,
+                    returning=ReturnMethod.minimal,
+                ).execute()
+            except Exception as e:
+                self.failed_flushes += 1
+                for key in keys:
+                    self._failures[key] = self._failures.get(key, 0) + 1
+                if len(keys) == 1 and isinstance(e, APIError) and self._failures[keys[0]] > self.max_retries:
+                    # Rejected on its own, again and again: the row itself is bad
+                    self._failures.pop(keys[0])
+                    self._flushing = {}
+                    self.dropped += 1
+                    logger.error(f"❌ Dropping activity event {keys[0]} the database keeps rejecting: {e}")
+                    return 0
+                logger.warning(f"⚠️ Activity flush failed, retrying next interval: {e}")
+                # Back to the front of the queue, ahead of anything newer
+                self._pending = {**self._flushing, **self._pending}
+                self._flushing = {}
+                self._trim()
+                return 0
+            finally:
+                self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+            flushed = len(self._flushing)
+            self._flushing = {}
+            for key in keys:
+                self._failures.pop(key, None)
+            self.flushes += 1
+            self.written += flushed
+            return flushed
+
+    def _batch_limit(self) -> int:
+        """batch_size, halved for each failure of the oldest event from the max_retries-th on"""
+        excess = self._failures.get(next(iter(self._pending)), 0) - self.max_retries
+        return self.batch_size if excess < 0 else max(1, self.batch_size >> (excess + 1))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "events_per_flush": round(self.written / self.flushes, 2) if self.flushes else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+# Singleton instance
+activity_feed = ActivityWriter()
@@ -0,0 +1,163 @@
+"""
+Persistent cache of AI fix suggestions (the ai_suggestions table).
+
+GET /aisuggested/{bug_id} costs a Gemini call of up to two minutes. Results
+are stored under a key hashing the final prompt, the screenshot and the
+requested model. The prompt holds the bug's title, description and code and
+the RAG context, so editing the bug (or new similar solutions) changes the
+key and the old suggestion is simply never read again; storing a new one
+deletes the bug's older rows. Rows also expire: after AI_SUGGESTION_TTL by
+default, or whatever the caller's ttl() gives for the row (the endpoint
+keeps fallback-model answers only AI_SUGGESTION_FALLBACK_TTL, so the
+primary model is asked again once it recovers).
+
+Concurrent requests for the same key share one generation, so several
+people opening a new bug at once cost one LLM call.
+
+    row, cached = await ai_suggestion_cache.get_or_generate(
+        bug_id, key, generate, refresh=refresh, ttl=lambda row: ...)
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from postgrest.types import ReturnMethod
+
+from app.db.session import db
+
+AI_SUGGESTION_TTL = float(os.getenv("AI_SUGGESTION_TTL", str(30 * 24 * 3600)))
+AI_SUGGESTION_FALLBACK_TTL = float(os.getenv("AI_SUGGESTION_FALLBACK_TTL", "3600"))
+
+
+def _parse_time(value: Any) -> datetime:
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def suggestion_key(prompt: str, screenshot_key: Optional[str], model: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model, screenshot_key or "", prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class AISuggestionCache:
+    """ai_suggestions rows by prompt hash, with single-flight generation"""
+
+    def __init__(self, ttl: float = AI_SUGGESTION_TTL):
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.shared = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        res = await db.table("ai_suggestions").select("*").eq("prompt_hash", key).limit(1).execute()
+        if not res.data:
+            return None
+        row = res.data[0]
+        if row.get("expires_at"):
+            expires = _parse_time(row["expires_at"])
+        else:
+            # Rows stored before expires_at existed
+            expires = _parse_time(row["created_at"]) + timedelta(seconds=self.ttl)
+        if datetime.now(timezone.utc) >= expires:
+            return None
+        return row
+
+    async def store(self, row: Dict[str, Any]) -> None:
+        await db.table("ai_suggestions").upsert(
+            row, on_conflict="prompt_hash", returning=ReturnMethod.minimal
+        ).execute()
+        # Suggestions for earlier versions of the bug can no longer be hit
+        await db.table("ai_suggestions").delete(returning=ReturnMethod.minimal)\
+            .eq("bug_id", row["bug_id"]).neq("prompt_hash", row["prompt_hash"]).execute()
+
+    async def get_or_generate(
+        self,
+        bug_id: str,
+        key: str,
+        generate: Callable[[], Awaitable[Tuple[str, str]]],
+        refresh: bool = False,
+        cacheable: Callable[[str], bool] = bool,
+        ttl: Optional[Callable[[Dict[str, Any]], float]] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        (row, cached): the stored suggestion for `key`, or a new one from
+        generate() -> (suggestion, model_used), stored if cacheable(suggestion)
+        for ttl(row) seconds (default self.ttl). refresh skips the stored row.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            # Someone is already generating this exact prompt; a refresh gets that fresh result too
+            self.shared += 1
+            return await asyncio.shield(task), False
+
+        if refresh:
+            self.refreshes += 1
+        else:
+            row = await self.get(key)
+            if row is not None:
+                self.hits += 1
+                return row, True
+            self.misses += 1
+
+        # Another request may have started generating while this one looked up the row
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(bug_id, key, generate, cacheable, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task), False
+
+    def _done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved by the awaiting callers; don't warn if they all went away
+
+    async def _generate(self, bug_id: str, key: str, generate: Callable[[], Awaitable[Tuple[str, str]]],
+                        cacheable: Callable[[str], bool],
+                        ttl: Optional[Callable[[Dict[str, Any]], float]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        suggestion, model_used = await generate()
+        created = datetime.now(timezone.utc)
+        row = {
+            "prompt_hash": key,
+            "bug_id": bug_id,
+            "suggestion": suggestion,
+            "model_used": model_used,
+            "generation_ms": int((time.perf_counter() - start) * 1000),
+            "created_at": created.isoformat(),
+        }
+        row["expires_at"] = (created + timedelta(seconds=ttl(row) if ttl else self.ttl)).isoformat()
+        if not cacheable(suggestion):
+            return row
+        try:
+            await self.store(row)
+        except Exception as e:
+            # The suggestion is still returned; it just isn't cached
+            print(f"⚠️ Failed to cache AI suggestion for {bug_id}: {e}")
+        return row
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "shared_generations": self.shared,
+            "in_flight": len(self._inflight),
+        }
+
+
+# Singleton instance
+ai_suggestion_cache = AISuggestionCache()
@@ -0,0 +1,130 @@
+"""
+API keys: generation, hashing and the in-process key -> user lookup.
+
+Keys are stored only as SHA-256 hex digests (api_keys.key_hash, see
+supabase/migrations/20261017140000_hashed_api_keys.sql) plus a short
+prefix for display; the full key is shown once, when it is generated.
+Keys are 192 random bits, so a fast unsalted hash is enough here.
+
+api_key_cache maps digests to user ids in a TTL'd LRU, so a request with a
+known key is authenticated without a database round-trip. Unknown or
+inactive keys are cached too, for API_KEY_NEGATIVE_TTL, so a client retrying
+a bad key doesn't cost a query per request. Revoking a user's keys calls
+invalidate_user(), which drops them from this process at once; other
+workers stop accepting them within API_KEY_CACHE_TTL.
+"""
+
+import os
+import asyncio
+import hashlib
+import secrets
+from typing import Any, Dict, Optional
+
+from app.db.session import db
+from app.utils.cache import LRUCache
+
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "10000"))
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", "60"))
+API_KEY_NEGATIVE_TTL = float(os.getenv("API_KEY_NEGATIVE_TTL", "30"))
+
+API_KEY_PREFIX = "fx_"
+DISPLAY_PREFIX_LENGTH = 7
+
+_MISSING = object()
+_NOT_FOUND = object()
+
+
+def generate_api_key() -> str:
+    return f"{API_KEY_PREFIX}{secrets.token_urlsafe(24)}"
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def display_prefix(api_key: str) -> str:
+    return api_key[:DISPLAY_PREFIX_LENGTH]
+
+
+class ApiKeyCache:
+    """TTL+LRU cache of key digest -> user_id for active keys, with negative caching"""
+
+    def __init__(
+        self,
+        maxsize: int = API_KEY_CACHE_SIZE,
+        ttl: float = API_KEY_CACHE_TTL,
+        negative_ttl: float = API_KEY_NEGATIVE_TTL,
+    ):
+        self.negative_ttl = negative_ttl
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped by every invalidation; a lookup only caches if it is unchanged
+        self._epoch = 0
+        self.negative_hits = 0
+        self.queries = 0
+        self.invalidations = 0
+
+    async def lookup(self, api_key: str) -> Optional[str]:
+        """The user id owning this active key, or None"""
+        digest = hash_api_key(api_key)
+        cached = self._cache.get(digest, _MISSING)
+        if cached is _NOT_FOUND:
+            self.negative_hits += 1
+            return None
+        if cached is not _MISSING:
+            return cached
+
+        task = self._inflight.get(digest)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(digest, self._epoch))
+            self._inflight[digest] = task
+            task.add_done_callback(lambda t: self._done(digest, t))
+        return await asyncio.shield(task)
+
+    def _done(self, digest: str, task: asyncio.Future) -> None:
+        if self._inflight.get(digest) is task:
+            del self._inflight[digest]
+        if not task.cancelled():
+            task.exception()  # retrieved by the awaiting callers; don't warn if they all went away
+
+    async def _fetch(self, digest: str, epoch: int) -> Optional[str]:
+        self.queries += 1
+        res = await db.from_("api_keys").select("user_id")\
+            .eq("key_hash", digest).eq("is_active", True).limit(1).execute()
+        user_id = str(res.data[0]["user_id"]) if res.data else None
+        if epoch == self._epoch:
+            if user_id is None:
+                self._cache.set(digest, _NOT_FOUND, ttl=self.negative_ttl)
+            else:
+                self._cache.set(digest, user_id)
+        return user_id
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Forget every cached key of this user (call after revoking or deactivating keys)"""
+        self._epoch += 1
+        self.invalidations += 1
+        # Revocations are rare, so scan the (bounded) cache rather than keep a
+        # user -> digests index that would have to follow every LRU eviction
+        user_id = str(user_id)
+        for digest, cached in self._cache.items():
+            if cached == user_id:
+                self._cache.pop(digest)
+        # A lookup in flight may have read the key before it was revoked
+        self._inflight.clear()
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._cache.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "negative_hits": self.negative_hits,
+            "queries": self.queries,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+api_key_cache = ApiKeyCache()
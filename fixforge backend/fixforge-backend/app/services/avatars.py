@@ -0,0 +1,137 @@
+"""
+Avatar uploads: square WebP thumbnails in blob storage.
+
+An uploaded image is decoded, center-cropped and resized to each of
+AVATAR_SIZES on the CPU pool (app.core.executors.run_cpu), and the
+thumbnails are written to app.utils.file_storage under
+
+    avatars/{user_id}/{hash}/{size}.webp
+
+where hash is a digest of the uploaded bytes. The users row keeps only the
+URL of the largest thumbnail (users.avatar) and that hash
+(users.avatar_hash); a new upload gets a new path, so cached copies of the
+old picture are never served for the new one. The other sizes are found by
+swapping the size in the URL (thumbnail_urls).
+
+Inline data: URLs (what older clients and rows hold) go through the same
+path; preset avatars ("avatar-3") and other URLs are stored as they are.
+"""
+
+import io
+import os
+import base64
+import asyncio
+import binascii
+import hashlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.executors import run_cpu
+from app.utils.file_storage import file_storage
+
+AVATAR_SIZES: Tuple[int, ...] = tuple(sorted(
+    int(size) for size in os.getenv("AVATAR_SIZES", "64,128,256").split(",") if size.strip()
+))
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+AVATAR_WEBP_QUALITY = int(os.getenv("AVATAR_WEBP_QUALITY", "82"))
+# Refuse images that would decode to more than this many pixels (decompression bombs)
+AVATAR_MAX_PIXELS = 40_000_000
+
+AVATAR_CONTENT_TYPE = "image/webp"
+
+
+class InvalidImage(ValueError):
+    """The upload isn't an image Pillow can decode, or is too large"""
+
+
+def avatar_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def avatar_path(user_id: str, digest: str, size: int) -> str:
+    return f"avatars/{user_id}/{digest}/{size}.webp"
+
+
+def is_data_url(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith("data:")
+
+
+def data_url_bytes(url: str) -> bytes:
+    """The bytes of a data:image/...;base64,... URL; raises InvalidImage"""
+    header, sep, payload = url.partition(",")
+    if not sep or not header.startswith("data:image/") or not header.endswith(";base64"):
+        raise InvalidImage("Avatar data URL must be a base64-encoded image")
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidImage(f"Invalid base64 in avatar data URL: {e}") from e
+
+
+def render_thumbnails(data: bytes, sizes: Iterable[int] = AVATAR_SIZES,
+                      quality: int = AVATAR_WEBP_QUALITY) -> Dict[int, bytes]:
+    """{size: webp bytes} of square center crops; runs in the CPU pool, so it must stay picklable"""
+    from PIL import Image, ImageOps
+
+    sizes = sorted(sizes, reverse=True)
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.width * img.height > AVATAR_MAX_PIXELS:
+                raise InvalidImage(f"Image is too large ({img.width}x{img.height})")
+            # Lets the JPEG decoder downscale by up to 8x while decoding
+            img.draft("RGB", (sizes[0], sizes[0]))
+            img = ImageOps.exif_transpose(img)
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+    except InvalidImage:
+        raise
+    except Exception as e:
+        raise InvalidImage("File is not an image format that can be read") from e
+
+    # Crop once at the largest size; each smaller size is resized from the one before
+    square = ImageOps.fit(img, (sizes[0], sizes[0]), Image.Resampling.LANCZOS)
+    thumbnails = {}
+    for size in sizes:
+        if square.width != size:
+            square = square.resize((size, size), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        square.save(out, "WEBP", quality=quality, method=4)
+        thumbnails[size] = out.getvalue()
+    return thumbnails
+
+
+async def store_avatar(user_id: str, data: bytes) -> Dict[str, Any]:
+    """
+    Render and upload the thumbnails of an uploaded image.
+    Returns {"avatar": url of the largest, "avatar_hash": ..., "thumbnails": {size: url}};
+    raises InvalidImage.
+    """
+    if len(data) > AVATAR_MAX_BYTES:
+        raise InvalidImage(f"Image must be smaller than {AVATAR_MAX_BYTES // (1024 * 1024)}MB")
+    digest = avatar_hash(data)
+    thumbnails = await run_cpu(render_thumbnails, data, AVATAR_SIZES)
+    urls = await asyncio.gather(*(
+        file_storage.put(avatar_path(user_id, digest, size), body, AVATAR_CONTENT_TYPE)
+        for size, body in thumbnails.items()
+    ))
+    by_size = dict(zip(thumbnails, urls))
+    return {
+        "avatar": by_size[max(by_size)],
+        "avatar_hash": digest,
+        "thumbnails": {str(size): by_size[size] for size in sorted(by_size)},
+    }
+
+
+async def delete_avatar(user_id: str, digest: Optional[str]) -> None:
+    """Remove the thumbnails of a previous upload"""
+    if digest:
+        await file_storage.delete(avatar_path(user_id, digest, size) for size in AVATAR_SIZES)
+
+
+def thumbnail_urls(user: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """{size: url} for a user row whose avatar is a stored upload, else None"""
+    url, digest = user.get("avatar"), user.get("avatar_hash")
+    if not url or not digest:
+        return None
+    base, sep, name = url.rpartition("/")
+    if not sep or not base.endswith(f"/{digest}") or not name.endswith(".webp"):
+        return None
+    return {str(size): f"{base}/{size}.webp" for size in AVATAR_SIZES}
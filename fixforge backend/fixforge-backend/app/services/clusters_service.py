@@ -0,0 +1,124 @@
+"""
+In-memory similarity index over solved bugs.
+
+Backs /clusters/{bug_id}/suggestions: solved bugs are loaded once (per TTL or
+until invalidated) into an L2-normalized float32 matrix built from the stored
+`embedding` / `embedding_384` columns, so each request costs one mat-vec
+product and an argpartition instead of re-embedding the whole corpus.
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import supabase
+from app.services.embeddings import EMBED_DIM, embedding_service
+
+logger = logging.getLogger(__name__)
+
+SOLVED_INDEX_TTL = int(os.getenv("SOLVED_INDEX_TTL", "300"))
+
+
+def bug_text(bug: Dict[str, Any]) -> str:
+    """Text the suggestions endpoint (and the `embedding` column) embed a bug from"""
+    return f"{bug['title']} {bug['description']} {bug['severity']} {bug['client_type']} {' '.join(bug.get('tags') or [])}"
+
+
+def parse_embedding(value: Any) -> Optional[np.ndarray]:
+    """Read a stored vector column (JSON array or pgvector text) into a float32 array"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    vec = np.asarray(value, dtype=np.float32).reshape(-1)
+    return vec if vec.shape[0] == EMBED_DIM else None
+
+
+def bug_vector(bug: Dict[str, Any]) -> np.ndarray:
+    """Stored embedding for a bug, falling back to the (cached) embedding service"""
+    vec = parse_embedding(bug.get("embedding"))
+    if vec is None:
+        vec = parse_embedding(bug.get("embedding_384"))
+    if vec is None:
+        vec = embedding_service.encode(bug_text(bug))
+    return vec
+
+
+class SolvedBugIndex:
+    """Normalized embedding matrix of solved bugs with vectorized top-k search"""
+
+    def __init__(self, ttl: int = SOLVED_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (bugs, matrix) swapped as one tuple so readers never see a torn pair
+        self._snapshot: Tuple[List[Dict[str, Any]], np.ndarray] = ([], np.zeros((0, EMBED_DIM), dtype=np.float32))
+        self._loaded_at: Optional[float] = None
+
+    def invalidate(self) -> None:
+        """Force a reload on next use (call when a bug becomes Solved)"""
+        self._loaded_at = None
+
+    def _load(self) -> None:
+        res = supabase.table("bugs").select(
+            "id, title, description, severity, client_type, tags, embedding, embedding_384"
+        ).eq("status", "Solved").execute()
+        rows = res.data or []
+
+        vectors: List[Optional[np.ndarray]] = []
+        missing: List[int] = []
+        for i, row in enumerate(rows):
+            vec = parse_embedding(row.get("embedding"))
+            if vec is None:
+                vec = parse_embedding(row.get("embedding_384"))
+            if vec is None:
+                missing.append(i)
+            vectors.append(vec)
+
+        # Bugs without a stored vector are embedded in one batch (and cached for next reload)
+        if missing:
+            encoded = embedding_service.encode([bug_text(rows[i]) for i in missing])
+            for i, vec in zip(missing, encoded):
+                vectors[i] = vec
+
+        matrix = np.vstack(vectors).astype(np.float32) if vectors else np.zeros((0, EMBED_DIM), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.clip(norms, 1e-12, None)
+
+        bugs = [{"id": r["id"], "title": r["title"], "description": r["description"]} for r in rows]
+        self._snapshot = (bugs, matrix)
+        self._loaded_at = time.monotonic()
+        logger.info(f"✅ Solved bug index loaded: {len(rows)} bugs ({len(missing)} embedded on load)")
+
+    def _ensure_fresh(self) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                    self._load()
+
+    def top_k(self, query: np.ndarray, k: int = 3) -> List[Tuple[Dict[str, Any], float]]:
+        """Return the k most cosine-similar solved bugs, best first"""
+        self._ensure_fresh()
+        bugs, matrix = self._snapshot
+        if not bugs:
+            return []
+
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        sims = matrix @ q
+
+        k = min(k, len(bugs))
+        idx = np.argpartition(-sims, k - 1)[:k] if k < len(bugs) else np.arange(len(bugs))
+        idx = idx[np.argsort(-sims[idx])]
+        return [(bugs[i], float(sims[i])) for i in idx]
+
+
+# Singleton instance
+solved_bug_index = SolvedBugIndex()
@@ -0,0 +1,74 @@
+"""
+Atomic counters backed by the Postgres functions in
+supabase/migrations/20261017100000_atomic_counters.sql (per-vote) and
+20261017110000_batched_votes.sql (whole vote_buffer flushes).
+
+Every call is one round-trip that changes the counter server-side and
+returns the new value. None means the row doesn't exist. Callers still
+invalidate their cached rows (app.services.entity_cache) afterwards.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.db.session import db
+
+
+def _scalar(data: Any) -> Optional[int]:
+    # A scalar function comes back as a bare JSON value (or a one-item list on some versions)
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if isinstance(data, dict):
+        data = next(iter(data.values()), None)
+    return int(data) if data is not None else None
+
+
+class CounterService:
+    """Increment / decrement / toggle counters with single-statement RPCs"""
+
+    async def adjust_bug_votes(self, bug_id: str, delta: int = 1) -> Optional[int]:
+        res = await db.rpc("adjust_bug_votes", {"p_bug_id": bug_id, "p_delta": delta}).execute()
+        return _scalar(res.data)
+
+    async def adjust_solution_comments(self, solution_id: str, delta: int) -> Optional[int]:
+        res = await db.rpc(
+            "adjust_solution_comments", {"p_solution_id": solution_id, "p_delta": delta}
+        ).execute()
+        return _scalar(res.data)
+
+    async def toggle_solution_upvote(self, solution_id: str, user_id: str) -> Optional[Tuple[bool, int]]:
+        """(has_upvoted, votes) after the toggle"""
+        res = await db.rpc(
+            "toggle_solution_upvote", {"p_solution_id": solution_id, "p_user_id": user_id}
+        ).execute()
+        if not res.data:
+            return None
+        row = res.data[0] if isinstance(res.data, list) else res.data
+        return bool(row["has_upvoted"]), int(row["votes"] or 0)
+
+    async def apply_bug_votes(self, deltas: Dict[str, int], batch_id: Optional[str] = None) -> int:
+        """
+        Add each bug's delta to bugs.votes in one statement; returns bugs updated.
+        A batch_id that was already applied is skipped (returns 0), so a retry is safe.
+        """
+        rows = [{"id": bug_id, "votes": delta} for bug_id, delta in deltas.items() if delta]
+        if not rows:
+            return 0
+        res = await db.rpc("apply_bug_votes", {"p_deltas": rows, "p_batch_id": batch_id}).execute()
+        return _scalar(res.data) or 0
+
+    async def apply_solution_upvotes(
+        self,
+        add: Iterable[Tuple[str, str]],
+        remove: Iterable[Tuple[str, str]],
+    ) -> int:
+        """Make (solution_id, user_id) upvotes exist / not exist; returns votes changed"""
+        p_add = [{"solution_id": s, "user_id": u} for s, u in add]
+        p_remove = [{"solution_id": s, "user_id": u} for s, u in remove]
+        if not p_add and not p_remove:
+            return 0
+        res = await db.rpc("apply_solution_upvotes", {"p_add": p_add, "p_remove": p_remove}).execute()
+        return _scalar(res.data) or 0
+
+
+# Singleton instance
+counters = CounterService()
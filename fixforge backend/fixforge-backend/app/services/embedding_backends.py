@@ -0,0 +1,117 @@
+"""
+Pluggable inference backends for the sentence embedding model.
+
+- torch: the original SentenceTransformer (PyTorch) path.
+- onnx: the same transformer exported to ONNX (see scripts/export_onnx_embedding_model.py),
+  optionally dynamically quantized to int8, run with onnxruntime on CPU. Mean pooling
+  and L2 normalization are reproduced in numpy, so the output stays a unit-length
+  384-dim vector compatible with the Endee index (dimension 384, metric cosine).
+
+Select with EMBED_BACKEND=torch|onnx.
+"""
+
+import os
+import logging
+from typing import List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "models/all-MiniLM-L6-v2-onnx")
+EMBED_ONNX_QUANTIZED = os.getenv("EMBED_ONNX_QUANTIZED", "true").lower() in ("1", "true", "yes")
+EMBED_ONNX_THREADS = int(os.getenv("EMBED_ONNX_THREADS", "0"))
+EMBED_MAX_SEQ_LENGTH = 256
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model.int8.onnx"
+
+
+class TorchBackend:
+    """SentenceTransformer running on PyTorch"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = "torch"
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+class OnnxBackend:
+    """Exported transformer run with onnxruntime on CPU, optionally int8-quantized"""
+
+    def __init__(self, model_dir: str = EMBED_ONNX_DIR, quantized: bool = EMBED_ONNX_QUANTIZED):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found; run scripts/export_onnx_embedding_model.py first"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if EMBED_ONNX_THREADS > 0:
+            options.intra_op_num_threads = EMBED_ONNX_THREADS
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"✅ ONNX embedding backend loaded: {model_path}")
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=EMBED_MAX_SEQ_LENGTH,
+            return_tensors="np",
+        )
+        feed = {k: v.astype(np.int64) for k, v in tokens.items() if k in self._input_names}
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean pooling over real tokens, then L2 normalize (as the SentenceTransformer pipeline does)
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        # Group similar lengths together to minimise padding, then restore input order
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        batches = [
+            self._encode_batch([texts[j] for j in order[i:i + batch_size]])
+            for i in range(0, len(texts), batch_size)
+        ]
+        result = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        result[order] = np.vstack(batches)
+        return result
+
+
+def create_backend(model_name: str, backend: str = EMBED_BACKEND):
+    """Build the configured backend, falling back to torch if ONNX is unavailable"""
+    if backend == "onnx":
+        try:
+            return OnnxBackend()
+        except Exception as e:
+            logger.error(f"ONNX embedding backend unavailable, falling back to torch: {e}")
+    return TorchBackend(model_name)
+
+
+_worker_backends = {}
+
+
+def encode_in_worker(model_name: str, backend: str, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """Process-pool entry point: raw inference with a backend owned by the worker process"""
+    key = (model_name, backend)
+    if key not in _worker_backends:
+        _worker_backends[key] = create_backend(model_name, backend)
+    return _worker_backends[key].encode(texts, batch_size=batch_size)
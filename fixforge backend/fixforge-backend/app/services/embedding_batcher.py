@@ -0,0 +1,122 @@
+"""
+Dynamic micro-batching for single-text embedding requests.
+
+Concurrent callers each submit one text and get back their own Future. A
+dispatcher thread collects requests until EMBED_BATCH_MAX_SIZE items are
+queued or EMBED_BATCH_MAX_WAIT_MS has passed since the first one arrived, then
+runs a single batched encode through the shared EmbeddingService.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from app.services.embeddings import EmbeddingService, embedding_service
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text encodes into batched model calls"""
+
+    def __init__(
+        self,
+        service: EmbeddingService,
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS,
+    ):
+        self.service = service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="embedding-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue one text for encoding; the Future resolves to a list of floats"""
+        future: Future = Future()
+
+        # Cache hits never wait for a batch window
+        cached = self.service.peek(text)
+        if cached is not None:
+            future.set_result(cached.tolist())
+            return future
+
+        self._ensure_started()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> List[float]:
+        """Blocking helper for sync routes and scripts"""
+        return self.submit(text).result()
+
+    async def embed_async(self, text: str) -> List[float]:
+        """Await an embedding without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Callers that gave up (e.g. a cancelled request) don't need encoding
+            batch = [(t, f) for t, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                vectors = self.service.encode([t for t, _ in batch], batch_size=len(batch))
+            except Exception as e:
+                logger.error(f"Batched embedding failed for {len(batch)} texts: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), vec in zip(batch, vectors):
+                future.set_result(vec.tolist())
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+# Singleton instance
+embedding_batcher = EmbeddingBatcher(embedding_service)
@@ -0,0 +1,230 @@
+"""
+Content-addressed cache for text embeddings.
+
+Entries are keyed on sha256(model name + normalized text). Lookups go through
+a bounded in-memory LRU first and then, if EMBED_CACHE_DIR is set, through a
+persistent tier: an append-only float32 vector file read via np.memmap plus a
+newline-delimited key index of "<key> <row>" lines.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, keep to one writer per directory
+    fcntl = None
+
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so cosmetic differences map to the same cache entry"""
+    text = unicodedata.normalize("NFC", text or "")
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    payload = f"{model_name}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only, memory-mapped float32 vector store with a hash index.
+
+    Several processes (uvicorn workers, scripts/migrate_to_384.py,
+    scripts/rebuild_local_vector_index.py) may append to one directory. Each
+    append runs under an exclusive flock on the store's lock file, and its key
+    line records the row the vector landed on, read from the vector file's
+    size rather than this process's count. Keys appended by other processes
+    are picked up on a miss and before every append, under a shared lock.
+    Key lines left by a writer that died (cut off, or naming a row that was
+    never written) stop the index there, and the next append truncates them
+    away before a later row could make them look valid.
+    """
+
+    def __init__(self, directory: str, dim: int, name: str = "embeddings"):
+        os.makedirs(directory, exist_ok=True)
+        self.dim = dim
+        self._row_bytes = dim * 4
+        self._vec_path = os.path.join(directory, f"{name}.f32")
+        self._key_path = os.path.join(directory, f"{name}.keys")
+        self._lock_path = os.path.join(directory, f"{name}.lock")
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._key_offset = 0  # bytes of the key file already indexed
+        self._key_lines = 0
+        self._mmap: Optional[np.memmap] = None
+        with self._lock, self._file_lock():
+            self._read_new_keys()
+        logger.info(f"✅ Embedding disk cache loaded: {len(self._rows)} vectors")
+
+    def _stored_rows(self) -> int:
+        return os.path.getsize(self._vec_path) // self._row_bytes if os.path.exists(self._vec_path) else 0
+
+    def _has_new_keys(self) -> bool:
+        return os.path.exists(self._key_path) and os.path.getsize(self._key_path) > self._key_offset
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = False):
+        """flock on the store's lock file: appends take it exclusively, index reads shared"""
+        with open(self._lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield  # released when the file is closed
+
+    def _read_new_keys(self) -> None:
+        """Index the key lines appended since the last read, by any process (file lock held)"""
+        if not self._has_new_keys():
+            return
+        with open(self._key_path, "rb") as f:
+            f.seek(self._key_offset)
+            data = f.read()
+        stored = self._stored_rows()
+        for line in data.splitlines(keepends=True):
+            parts = line.split()
+            # "<key> <row>"; files written before rows were recorded have "<key>" on line <row>
+            row = int(parts[1]) if len(parts) == 2 and parts[1].isdigit() else self._key_lines
+            if not line.endswith(b"\n") or not parts or len(parts) > 2 or row >= stored:
+                logger.warning("⚠️ Embedding cache key file has an unfinished entry; the next append drops it")
+                break
+            self._rows.setdefault(parts[0].decode("ascii"), row)
+            self._key_offset += len(line)
+            self._key_lines += 1
+
+    def _view(self, row: int) -> np.memmap:
+        # Re-map lazily once the file has grown past the current mapping
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            self._mmap = np.memmap(
+                self._vec_path, dtype=np.float32, mode="r", shape=(self._stored_rows(), self.dim)
+            )
+        return self._mmap
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                # Another process may have stored it since we last looked
+                if not self._has_new_keys():
+                    return None
+                with self._file_lock():
+                    self._read_new_keys()
+                row = self._rows.get(key)
+                if row is None:
+                    return None
+            return np.array(self._view(row)[row])
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            return
+        with self._lock:
+            if key in self._rows:
+                return
+            with self._file_lock(exclusive=True):
+                self._read_new_keys()
+                if key in self._rows:
+                    return
+                row = self._append_vector(vector)
+                self._append_key(f"{key} {row}\n".encode("ascii"))
+                self._rows[key] = row
+
+    def _append_vector(self, vector: np.ndarray) -> int:
+        with open(self._vec_path, "ab") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size % self._row_bytes:
+                # A writer died mid-row; nothing points at the partial row
+                size -= size % self._row_bytes
+                f.truncate(size)
+            f.write(vector.tobytes())
+        return size // self._row_bytes
+
+    def _append_key(self, line: bytes) -> None:
+        with open(self._key_path, "a+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size > self._key_offset:
+                # Everything valid was indexed under this lock; the rest a dead writer left
+                f.truncate(self._key_offset)
+            f.write(line)
+        self._key_offset += len(line)
+        self._key_lines += 1
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + optional disk) embedding cache with hit/miss counters"""
+
+    def __init__(self, dim: int, maxsize: int = EMBED_CACHE_SIZE, directory: str = EMBED_CACHE_DIR):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.disk: Optional[DiskEmbeddingStore] = None
+        if directory:
+            try:
+                self.disk = DiskEmbeddingStore(directory, dim)
+            except Exception as e:
+                logger.error(f"Failed to open embedding disk cache at {directory}: {e}")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+
+        if self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self.memory.set(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector
+
+        self.misses += 1
+        return None
+
+    def peek(self, key: str) -> Optional[np.ndarray]:
+        """Memory-tier lookup that counts hits but never a miss"""
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.hits += 1
+        return vector
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        self.memory.set(key, vector)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, vector)
+            except Exception as e:
+                logger.error(f"Failed to persist embedding to disk cache: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "memory_size": len(self.memory),
+            "memory_maxsize": self.memory.maxsize,
+            "disk_size": len(self.disk) if self.disk is not None else 0,
+        }
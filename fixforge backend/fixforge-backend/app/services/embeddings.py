@@ -0,0 +1,124 @@
+"""
+Shared sentence-transformer embedding service.
+
+One model instance per process, loaded lazily on first use (or eagerly via
+``warmup()`` at startup) and shared by every router, job and script. Inference
+runs through the backend selected by EMBED_BACKEND (see embedding_backends). Every
+encode goes through the content-addressed EmbeddingCache, so only texts the
+process has never seen reach the model.
+"""
+
+import os
+import threading
+import logging
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core import executors
+from app.services.embedding_backends import EMBED_BACKEND, EMBED_ONNX_QUANTIZED, create_backend, encode_in_worker
+from app.services.embedding_cache import EmbeddingCache, embedding_key, normalize_text
+
+logger = logging.getLogger(__name__)
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_DIM = 384
+
+
+class EmbeddingService:
+    """Thread-safe, lazily loaded wrapper around the embedding inference backend"""
+
+    def __init__(self, model_name: str = EMBED_MODEL, backend: str = EMBED_BACKEND):
+        self.model_name = model_name
+        self.backend_kind = backend
+        # Label used in cache keys until the backend is loaded and reports its own name
+        self.backend_name = "onnx-int8" if backend == "onnx" and EMBED_ONNX_QUANTIZED else backend
+        self._backend = None
+        self._lock = threading.Lock()
+        self.cache = EmbeddingCache(dim=EMBED_DIM)
+
+    @property
+    def backend(self):
+        # Double-checked locking so concurrent first requests load the model once
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    logger.info(f"🔵 Loading embedding model: {self.model_name} ({self.backend_name})")
+                    self._backend = create_backend(self.model_name, self.backend_kind)
+                    self.backend_name = self._backend.name
+                    logger.info(f"✅ Embedding model loaded: {self.model_name} ({self.backend_name})")
+        return self._backend
+
+    @property
+    def model_id(self) -> str:
+        # Backends produce slightly different vectors, so they never share cache entries
+        return f"{self.model_name}:{self.backend_name}"
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._backend is not None
+
+    def warmup(self) -> None:
+        """Load the model ahead of the first request"""
+        if executors.uses_process_pool():
+            self._infer(["warmup"], batch_size=1)
+        else:
+            self.backend
+
+    def _infer(self, texts: List[str], batch_size: int) -> np.ndarray:
+        # encode() is synchronous: routes reach it through embedding_batcher, whose
+        # dispatcher thread calls it, and jobs/scripts call it directly. Neither
+        # runs on the event loop, so run_cpu() (a coroutine) doesn't apply; the
+        # process pool is used directly and this thread waits for the result.
+        # With CPU_POOL_WORKERS=0 the model runs on the calling thread instead.
+        if executors.uses_process_pool():
+            return executors.cpu_pool().submit(
+                encode_in_worker, self.model_name, self.backend_kind, texts, batch_size
+            ).result()
+        return self.backend.encode(texts, batch_size=batch_size)
+
+    def encode(self, texts: Union[str, Sequence[str]], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode one text or a list of texts.
+
+        Returns a 1-D array for a single string and a 2-D (n, dim) array for a list,
+        matching SentenceTransformer.encode. Cached texts skip inference entirely;
+        the rest are encoded in one batch, de-duplicated by content.
+        """
+        single = isinstance(texts, str)
+        items = [normalize_text(texts)] if single else [normalize_text(t) for t in texts]
+        if not items:
+            return np.zeros((0, EMBED_DIM), dtype=np.float32)
+
+        keys = [embedding_key(self.model_id, t) for t in items]
+        vectors = [self.cache.get(k) for k in keys]
+
+        pending = {}
+        for key, text, vec in zip(keys, items, vectors):
+            if vec is None:
+                pending.setdefault(key, text)
+
+        if pending:
+            encoded = self._infer(list(pending.values()), batch_size=batch_size)
+            fresh = dict(zip(pending.keys(), encoded))
+            for key, vec in fresh.items():
+                self.cache.put(key, vec)
+            vectors = [fresh[k] if v is None else v for k, v in zip(keys, vectors)]
+
+        result = np.vstack(vectors).astype(np.float32, copy=False)
+        return result[0] if single else result
+
+    def peek(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached vector for ``text`` if it is already in memory"""
+        return self.cache.peek(embedding_key(self.model_id, normalize_text(text)))
+
+    def encode_one(self, text: str) -> List[float]:
+        """Encode a single text into a plain list of floats (Endee/Supabase ready)"""
+        return self.encode(text).tolist()
+
+    def cache_stats(self):
+        return {"model": self.model_id, "loaded": self.is_loaded, **self.cache.stats()}
+
+
+# Singleton instance
+embedding_service = EmbeddingService()
@@ -1,183 +1,344 @@
 """
 Endee vector database client for bug embeddings.
+
+AsyncEndeeClient talks to Endee over a pooled, keep-alive httpx.AsyncClient
+(HTTP/2 when `h2` is installed) with per-operation timeouts. The index is
+verified lazily on first use instead of at import time. Async routes await
+`endee_service` directly; scripts and sync code use the blocking
+`endee_sync` shim, which drives the same service on a private event loop.
+
+EndeeService mirrors every write into a LocalVectorIndex and fails searches
+over to it when Endee errors or times out (or serves all reads from it with
+ENDEE_LOCAL_READS=true).
 """
 
 import os
-import requests
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+import time
+import weakref
 import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from app.core.executors import run_blocking
+from app.services.local_vector_index import LocalVectorIndex
+from app.services.search_cache import search_cache
+from app.services.lexical_index import bug_document, lexical_index
 
 logger = logging.getLogger(__name__)
 
+ENDEE_MAX_CONNECTIONS = int(os.getenv("ENDEE_MAX_CONNECTIONS", "50"))
+ENDEE_MAX_KEEPALIVE = int(os.getenv("ENDEE_MAX_KEEPALIVE", "50"))
+ENDEE_KEEPALIVE_EXPIRY = float(os.getenv("ENDEE_KEEPALIVE_EXPIRY", "30"))
+ENDEE_HTTP2 = os.getenv("ENDEE_HTTP2", "true").lower() in ("1", "true", "yes")
+ENDEE_CONNECT_TIMEOUT = float(os.getenv("ENDEE_CONNECT_TIMEOUT", "2"))
+ENDEE_SEARCH_TIMEOUT = float(os.getenv("ENDEE_SEARCH_TIMEOUT", "3"))
+ENDEE_WRITE_TIMEOUT = float(os.getenv("ENDEE_WRITE_TIMEOUT", "10"))
+ENDEE_ADMIN_TIMEOUT = float(os.getenv("ENDEE_ADMIN_TIMEOUT", "10"))
+ENDEE_BATCH_SIZE = int(os.getenv("ENDEE_BATCH_SIZE", "100"))
+ENDEE_BATCH_CONCURRENCY = int(os.getenv("ENDEE_BATCH_CONCURRENCY", "4"))
+ENDEE_DIM = 384
+ENDEE_LOCAL_READS = os.getenv("ENDEE_LOCAL_READS", "false").lower() in ("1", "true", "yes")
+ENDEE_FAILOVER_COOLDOWN = float(os.getenv("ENDEE_FAILOVER_COOLDOWN", "30"))
+
+
+class EndeeError(Exception):
+    """Endee could not be reached or returned an error"""
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _timeout(seconds: float) -> httpx.Timeout:
+    return httpx.Timeout(seconds, connect=ENDEE_CONNECT_TIMEOUT)
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def validate_vectors(vectors: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Check a batch of {"id", "values", "metadata"} items in one vectorized pass.
+
+    Returns (valid, failed): valid items have `values` as plain float lists,
+    failed items are {"id", "error"} reports.
+    """
+    failed: List[Dict[str, Any]] = []
+    lengths = np.fromiter((len(v.get("values") or []) for v in vectors), dtype=np.int64, count=len(vectors))
+    ok = np.flatnonzero(lengths == ENDEE_DIM)
+    for i in np.flatnonzero(lengths != ENDEE_DIM):
+        failed.append({"id": vectors[i].get("id"), "error": f"Expected {ENDEE_DIM}-dim embedding, got {lengths[i]}"})
+
+    if len(ok) == 0:
+        return [], failed
+
+    matrix = np.asarray([vectors[i]["values"] for i in ok], dtype=np.float32)
+    finite = np.isfinite(matrix).all(axis=1)
+    valid = []
+    for row, i in enumerate(ok):
+        if not finite[row]:
+            failed.append({"id": vectors[i].get("id"), "error": "Embedding contains NaN or inf"})
+            continue
+        valid.append({
+            "id": vectors[i]["id"],
+            "values": matrix[row].tolist(),
+            "metadata": vectors[i].get("metadata") or {},
+        })
+    return valid, failed
+
+
+class AsyncEndeeClient:
+    """Async HTTP client for self-hosted Endee vector DB"""
 
-class EndeeHTTPClient:
-    """HTTP client for self-hosted Endee vector DB"""
-    
     def __init__(self):
         self.base_url = os.getenv("ENDEE_URL", "http://localhost:8080")
         self.api_key = os.getenv("ENDEE_API_KEY", "")
         self.index_name = os.getenv("ENDEE_INDEX", "fixforge_bugs")
-        
-        self.session = requests.Session()
+
+        self.headers = {"Content-Type": "application/json"}
         if self.api_key:
-            self.session.headers.update({"Authorization": f"Bearer {self.api_key}"})
-        
-        self.session.headers.update({"Content-Type": "application/json"})
-        logger.info(f"🔗 Endee client initialized: {self.base_url}")
-        
-        self._ensure_index()
-    
-    def _ensure_index(self):
-        try:
-            response = self.session.get(f"{self.base_url}/api/v1/index/list")
-            
-            if response.status_code == 200:
-                indexes = response.json().get("indexes", [])
-                if self.index_name not in indexes:
-                    create_payload = {
-                        "name": self.index_name,
-                        "dimension": 384,
-                        "metric": "cosine"
-                    }
-                    create_response = self.session.post(
-                        f"{self.base_url}/api/v1/index/create",
-                        json=create_payload
-                    )
-                    if create_response.status_code == 200:
-                        logger.info(f"✅ Created Endee index: {self.index_name}")
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+
+        self.limits = httpx.Limits(
+            max_connections=ENDEE_MAX_CONNECTIONS,
+            max_keepalive_connections=ENDEE_MAX_KEEPALIVE,
+            keepalive_expiry=ENDEE_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = ENDEE_HTTP2 and _http2_available()
+
+        # httpx clients are bound to the event loop they are used on, so keep one per loop
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+        self._index_ready = False
+        logger.info(f"🔗 Endee client configured: {self.base_url} (http2={self.http2})")
+
+    def _session(self) -> Tuple[httpx.AsyncClient, asyncio.Lock]:
+        loop = asyncio.get_running_loop()
+        session = self._clients.get(loop)
+        if session is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                http2=self.http2,
+                timeout=_timeout(ENDEE_ADMIN_TIMEOUT),
+            )
+            session = (client, asyncio.Lock())
+            self._clients[loop] = session
+        return session
+
+    async def aclose(self):
+        """Close the connection pool owned by the current event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._clients.pop(loop, None)
+        if session is not None:
+            await session[0].aclose()
+
+    async def _ensure_index(self) -> httpx.AsyncClient:
+        client, lock = self._session()
+        if self._index_ready:
+            return client
+
+        async with lock:
+            if self._index_ready:
+                return client
+            try:
+                response = await client.get("/api/v1/index/list")
+
+                if response.status_code == 200:
+                    indexes = response.json().get("indexes", [])
+                    if self.index_name not in indexes:
+                        create_payload = {
+                            "name": self.index_name,
+                            "dimension": 384,
+                            "metric": "cosine"
+                        }
+                        create_response = await client.post("/api/v1/index/create", json=create_payload)
+                        if create_response.status_code == 200:
+                            logger.info(f"✅ Created Endee index: {self.index_name}")
+                            self._index_ready = True
+                        else:
+                            logger.warning(f"Index creation response: {create_response.status_code}")
                     else:
-                        logger.warning(f"Index creation response: {create_response.status_code}")
+                        logger.info(f"✅ Endee index exists: {self.index_name}")
+                        self._index_ready = True
                 else:
-                    logger.info(f"✅ Endee index exists: {self.index_name}")
-            else:
-                logger.warning(f"Could not list indexes: {response.status_code}")
-                
-        except Exception as e:
-            logger.error(f"Failed to ensure index: {e}")
-    
-    def upsert_vector(
-        self, 
-        vector_id: str, 
-        embedding: List[float], 
+                    logger.warning(f"Could not list indexes: {response.status_code}")
+
+            except Exception as e:
+                logger.error(f"Failed to ensure index: {e}")
+        return client
+
+    async def upsert_vector(
+        self,
+        vector_id: str,
+        embedding: List[float],
         metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
-        try:
-            if len(embedding) != 384:
-                raise ValueError(f"Expected 384-dim embedding, got {len(embedding)}")
-            
-            payload = {
-                "index": self.index_name,
-                "vectors": [
-                    {
-                        "id": vector_id,
-                        "values": embedding,
-                        "metadata": metadata or {}
-                    }
-                ]
-            }
-            
-            response = self.session.post(
-                f"{self.base_url}/api/v1/vector/upsert",
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"✅ Upserted vector to Endee: {vector_id}")
-                return True
-            else:
-                logger.error(f"Upsert failed: {response.status_code} - {response.text}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Failed to upsert vector {vector_id}: {e}")
-            return False
-    
-    def search_similar(
+        report = await self.upsert_vectors([{"id": vector_id, "values": embedding, "metadata": metadata}])
+        return not report["failed"]
+
+    async def upsert_vectors(
+        self,
+        vectors: List[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> Dict[str, List]:
+        """
+        Upsert many vectors, chunked into payloads of `batch_size` items
+
+        Args:
+            vectors: [{"id", "values", "metadata"}, ...]
+            batch_size: Items per request (default ENDEE_BATCH_SIZE)
+
+        Returns:
+            {"upserted": [ids], "failed": [{"id", "error"}]}
+        """
+        valid, failed = validate_vectors(vectors)
+        upserted: List[str] = []
+        if not valid:
+            return {"upserted": upserted, "failed": failed}
+
+        sem = asyncio.Semaphore(ENDEE_BATCH_CONCURRENCY)
+
+        async def send(chunk: List[Dict[str, Any]]):
+            ids = [v["id"] for v in chunk]
+            async with sem:
+                try:
+                    client = await self._ensure_index()
+                    response = await client.post(
+                        "/api/v1/vector/upsert",
+                        json={"index": self.index_name, "vectors": chunk},
+                        timeout=_timeout(ENDEE_WRITE_TIMEOUT)
+                    )
+                    if response.status_code == 200:
+                        upserted.extend(ids)
+                        return
+                    error = f"Upsert failed: {response.status_code} - {response.text}"
+                except Exception as e:
+                    error = f"Upsert failed: {e}"
+            logger.error(f"{error} ({len(ids)} vectors)")
+            failed.extend({"id": vid, "error": error} for vid in ids)
+
+        await asyncio.gather(*[send(chunk) for chunk in _chunks(valid, batch_size or ENDEE_BATCH_SIZE)])
+        logger.info(f"✅ Upserted {len(upserted)} vectors to Endee ({len(failed)} failed)")
+        return {"upserted": upserted, "failed": failed}
+
+    async def search_similar(
         self,
         query_vector: List[float],
         top_k: int = 10,
         filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
+        """
+        Search Endee for the nearest vectors
+
+        Raises:
+            ValueError: query vector has the wrong dimension
+            EndeeError: Endee is unreachable, timed out or returned an error
+        """
+        if len(query_vector) != 384:
+            raise ValueError(f"Expected 384-dim query vector, got {len(query_vector)}")
+
         try:
-            if len(query_vector) != 384:
-                raise ValueError(f"Expected 384-dim query vector, got {len(query_vector)}")
-            
+            client = await self._ensure_index()
             payload = {
                 "index": self.index_name,
                 "vector": query_vector,
                 "top_k": min(max(1, top_k), 100),
                 "include_metadata": True
             }
-            
+
             if filters:
                 payload["filter"] = filters
-            
-            response = self.session.post(
-                f"{self.base_url}/api/v1/vector/search",
-                json=payload
+
+            response = await client.post(
+                "/api/v1/vector/search", json=payload, timeout=_timeout(ENDEE_SEARCH_TIMEOUT)
             )
-            
-            if response.status_code == 200:
-                results = response.json().get("matches", [])
-                logger.info(f"✅ Found {len(results)} similar vectors")
-                return results
-            else:
-                logger.error(f"Search failed: {response.status_code} - {response.text}")
-                return []
-                
         except Exception as e:
-            logger.error(f"Failed to search Endee: {e}")
-            return []
-    
-    def delete_vector(self, vector_id: str) -> bool:
+            raise EndeeError(f"Search request failed: {e!r}") from e
+
+        if response.status_code != 200:
+            raise EndeeError(f"Search failed: {response.status_code} - {response.text}")
+
+        results = response.json().get("matches", [])
+        logger.info(f"✅ Found {len(results)} similar vectors")
+        return results
+
+    async def delete_vector(self, vector_id: str) -> bool:
         """
         Delete a vector from Endee
-        
+
         Args:
             vector_id: Vector identifier to delete
-        
+
         Returns:
             True if successful, False otherwise
         """
-        try:
-            payload = {
-                "index": self.index_name,
-                "ids": [vector_id]
-            }
-            
-            response = self.session.post(
-                f"{self.base_url}/api/v1/vector/delete",
-                json=payload
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"✅ Deleted vector from Endee: {vector_id}")
-                return True
-            else:
-                logger.error(f"Delete failed: {response.status_code} - {response.text}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Failed to delete vector {vector_id}: {e}")
-            return False
-    
-    def get_index_stats(self) -> Dict[str, Any]:
+        report = await self.delete_vectors([vector_id])
+        return not report["failed"]
+
+    async def delete_vectors(
+        self,
+        vector_ids: List[str],
+        batch_size: Optional[int] = None
+    ) -> Dict[str, List]:
+        """
+        Delete many vectors, chunked into payloads of `batch_size` ids
+
+        Returns:
+            {"deleted": [ids], "failed": [{"id", "error"}]}
+        """
+        deleted: List[str] = []
+        failed: List[Dict[str, Any]] = []
+        sem = asyncio.Semaphore(ENDEE_BATCH_CONCURRENCY)
+
+        async def send(ids: List[str]):
+            async with sem:
+                try:
+                    client = await self._ensure_index()
+                    response = await client.post(
+                        "/api/v1/vector/delete",
+                        json={"index": self.index_name, "ids": ids},
+                        timeout=_timeout(ENDEE_WRITE_TIMEOUT)
+                    )
+                    if response.status_code == 200:
+                        deleted.extend(ids)
+                        return
+                    error = f"Delete failed: {response.status_code} - {response.text}"
+                except Exception as e:
+                    error = f"Delete failed: {e}"
+            logger.error(f"{error} ({len(ids)} vectors)")
+            failed.extend({"id": vid, "error": error} for vid in ids)
+
+        await asyncio.gather(*[send(chunk) for chunk in _chunks(list(vector_ids), batch_size or ENDEE_BATCH_SIZE)])
+        logger.info(f"✅ Deleted {len(deleted)} vectors from Endee ({len(failed)} failed)")
+        return {"deleted": deleted, "failed": failed}
+
+    async def get_index_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the Endee index
-        
+
         Returns:
             Dictionary with stats (total_vectors, dimension, etc.)
         """
         try:
-            response = self.session.get(
-                f"{self.base_url}/api/v1/index/stats/{self.index_name}"
-            )
-            
+            client, _ = self._session()
+            response = await client.get(f"/api/v1/index/stats/{self.index_name}")
+
             if response.status_code == 200:
                 return response.json()
             else:
                 return {"error": f"Stats request failed: {response.status_code}"}
-                
+
         except Exception as e:
             logger.error(f"Failed to get index stats: {e}")
             return {"error": str(e)}
@@ -188,47 +349,170 @@ class EndeeService:
     Wrapper for Endee HTTP client with bug-specific methods.
     Provides a clean interface for FixForge bug vector operations.
     """
-    
+
     def __init__(self):
         """Initialize Endee service"""
-        self.client = EndeeHTTPClient()
-    
-    def upsert_bug_vector(
-        self, 
-        bug_id: str, 
-        embedding: List[float], 
-        metadata: Dict[str, Any]
+        self.client = AsyncEndeeClient()
+        self.local = LocalVectorIndex(dim=ENDEE_DIM)
+        self._endee_down_until = 0.0
+
+    async def upsert_bug_vector(
+        self,
+        bug_id: str,
+        embedding: List[float],
+        metadata: Dict[str, Any],
+        document: Optional[str] = None
     ) -> bool:
-        """Store or update a bug vector in Endee"""
-        metadata["bug_id"] = bug_id
-        return self.client.upsert_vector(bug_id, embedding, metadata)
-    
-    def search_similar_bugs(
+        """Store or update a bug vector in Endee (and its text in the lexical index)"""
+        report = await self.upsert_bug_vectors([
+            {"bug_id": bug_id, "embedding": embedding, "metadata": metadata, "document": document}
+        ])
+        return not report["failed"]
+
+    async def search_similar_bugs(
         self,
         query_vector: List[float],
         top_k: int = 10,
         metadata_filters: Optional[Dict[str, Any]] = None,
         min_score: float = 0.0
     ) -> List[Dict[str, Any]]:
-        """Search for similar bugs using vector similarity"""
-        results = self.client.search_similar(query_vector, top_k, metadata_filters)
-        
+        """Search for similar bugs, failing over to the local mirror if Endee is unavailable"""
+        top_k = min(max(1, top_k), 100)
+        if (ENDEE_LOCAL_READS and len(self.local)) or time.monotonic() < self._endee_down_until:
+            results = await run_blocking(self.local.search, query_vector, top_k, metadata_filters)
+        else:
+            try:
+                results = await self.client.search_similar(query_vector, top_k, metadata_filters)
+            except ValueError as e:
+                logger.error(f"Failed to search Endee: {e}")
+                return []
+            except EndeeError as e:
+                logger.warning(f"⚠️ {e}; serving from local index for {ENDEE_FAILOVER_COOLDOWN:.0f}s")
+                self._endee_down_until = time.monotonic() + ENDEE_FAILOVER_COOLDOWN
+                results = await run_blocking(self.local.search, query_vector, top_k, metadata_filters)
+
         # Filter by minimum score
         filtered_results = [
-            r for r in results 
+            r for r in results
             if r.get("score", 0) >= min_score
         ]
-        
+
         return filtered_results
-    
-    def delete_bug_vector(self, bug_id: str) -> bool:
+
+    async def upsert_bug_vectors(
+        self,
+        bugs: List[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> Dict[str, List]:
+        """
+        Store or update many bug vectors in batched requests
+
+        Args:
+            bugs: [{"bug_id", "embedding", "metadata", "document"?}, ...]; `document`
+                is the full text for the lexical index (defaults to title + tags)
+        """
+        vectors = [
+            {
+                "id": b["bug_id"],
+                "values": b["embedding"],
+                "metadata": {**(b.get("metadata") or {}), "bug_id": b["bug_id"]},
+            }
+            for b in bugs
+        ]
+        valid, invalid = validate_vectors(vectors)
+        # Mirror first: the local index should hold what Endee is meant to hold
+        self.local.upsert(valid)
+        lexical_index.upsert(
+            (b["bug_id"], b.get("document") or bug_document(b.get("metadata") or {}), b.get("metadata"))
+            for b in bugs
+        )
+        search_cache.invalidate()
+        report = await self.client.upsert_vectors(valid, batch_size)
+        report["failed"] = invalid + report["failed"]
+        return report
+
+    async def delete_bug_vector(self, bug_id: str) -> bool:
         """Delete a bug vector from Endee"""
-        return self.client.delete_vector(bug_id)
-    
-    def get_collection_stats(self) -> Dict[str, Any]:
+        report = await self.delete_bug_vectors([bug_id])
+        return not report["failed"]
+
+    async def delete_bug_vectors(self, bug_ids: List[str], batch_size: Optional[int] = None) -> Dict[str, List]:
+        """Delete many bug vectors in batched requests"""
+        self.local.delete(bug_ids)
+        lexical_index.delete(bug_ids)
+        search_cache.invalidate()
+        return await self.client.delete_vectors(bug_ids, batch_size)
+
+    async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the bug vector collection"""
-        return self.client.get_index_stats()
+        return await self.client.get_index_stats()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class SyncEndeeService:
+    """
+    Blocking shim over EndeeService for scripts and sync code paths.
+    Runs the service's coroutines on a private event loop thread, so it shares
+    the singleton's state but keeps its own connection pool.
+    """
+
+    def __init__(self, service: EndeeService):
+        self._service = service
+        self.local = service.local
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _run(self, coro):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="endee-sync", daemon=True).start()
+                    self._loop = loop
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def upsert_bug_vector(
+        self,
+        bug_id: str,
+        embedding: List[float],
+        metadata: Dict[str, Any],
+        document: Optional[str] = None
+    ) -> bool:
+        return self._run(self._service.upsert_bug_vector(bug_id, embedding, metadata, document))
+
+    def search_similar_bugs(
+        self,
+        query_vector: List[float],
+        top_k: int = 10,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        min_score: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        return self._run(self._service.search_similar_bugs(query_vector, top_k, metadata_filters, min_score))
+
+    def search_endee(
+        self,
+        query_vector: List[float],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query Endee directly, bypassing the local failover (raises EndeeError)"""
+        return self._run(self._service.client.search_similar(query_vector, top_k, filters))
+
+    def upsert_bug_vectors(self, bugs: List[Dict[str, Any]], batch_size: Optional[int] = None) -> Dict[str, List]:
+        return self._run(self._service.upsert_bug_vectors(bugs, batch_size))
+
+    def delete_bug_vector(self, bug_id: str) -> bool:
+        return self._run(self._service.delete_bug_vector(bug_id))
+
+    def delete_bug_vectors(self, bug_ids: List[str], batch_size: Optional[int] = None) -> Dict[str, List]:
+        return self._run(self._service.delete_bug_vectors(bug_ids, batch_size))
+
+    def get_collection_stats(self) -> Dict[str, Any]:
+        return self._run(self._service.get_collection_stats())
 
 
-# Singleton instance
+# Singleton instances
 endee_service = EndeeService()
+endee_sync = SyncEndeeService(endee_service)
@@ -0,0 +1,137 @@
+"""
+Read-through cache of bug, solution and user rows by id.
+
+Each table gets its own TTL'd LRU of rows without their heavy columns
+(app.utils.fields.HEAVY_COLUMNS: embeddings and code of bugs, which would
+make each entry tens of kilobytes); callers that need those select them
+themselves. Lookups that
+find nothing are cached too, for a shorter ENTITY_CACHE_NEGATIVE_TTL, so
+repeated probes for a missing id don't each cost a query. Concurrent misses
+for the same id share one query.
+
+Write endpoints call `invalidate(id)` after changing a row. A query that was
+already in flight when the write happened is not cached (its result may
+predate the write), and later readers don't join it. Other workers see the
+write once their entry's TTL runs out.
+
+    bug = await bug_cache.get(bug_id)        # dict copy, or None
+    ...
+    await db.table("bugs").update(...).eq("id", bug_id).execute()
+    bug_cache.invalidate(bug_id)
+"""
+
+import os
+import asyncio
+from typing import Any, Dict, Hashable, Optional
+
+from app.db.session import db
+from app.utils.cache import LRUCache
+from app.utils.fields import HEAVY_COLUMNS, select_columns
+
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "5000"))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "60"))
+ENTITY_CACHE_NEGATIVE_TTL = float(os.getenv("ENTITY_CACHE_NEGATIVE_TTL", "10"))
+
+_MISSING = object()
+_NOT_FOUND = object()
+
+
+class EntityCache:
+    """TTL+LRU cache of one table's rows keyed by id, with negative caching"""
+
+    def __init__(
+        self,
+        table: str,
+        maxsize: int = ENTITY_CACHE_SIZE,
+        ttl: float = ENTITY_CACHE_TTL,
+        negative_ttl: float = ENTITY_CACHE_NEGATIVE_TTL,
+    ):
+        self.table = table
+        self.heavy = HEAVY_COLUMNS.get(table, ())
+        self.negative_ttl = negative_ttl
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped by every invalidation; a fetch only caches if it is unchanged
+        self._epoch = 0
+        self.negative_hits = 0
+        self.coalesced = 0
+        self.queries = 0
+        self.invalidations = 0
+
+    async def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """The row with this id, without heavy columns (a copy the caller may modify), or None"""
+        key = str(key)
+        cached = self._cache.get(key, _MISSING)
+        if cached is _NOT_FOUND:
+            self.negative_hits += 1
+            return None
+        if cached is not _MISSING:
+            return dict(cached)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, self._epoch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        row = await asyncio.shield(task)
+        return dict(row) if row is not None else None
+
+    async def exists(self, key: Hashable) -> bool:
+        return await self.get(key) is not None
+
+    def _done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved by the awaiting callers; don't warn if they all went away
+
+    async def _fetch(self, key: str, epoch: int) -> Optional[Dict[str, Any]]:
+        self.queries += 1
+        columns = await select_columns(self.table)
+        res = await db.table(self.table).select(columns).eq("id", key).limit(1).execute()
+        row = res.data[0] if res.data else None
+        if row is not None and columns == "*":
+            # Schema unavailable, so the select couldn't leave them out
+            row = {name: value for name, value in row.items() if name not in self.heavy}
+        if epoch == self._epoch:
+            if row is None:
+                self._cache.set(key, _NOT_FOUND, ttl=self.negative_ttl)
+            else:
+                self._cache.set(key, row)
+        return row
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Forget these ids (call after inserting, updating or deleting them)"""
+        self._epoch += 1
+        self.invalidations += 1
+        for key in keys:
+            key = str(key)
+            self._cache.pop(key)
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._cache.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        # hits include negative hits; coalesced misses waited on another caller's query
+        return {
+            **self._cache.stats(),
+            "negative_hits": self.negative_hits,
+            "coalesced": self.coalesced,
+            "queries": self.queries,
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instances
+bug_cache = EntityCache("bugs")
+solution_cache = EntityCache("solutions")
+user_cache = EntityCache("users")
+
+
+def entity_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.table: cache.stats() for cache in (bug_cache, solution_cache, user_cache)}
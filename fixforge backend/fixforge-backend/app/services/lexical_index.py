@@ -0,0 +1,292 @@
+"""
+In-process BM25 index over bug text, for exact error strings, stack-trace
+symbols and tags that vector search ranks poorly.
+
+Fed from the same write path as Endee (EndeeService.upsert_bug_vectors /
+delete_bug_vectors) and bootstrapped from Supabase on startup. Postings are
+compact array.array buffers scored with numpy, so a query costs one
+vectorized pass over the postings of its terms rather than a Python loop
+per matching document. Replaced or deleted documents are tombstoned and the
+postings compacted once tombstones pass LEXICAL_COMPACT_RATIO.
+"""
+
+import os
+import re
+import math
+import threading
+import logging
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_INDEX_BOOTSTRAP = os.getenv("LEXICAL_INDEX_BOOTSTRAP", "true").lower() in ("1", "true", "yes")
+LEXICAL_COMPACT_RATIO = float(os.getenv("LEXICAL_COMPACT_RATIO", "0.3"))
+# Terms in more than LEXICAL_DRIVER_DF docs contribute only their LEXICAL_CHAMPIONS
+# highest-impact docs as candidates (they still score every candidate)
+LEXICAL_DRIVER_DF = int(os.getenv("LEXICAL_DRIVER_DF", "2000"))
+LEXICAL_CHAMPIONS = int(os.getenv("LEXICAL_CHAMPIONS", "500"))
+
+# Metadata fields that can be filtered on (same syntax as Endee: eq, $ne, $in)
+FILTER_FIELDS = ("status", "severity")
+
+# Identifiers with their dotted/namespaced paths (java.lang.NullPointerException,
+# std::vector, $scope.apply), plus bare numbers such as error codes
+_TOKEN = re.compile(r"[A-Za-z_$][\w$]*(?:(?:\.|::|->)[A-Za-z_$][\w$]*)*|\d+")
+_SPLIT = re.compile(r"\.|::|->")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms for BM25: whole symbols plus their parts, so
+    "NullPointerException" matches "NullPointerException", "null pointer"
+    and "pointer exception", and "os.path.join" also matches "join".
+    """
+    terms: List[str] = []
+    for match in _TOKEN.finditer(text or ""):
+        token = match.group(0)
+        terms.append(token.lower())
+        parts = _SPLIT.split(token)
+        if len(parts) > 1:
+            terms.extend(p.lower() for p in parts if p)
+        for part in parts:
+            words = _CAMEL.findall(part)
+            if len(words) > 1:
+                terms.extend(w.lower() for w in words)
+    return terms
+
+
+def bug_document(bug: Dict[str, Any]) -> str:
+    """Text indexed for a bug: title, description, tags and attached code"""
+    tags = bug.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tags]
+    return "\n".join([
+        bug.get("title") or "", bug.get("description") or "", " ".join(map(str, tags)), bug.get("code") or ""
+    ])
+
+
+class LexicalIndex:
+    """Incrementally updated BM25 inverted index with Endee-style metadata filters"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, compact_ratio: float = LEXICAL_COMPACT_RATIO):
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}   # term -> (slots, term freqs)
+        self._champions: Dict[str, Tuple[int, np.ndarray]] = {}  # term -> (df when built, top slots)
+        self._slots: Dict[str, int] = {}                      # doc id -> slot
+        self._ids: List[Optional[str]] = []                   # slot -> doc id (None = tombstone)
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._fields = {f: (array("H"), {None: 0}) for f in FILTER_FIELDS}
+        self._live = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _code(self, field: str, value: Any) -> int:
+        vocab = self._fields[field][1]
+        return vocab.setdefault(value, len(vocab))
+
+    def _remove(self, doc_id: str) -> None:
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return
+        self._ids[slot] = None
+        self._alive[slot] = 0
+        self._live -= 1
+        self._total_length -= self._lengths[slot]
+
+    def upsert(self, docs: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        """Index (doc_id, text, metadata) triples, replacing earlier versions"""
+        with self._lock:
+            for doc_id, text, metadata in docs:
+                self._remove(doc_id)
+                terms = tokenize(text)
+                slot = len(self._ids)
+                self._slots[doc_id] = slot
+                self._ids.append(doc_id)
+                self._lengths.append(len(terms))
+                self._alive.append(1)
+                for field in FILTER_FIELDS:
+                    self._fields[field][0].append(self._code(field, (metadata or {}).get(field)))
+                self._live += 1
+                self._total_length += len(terms)
+
+                counts: Dict[str, int] = {}
+                for term in terms:
+                    counts[term] = counts.get(term, 0) + 1
+                for term, tf in counts.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array("I"), array("H"))
+                    postings[0].append(slot)
+                    postings[1].append(min(tf, 65535))
+            self._maybe_compact()
+
+    def delete(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+            self._maybe_compact()
+
+    def update_metadata(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        """Change filterable fields (e.g. status) without re-indexing the text"""
+        with self._lock:
+            slot = self._slots.get(doc_id)
+            if slot is None:
+                return
+            for field in FILTER_FIELDS:
+                if field in metadata:
+                    self._fields[field][0][slot] = self._code(field, metadata[field])
+
+    def _maybe_compact(self) -> None:
+        dead = len(self._ids) - self._live
+        if dead < 1024 or dead < self.compact_ratio * len(self._ids):
+            return
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        remap = np.cumsum(alive, dtype=np.int64) - 1
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (slots, tfs) in self._postings.items():
+            s = np.frombuffer(slots, dtype=np.uint32)
+            keep = alive[s]
+            if keep.any():
+                postings[term] = (
+                    array("I", remap[s[keep]].astype(np.uint32).tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()),
+                )
+        self._postings = postings
+        self._champions = {}
+
+        self._ids = [doc_id for doc_id in self._ids if doc_id is not None]
+        self._slots = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._lengths = array("I", np.frombuffer(self._lengths, dtype=np.uint32)[alive].tobytes())
+        self._alive = bytearray(b"\x01") * len(self._ids)
+        for field, (codes, vocab) in self._fields.items():
+            self._fields[field] = (array("H", np.frombuffer(codes, dtype=np.uint16)[alive].tobytes()), vocab)
+        logger.info(f"🧹 Lexical index compacted: {dead} tombstones removed, {self._live} docs")
+
+    def _filter_mask(self, filters: Dict[str, Any], slots: np.ndarray) -> np.ndarray:
+        mask = np.ones(len(slots), dtype=bool)
+        for field, condition in filters.items():
+            if field not in self._fields:
+                raise ValueError(f"Lexical index cannot filter on '{field}'")
+            codes = np.frombuffer(self._fields[field][0], dtype=np.uint16)[slots]
+            vocab = self._fields[field][1]
+            if isinstance(condition, dict):
+                if "$ne" in condition:
+                    mask &= codes != vocab.get(condition["$ne"], -1)
+                if "$in" in condition:
+                    mask &= np.isin(codes, [vocab[v] for v in condition["$in"] if v in vocab])
+            else:
+                mask &= codes == vocab.get(condition, -1)
+        return mask
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25 top-k as [{"id", "score"}], best first.
+
+        Candidates are the full postings of rare terms plus the champion lists
+        (highest single-term impact docs) of frequent ones, so a query never
+        walks every posting of "error" or "the"; every query term is then
+        scored on the candidates by binary search in its slot-ordered postings.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or self._live == 0:
+                return []
+            postings = [(t, self._postings[t]) for t in terms if t in self._postings]
+            if not postings:
+                return []
+
+            avgdl = max(self._total_length / self._live, 1.0)
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            candidates = np.unique(np.concatenate([
+                np.frombuffer(slots, dtype=np.uint32) if len(slots) <= LEXICAL_DRIVER_DF
+                else self._champion_slots(term, slots, tfs, lengths, avgdl)
+                for term, (slots, tfs) in postings
+            ]))
+            candidates = candidates[np.frombuffer(self._alive, dtype=np.uint8)[candidates].astype(bool)]
+            if filters:
+                candidates = candidates[self._filter_mask(filters, candidates)]
+            if len(candidates) == 0:
+                return []
+
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[candidates].astype(np.float32) / avgdl)
+            scores = np.zeros(len(candidates), dtype=np.float32)
+            for _, (slots, tfs) in postings:
+                slots = np.frombuffer(slots, dtype=np.uint32)
+                df = len(slots)
+                # Postings are in slot order, so membership is a binary search
+                pos = np.minimum(np.searchsorted(slots, candidates), df - 1)
+                hit = slots[pos] == candidates
+                tf = np.frombuffer(tfs, dtype=np.uint16)[pos[hit]].astype(np.float32)
+                idf = math.log(1.0 + (self._live - df + 0.5) / (df + 0.5))
+                scores[hit] += idf * tf * (self.k1 + 1.0) / (tf + norm[hit])
+
+            k = min(max(1, top_k), len(candidates))
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+            top = top[np.argsort(-scores[top])]
+            return [{"id": self._ids[candidates[i]], "score": float(scores[i])} for i in top]
+
+    def _champion_slots(self, term: str, slots: array, tfs: array, lengths: np.ndarray, avgdl: float) -> np.ndarray:
+        """Top LEXICAL_CHAMPIONS docs of a frequent term, rebuilt after its postings grow 10%"""
+        cached = self._champions.get(term)
+        if cached is not None and len(slots) <= cached[0] * 1.1:
+            return cached[1]
+        s = np.frombuffer(slots, dtype=np.uint32)
+        tf = np.frombuffer(tfs, dtype=np.uint16).astype(np.float32)
+        impact = tf / (tf + self.k1 * (1.0 - self.b + self.b * lengths[s].astype(np.float32) / avgdl))
+        k = min(LEXICAL_CHAMPIONS, len(s))
+        top = np.sort(s[np.argpartition(-impact, k - 1)[:k]])
+        self._champions[term] = (len(s), top)
+        return top
+
+    def stats(self) -> Dict[str, Any]:
+        return {"documents": self._live, "terms": len(self._postings), "slots": len(self._ids)}
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked result lists: score(d) = sum over lists of 1 / (k + rank)"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item["id"]] = fused.get(item["id"], 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+
+def bootstrap_from_supabase(index: "LexicalIndex", page_size: int = 1000) -> int:
+    """Load every bug into the index (run once at startup, off the event loop)"""
+    from app.core.config import supabase
+
+    loaded, start = 0, 0
+    while True:
+        rows = supabase.table("bugs").select(
+            "id, title, description, tags, code, status, severity"
+        ).order("id").range(start, start + page_size - 1).execute().data or []
+        index.upsert((r["id"], bug_document(r), r) for r in rows)
+        loaded += len(rows)
+        if len(rows) < page_size:
+            break
+        start += page_size
+    logger.info(f"✅ Lexical index bootstrapped: {loaded} bugs")
+    return loaded
+
+
+# Singleton instance
+lexical_index = LexicalIndex()
@@ -0,0 +1,253 @@
+"""
+In-process mirror of the Endee bug index.
+
+EndeeService writes every upsert/delete here as well as to Endee, so when
+Endee is slow or unreachable semantic search, duplicate detection and RAG can
+fail over to a local brute-force search instead of returning nothing. Vectors
+live in one L2-normalized float32 matrix (a query is one mat-vec product);
+metadata filters use the same syntax as Endee (equality, $ne, $in).
+
+If LOCAL_VECTOR_INDEX_DIR is set the index is snapshotted there (matrix as
+.npy, ids + metadata as JSON) and reloaded on startup. Either way app.main
+runs bootstrap_from_supabase() in the background at startup, so a mirror
+without a snapshot (or with a stale one) is filled from the bugs table
+instead of staying empty until bugs are written again.
+"""
+
+import os
+import json
+import threading
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LOCAL_VECTOR_INDEX_DIR = os.getenv("LOCAL_VECTOR_INDEX_DIR", "")
+LOCAL_VECTOR_INDEX_BOOTSTRAP = os.getenv("LOCAL_VECTOR_INDEX_BOOTSTRAP", "true").lower() in ("1", "true", "yes")
+
+
+def matches_filter(metadata: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate an Endee-style metadata filter against one item's metadata"""
+    for field, condition in (filters or {}).items():
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    """Thread-safe brute-force cosine index with Endee-compatible results"""
+
+    def __init__(self, dim: int = 384, directory: str = LOCAL_VECTOR_INDEX_DIR):
+        self.dim = dim
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self._dirty = False
+        if directory:
+            self.load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._rows
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        matrix = np.zeros((max(needed, capacity * 2, 64), self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+    def upsert(self, vectors: List[Dict[str, Any]], replace: bool = True) -> None:
+        """
+        Insert or replace {"id", "values", "metadata"} items (values already
+        validated); with replace=False ids already present are left as they are
+        """
+        if not vectors:
+            return
+        batch = np.asarray([v["values"] for v in vectors], dtype=np.float32).reshape(-1, self.dim)
+        batch /= np.clip(np.linalg.norm(batch, axis=1, keepdims=True), 1e-12, None)
+
+        with self._lock:
+            self._grow(self._size + len(vectors))
+            for vec, item in zip(batch, vectors):
+                row = self._rows.get(item["id"])
+                if row is not None and not replace:
+                    continue
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[item["id"]] = row
+                    self._ids.append(item["id"])
+                    self._metadata.append({})
+                self._matrix[row] = vec
+                self._metadata[row] = dict(item.get("metadata") or {})
+            self._dirty = True
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove ids (swap-with-last keeps the matrix dense); returns how many existed"""
+        removed = 0
+        with self._lock:
+            for vid in ids:
+                row = self._rows.pop(vid, None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = self._ids[last]
+                    self._metadata[row] = self._metadata[last]
+                    self._rows[self._ids[row]] = row
+                self._ids.pop()
+                self._metadata.pop()
+                self._size -= 1
+                removed += 1
+            if removed:
+                self._dirty = True
+        return removed
+
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k cosine matches as [{"id", "score", "metadata"}], best first"""
+        q = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+        with self._lock:
+            n = self._size
+            if n == 0:
+                return []
+            sims = self._matrix[:n] @ q
+            ids = self._ids[:n]
+            metadata = self._metadata[:n]
+
+        if filters:
+            mask = np.fromiter((matches_filter(m, filters) for m in metadata), dtype=bool, count=n)
+            sims = np.where(mask, sims, -np.inf)
+            n = int(mask.sum())
+            if n == 0:
+                return []
+
+        k = min(max(1, top_k), n)
+        idx = np.argpartition(-sims, k - 1)[:k] if k < len(sims) else np.arange(len(sims))
+        idx = idx[np.argsort(-sims[idx])][:k]
+        return [{"id": ids[i], "score": float(sims[i]), "metadata": metadata[i]} for i in idx]
+
+    def save(self) -> bool:
+        """Write a snapshot to LOCAL_VECTOR_INDEX_DIR (atomic rename per file)"""
+        if not self.directory:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            matrix = self._matrix[:self._size].copy()
+            items = {"ids": list(self._ids), "metadata": list(self._metadata)}
+            self._dirty = False
+
+        matrix_path = os.path.join(self.directory, "vectors.npy")
+        items_path = os.path.join(self.directory, "items.json")
+        with open(matrix_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(items_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(items, f)
+        os.replace(matrix_path + ".tmp", matrix_path)
+        os.replace(items_path + ".tmp", items_path)
+        logger.info(f"💾 Local vector index saved: {len(items['ids'])} vectors")
+        return True
+
+    def save_if_dirty(self) -> bool:
+        return self._dirty and self.save()
+
+    def load(self) -> bool:
+        matrix_path = os.path.join(self.directory, "vectors.npy")
+        items_path = os.path.join(self.directory, "items.json")
+        if not (os.path.exists(matrix_path) and os.path.exists(items_path)):
+            return False
+        try:
+            matrix = np.load(matrix_path).astype(np.float32)
+            with open(items_path, encoding="utf-8") as f:
+                items = json.load(f)
+            if matrix.ndim != 2 or matrix.shape[1] != self.dim or matrix.shape[0] != len(items["ids"]):
+                raise ValueError(f"snapshot shape {matrix.shape} does not match {len(items['ids'])} ids")
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring local vector index snapshot: {e}")
+            return False
+
+        with self._lock:
+            self._matrix = matrix
+            self._ids = list(items["ids"])
+            self._metadata = list(items["metadata"])
+            self._rows = {vid: i for i, vid in enumerate(self._ids)}
+            self._size = len(self._ids)
+            self._dirty = False
+        logger.info(f"✅ Local vector index loaded: {self._size} vectors")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"total_vectors": self._size, "dimension": self.dim, "persisted": bool(self.directory)}
+
+
+def bootstrap_from_supabase(index: "LocalVectorIndex", page_size: int = 500) -> int:
+    """
+    Add every bug the index doesn't hold yet (run once at startup, off the
+    event loop); returns how many were added. Stored embeddings are reused and
+    the rest encoded. Ids already present, from the snapshot or written since
+    startup, are kept: they are at least as fresh as the row read here.
+    """
+    from app.core.config import supabase
+    from app.services.clusters_service import bug_text, parse_embedding
+    from app.services.embeddings import embedding_service
+
+    added, start = 0, 0
+    while True:
+        rows = supabase.table("bugs").select(
+            "id, title, description, severity, client_type, status, tags, created_at, embedding, embedding_384"
+        ).order("id").range(start, start + page_size - 1).execute().data or []
+        new = [r for r in rows if r["id"] not in index]
+        vectors = [parse_embedding(r.get("embedding")) for r in new]
+        vectors = [parse_embedding(r.get("embedding_384")) if v is None else v for r, v in zip(new, vectors)]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            for i, vec in zip(missing, embedding_service.encode([bug_text(new[i]) for i in missing])):
+                vectors[i] = vec
+        # Same metadata EndeeService.upsert_bug_vectors writes
+        index.upsert([
+            {
+                "id": r["id"],
+                "values": vec,
+                "metadata": {
+                    "title": r.get("title", ""),
+                    "severity": r.get("severity", "Low"),
+                    "status": r.get("status", "Open"),
+                    "tags": r.get("tags", []),
+                    "created_at": r.get("created_at", ""),
+                    "bug_id": r["id"],
+                },
+            }
+            for r, vec in zip(new, vectors)
+        ], replace=False)
+        added += len(new)
+        if len(rows) < page_size:
+            break
+        start += page_size
+
+    if added and index.directory:
+        index.save()
+    logger.info(f"✅ Local vector index bootstrapped: {added} bugs added, {len(index)} total")
+    return added
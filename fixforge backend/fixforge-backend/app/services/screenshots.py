@@ -0,0 +1,194 @@
+"""
+Screenshot ingest: bounded upload reads, content-hash dedupe, and a
+Gemini-ready JPEG made once at upload time.
+
+screenshot_store.ingest() reads an upload in SCREENSHOT_CHUNK_SIZE chunks,
+hashing as it goes, and gives up as soon as it passes SCREENSHOT_MAX_BYTES
+(the whole request is capped earlier by app/core/body_limit.py). The
+SHA-256 of the bytes identifies the screenshot: if the screenshots table
+already has it (the same image attached to several bugs, a retried submit)
+nothing is decoded or uploaded again. Otherwise the image is checked and
+downscaled to a JPEG of at most SCREENSHOT_AI_MAX_SIDE pixels on the CPU
+pool, and both files are stored side by side in the screenshots bucket:
+
+    {hash[:2]}/{hash}/original.{png,jpg,webp,gif}
+    {hash[:2]}/{hash}/ai.jpg
+
+bugs.screenshot_hash points at the row, and ai_image_base64() gives the
+suggestion endpoint the small JPEG (from an in-process LRU after the first
+use) instead of the full original.
+"""
+
+import io
+import os
+import base64
+import hashlib
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from postgrest.types import ReturnMethod
+
+from app.core.executors import run_cpu
+from app.db.session import db
+from app.utils.cache import LRUCache
+from app.utils.file_storage import open_storage
+
+SCREENSHOT_BUCKET = os.getenv("SCREENSHOT_BUCKET", "screenshots")
+SCREENSHOT_MAX_BYTES = int(os.getenv("SCREENSHOT_MAX_BYTES", str(10 * 1024 * 1024)))
+SCREENSHOT_CHUNK_SIZE = 256 * 1024
+# Long side of the JPEG sent to Gemini; larger images are tiled by the model anyway
+SCREENSHOT_AI_MAX_SIDE = int(os.getenv("SCREENSHOT_AI_MAX_SIDE", "1536"))
+SCREENSHOT_AI_QUALITY = int(os.getenv("SCREENSHOT_AI_QUALITY", "80"))
+SCREENSHOT_AI_CACHE_SIZE = int(os.getenv("SCREENSHOT_AI_CACHE_SIZE", "64"))
+# Refuse images that would decode to more than this many pixels (decompression bombs)
+SCREENSHOT_MAX_PIXELS = 50_000_000
+
+AI_CONTENT_TYPE = "image/jpeg"
+
+# Pillow format -> (content type, extension) of the stored original
+FORMATS = {
+    "PNG": ("image/png", "png"),
+    "JPEG": ("image/jpeg", "jpg"),
+    "WEBP": ("image/webp", "webp"),
+    "GIF": ("image/gif", "gif"),
+}
+
+
+class InvalidScreenshot(ValueError):
+    """The upload is too large or isn't a supported image"""
+
+
+async def read_upload(upload: UploadFile, max_bytes: int = SCREENSHOT_MAX_BYTES) -> Tuple[bytes, str]:
+    """(bytes, sha256 hex) of an upload, read in chunks; raises InvalidScreenshot past max_bytes"""
+    digest = hashlib.sha256()
+    data = bytearray()
+    while True:
+        chunk = await upload.read(SCREENSHOT_CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(data) + len(chunk) > max_bytes:
+            raise InvalidScreenshot(f"Screenshot must be smaller than {max_bytes // (1024 * 1024)}MB")
+        digest.update(chunk)
+        data += chunk
+    if not data:
+        raise InvalidScreenshot("Screenshot is empty")
+    return bytes(data), digest.hexdigest()
+
+
+def prepare_screenshot(data: bytes, max_side: int = SCREENSHOT_AI_MAX_SIDE,
+                       quality: int = SCREENSHOT_AI_QUALITY) -> Dict[str, Any]:
+    """
+    Check the image and render its AI JPEG. Runs in the CPU pool, so it must
+    stay picklable. Returns content_type, extension, width, height, ai_jpeg.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.format not in FORMATS:
+                raise InvalidScreenshot(f"Unsupported screenshot format: {img.format}")
+            if img.width * img.height > SCREENSHOT_MAX_PIXELS:
+                raise InvalidScreenshot(f"Screenshot is too large ({img.width}x{img.height})")
+            content_type, extension = FORMATS[img.format]
+            width, height = img.size
+            # Lets the JPEG decoder downscale by up to 8x while decoding
+            img.draft("RGB", (max_side, max_side))
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA", "PA", "P") or "transparency" in img.info:
+                # JPEG has no alpha; flatten onto white like a browser would show it
+                rgba = img.convert("RGBA")
+                img = Image.new("RGB", rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.getchannel("A"))
+            else:
+                img = img.convert("RGB")
+    except InvalidScreenshot:
+        raise
+    except Exception as e:
+        raise InvalidScreenshot("Screenshot is not an image format that can be read") from e
+
+    img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=quality, optimize=True)
+    return {
+        "content_type": content_type,
+        "extension": extension,
+        "width": width,
+        "height": height,
+        "ai_jpeg": out.getvalue(),
+    }
+
+
+def screenshot_paths(digest: str, extension: str) -> Tuple[str, str]:
+    base = f"{digest[:2]}/{digest}"
+    return f"{base}/original.{extension}", f"{base}/ai.jpg"
+
+
+class ScreenshotStore:
+    """Content-addressed screenshots in storage, indexed by the screenshots table"""
+
+    def __init__(self, bucket: str = SCREENSHOT_BUCKET, ai_cache_size: int = SCREENSHOT_AI_CACHE_SIZE):
+        self.storage = open_storage(bucket)
+        self._ai_images = LRUCache(maxsize=ai_cache_size)
+        self.ingested = 0
+        self.deduplicated = 0
+
+    async def find(self, digest: str) -> Optional[Dict[str, Any]]:
+        res = await db.table("screenshots").select("*").eq("content_hash", digest).limit(1).execute()
+        return res.data[0] if res.data else None
+
+    async def ingest(self, upload: UploadFile) -> Dict[str, Any]:
+        """The screenshots row for an upload, storing it first if it is new; raises InvalidScreenshot"""
+        data, digest = await read_upload(upload)
+        existing = await self.find(digest)
+        if existing:
+            self.deduplicated += 1
+            return existing
+
+        prepared = await run_cpu(prepare_screenshot, data)
+        original_path, ai_path = screenshot_paths(digest, prepared["extension"])
+        original_url, _ = await asyncio.gather(
+            self.storage.put(original_path, data, prepared["content_type"]),
+            self.storage.put(ai_path, prepared["ai_jpeg"], AI_CONTENT_TYPE),
+        )
+        row = {
+            "content_hash": digest,
+            "content_type": prepared["content_type"],
+            "size_bytes": len(data),
+            "width": prepared["width"],
+            "height": prepared["height"],
+            "original_path": original_path,
+            "original_url": original_url,
+            "ai_path": ai_path,
+            "ai_size_bytes": len(prepared["ai_jpeg"]),
+        }
+        # A concurrent upload of the same image may have won; its row is identical
+        await db.table("screenshots").upsert(
+            row, on_conflict="content_hash", ignore_duplicates=True, returning=ReturnMethod.minimal
+        ).execute()
+        self._ai_images.set(digest, base64.b64encode(prepared["ai_jpeg"]).decode("ascii"))
+        self.ingested += 1
+        return row
+
+    async def ai_image_base64(self, digest: str) -> Optional[str]:
+        """Base64 of the stored AI JPEG, or None if there is no such screenshot"""
+        cached = self._ai_images.get(digest)
+        if cached is not None:
+            return cached
+        row = await self.find(digest)
+        if not row:
+            return None
+        encoded = base64.b64encode(await self.storage.get(row["ai_path"])).decode("ascii")
+        self._ai_images.set(digest, encoded)
+        return encoded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ingested": self.ingested,
+            "deduplicated": self.deduplicated,
+            "ai_images": self._ai_images.stats(),
+        }
+
+
+# Singleton instance
+screenshot_store = ScreenshotStore()
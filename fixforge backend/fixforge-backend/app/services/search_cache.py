@@ -0,0 +1,80 @@
+"""
+Ranking cache for /search/semantic.
+
+Stores the ranked ids and scores per (normalized query, top_k, filters, mode)
+in a TTL'd LRU; the endpoint reads the bug rows and solution counts for them
+on every request, so votes, status and new solutions show up at once. Every
+write that can change a ranking (vector upsert/delete, bug status change)
+calls invalidate(), which bumps a version number that is part of every key,
+so entries computed before the write are never served after it, including
+ones still in flight. Concurrent misses for the same key share one
+computation (single flight) instead of each embedding and querying Endee.
+
+The cache, its version and invalidate() are per process: with several
+uvicorn workers, a write handled by one worker doesn't clear the others'
+entries, so their rankings can lag by up to SEARCH_CACHE_TTL.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.services.embedding_cache import normalize_text
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1000"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "60"))
+
+
+def search_key(query: str, *params: Hashable) -> Tuple[Hashable, ...]:
+    # The embedding model is uncased, so case-folding doesn't change results
+    return (normalize_text(query).casefold(), *params)
+
+
+class SearchCache:
+    """Versioned TTL+LRU cache with single-flight misses"""
+
+    def __init__(self, maxsize: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self.version = 0
+        self.coalesced = 0
+
+    def invalidate(self) -> None:
+        """Drop all cached responses (call after any write that affects search results)"""
+        self.version += 1
+        self._cache.clear()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        versioned = (self.version, key)
+        cached = self._cache.get(versioned)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(versioned)
+        if task is None:
+            # Run as its own task so a disconnecting first caller doesn't cancel it for the rest
+            task = asyncio.ensure_future(compute())
+            self._inflight[versioned] = task
+            task.add_done_callback(lambda t: self._finish(versioned, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, versioned: Tuple[int, Hashable], task: asyncio.Future) -> None:
+        self._inflight.pop(versioned, None)
+        # Errors are not cached; exception() also marks them retrieved
+        if not task.cancelled() and task.exception() is None:
+            # Stored under the version the computation started with: if a write
+            # happened meanwhile, this entry is unreachable and just ages out
+            self._cache.set(versioned, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "version": self.version, "coalesced": self.coalesced}
+
+
+# Singleton instance
+search_cache = SearchCache()
@@ -0,0 +1,265 @@
+"""
+Write-behind buffer for bug upvotes and solution upvote toggles.
+
+A burst of votes on one hot bug or solution used to be one Supabase write
+per click. The buffer instead records them in memory and flushes them every
+VOTE_FLUSH_INTERVAL seconds, or sooner once VOTE_FLUSH_SIZE entities are
+pending, as two batched RPCs:
+  - bug upvotes are coalesced into one delta per bug (apply_bug_votes).
+    Deltas are not idempotent, so each batch carries an id the database
+    records with the update and skips if it sees again.
+  - solution toggles are coalesced into the final upvote state per
+    (solution, user) (apply_solution_upvotes). Applying a state is idempotent,
+    so a toggle-untoggle pair costs nothing and a retried flush can't double count.
+
+Read-your-writes: the vote endpoints answer from the cached row plus the
+pending deltas, and a user's pending toggle wins over the votes table, so
+the voter sees their own vote at once. Other readers see it after the next
+flush, which invalidates the affected entity cache rows.
+
+Durability: close() (app shutdown) flushes whatever is pending. A failed
+flush is retried on the next interval: solution states are merged back into
+the pending ones, while the bug batch is resent unchanged under its id
+(new bug votes wait for the next batch), so a flush that committed before
+its response was lost isn't counted twice. A bug batch that still fails
+after VOTE_BATCH_MAX_RETRIES retries is logged and dropped, so one batch
+the database keeps rejecting can't hold back every later bug vote; a
+failure on one RPC doesn't hold back the other's result. A hard crash loses
+at most one interval of votes. Set VOTE_BUFFER_ENABLED=false to write every
+vote through immediately (app.services.counters).
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from app.db.session import db
+from app.services.counters import counters
+from app.services.entity_cache import bug_cache, solution_cache
+
+logger = logging.getLogger(__name__)
+
+VOTE_BUFFER_ENABLED = os.getenv("VOTE_BUFFER_ENABLED", "true").lower() in ("1", "true", "yes")
+VOTE_FLUSH_INTERVAL = float(os.getenv("VOTE_FLUSH_INTERVAL", "1.0"))
+VOTE_FLUSH_SIZE = int(os.getenv("VOTE_FLUSH_SIZE", "500"))
+VOTE_BATCH_MAX_RETRIES = int(os.getenv("VOTE_BATCH_MAX_RETRIES", "5"))
+
+SolutionVote = Tuple[str, str]  # (solution_id, user_id)
+
+
+class VoteBuffer:
+    """Coalesces vote writes per entity and flushes them in batches"""
+
+    def __init__(
+        self,
+        interval: float = VOTE_FLUSH_INTERVAL,
+        max_pending: int = VOTE_FLUSH_SIZE,
+        max_retries: int = VOTE_BATCH_MAX_RETRIES,
+    ):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._bug_deltas: Dict[str, int] = {}
+        self._upvotes: Dict[SolutionVote, bool] = {}
+        self._solution_deltas: Dict[str, int] = {}
+        # What the flush in progress is writing; still counted by readers until it lands
+        self._flushing_bug_deltas: Dict[str, int] = {}
+        self._flushing_upvotes: Dict[SolutionVote, bool] = {}
+        self._flushing_solution_deltas: Dict[str, int] = {}
+        # Id of the bug batch in _flushing_bug_deltas; kept until the batch is written
+        self._bug_batch_id: Optional[str] = None
+        self._bug_batch_failures = 0
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._size_flush: Optional[asyncio.Task] = None
+        self.votes = 0
+        self.flushes = 0
+        self.writes = 0
+        self.failed_flushes = 0
+        self.dropped_votes = 0
+        self.last_flush_ms = 0.0
+
+    # --- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and write out everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self.pending():
+            logger.error(f"❌ Vote buffer closed with {self.pending()} unflushed entities")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # Shielded: stopping the loop must not abandon a flush halfway
+            await asyncio.shield(self.flush())
+
+    def pending(self) -> int:
+        # A bug batch is only cleared once written, so a failed one still counts
+        return len(self._bug_deltas) + len(self._flushing_bug_deltas) + len(self._upvotes)
+
+    def _maybe_flush(self) -> None:
+        if self.pending() >= self.max_pending and (self._size_flush is None or self._size_flush.done()):
+            self._size_flush = asyncio.ensure_future(self.flush())
+
+    # --- bugs ------------------------------------------------------------
+
+    def pending_bug_votes(self, bug_id: str) -> int:
+        return self._bug_deltas.get(bug_id, 0) + self._flushing_bug_deltas.get(bug_id, 0)
+
+    async def upvote_bug(self, bug_id: str) -> Optional[int]:
+        """Buffer one upvote; returns the vote count including pending votes, or None if no such bug"""
+        bug = await bug_cache.get(bug_id)
+        if bug is None:
+            return None
+        self._bug_deltas[bug_id] = self._bug_deltas.get(bug_id, 0) + 1
+        self.votes += 1
+        self._maybe_flush()
+        return max(0, (bug.get("votes") or 0) + self.pending_bug_votes(bug_id))
+
+    # --- solutions -------------------------------------------------------
+
+    def pending_upvote(self, solution_id: str, user_id: str) -> Optional[bool]:
+        """The user's buffered upvote state for a solution, if any"""
+        key = (solution_id, user_id)
+        state = self._upvotes.get(key)
+        return self._flushing_upvotes.get(key) if state is None else state
+
+    def pending_solution_votes(self, solution_id: str) -> int:
+        return self._solution_deltas.get(solution_id, 0) + self._flushing_solution_deltas.get(solution_id, 0)
+
+    async def toggle_solution_upvote(self, solution_id: str, user_id: str) -> Optional[Tuple[bool, int]]:
+        """Buffer a toggle; returns (has_upvoted, votes) as the user will see them, or None if no such solution"""
+        solution = await solution_cache.get(solution_id)
+        if solution is None:
+            return None
+
+        current = self.pending_upvote(solution_id, user_id)
+        if current is None:
+            res = await db.table("votes").select("id").eq("solution_id", solution_id)\
+                .eq("user_id", user_id).eq("vote_type", "upvote").limit(1).execute()
+            # Another toggle by this user may have been buffered while we waited
+            current = self.pending_upvote(solution_id, user_id)
+            if current is None:
+                current = bool(res.data)
+
+        upvoted = not current
+        self._upvotes[(solution_id, user_id)] = upvoted
+        self._solution_deltas[solution_id] = self._solution_deltas.get(solution_id, 0) + (1 if upvoted else -1)
+        self.votes += 1
+        self._maybe_flush()
+        return upvoted, max(0, (solution.get("votes") or 0) + self.pending_solution_votes(solution_id))
+
+    # --- flushing --------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Write everything pending in (at most) two statements; returns rows changed"""
+        async with self._flush_lock:
+            if not self.pending():
+                return 0
+            # A bug batch that failed is resent as it was, not merged with newer votes:
+            # if it did commit, the database recognises its id and skips it
+            if not self._flushing_bug_deltas:
+                self._flushing_bug_deltas, self._bug_deltas = self._bug_deltas, {}
+                self._bug_batch_id = uuid.uuid4().hex
+            self._flushing_upvotes, self._upvotes = self._upvotes, {}
+            self._flushing_solution_deltas, self._solution_deltas = self._solution_deltas, {}
+
+            bug_deltas = self._flushing_bug_deltas
+            upvotes = self._flushing_upvotes
+            start = time.perf_counter()
+            bug_result, upvote_result = await asyncio.gather(
+                counters.apply_bug_votes(bug_deltas, self._bug_batch_id),
+                counters.apply_solution_upvotes(
+                    [key for key, up in upvotes.items() if up],
+                    [key for key, up in upvotes.items() if not up],
+                ),
+                return_exceptions=True,
+            )
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+            changed = 0
+            failed = False
+            # Clear each in-flight overlay and its stale rows in the same step,
+            # so readers switch from "cached + pending" to the new row at once
+            if isinstance(bug_result, BaseException):
+                failed = True
+                self._bug_batch_failed(bug_result)
+            else:
+                changed += bug_result
+                self.writes += bool(bug_deltas)
+                bug_cache.invalidate(*bug_deltas)
+                self._clear_bug_batch()
+
+            if isinstance(upvote_result, BaseException):
+                failed = True
+                logger.warning(f"⚠️ Solution vote flush failed, retrying next interval: {upvote_result}")
+                self._merge_back()
+            else:
+                changed += upvote_result
+                self.writes += bool(upvotes)
+                solution_cache.invalidate(*{solution_id for solution_id, _ in upvotes})
+                self._flushing_upvotes, self._flushing_solution_deltas = {}, {}
+
+            if failed:
+                self.failed_flushes += 1
+                return 0
+            self.flushes += 1
+            return changed
+
+    def _bug_batch_failed(self, error: BaseException) -> None:
+        self._bug_batch_failures += 1
+        if self._bug_batch_failures <= self.max_retries:
+            logger.warning(f"⚠️ Bug vote flush failed, retrying next interval: {error}")
+            return
+        # Most likely rejected for its data (say, a bug deleted meanwhile), so
+        # resending it unchanged would fail forever with every later batch behind it
+        votes = sum(self._flushing_bug_deltas.values())
+        self.dropped_votes += votes
+        logger.error(
+            f"❌ Dropping bug vote batch {self._bug_batch_id} ({votes} votes on "
+            f"{len(self._flushing_bug_deltas)} bugs) after {self._bug_batch_failures} failed flushes: {error}"
+        )
+        self._clear_bug_batch()
+
+    def _clear_bug_batch(self) -> None:
+        self._flushing_bug_deltas = {}
+        self._bug_batch_id = None
+        self._bug_batch_failures = 0
+
+    def _merge_back(self) -> None:
+        for key, state in self._flushing_upvotes.items():
+            self._upvotes.setdefault(key, state)  # a newer toggle wins
+        for solution_id, delta in self._flushing_solution_deltas.items():
+            self._solution_deltas[solution_id] = self._solution_deltas.get(solution_id, 0) + delta
+        self._flushing_upvotes, self._flushing_solution_deltas = {}, {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": VOTE_BUFFER_ENABLED,
+            "pending": self.pending(),
+            "votes": self.votes,
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "failed_flushes": self.failed_flushes,
+            "dropped_votes": self.dropped_votes,
+            "votes_per_write": round(self.votes / self.writes, 2) if self.writes else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+# Singleton instance
+vote_buffer = VoteBuffer()
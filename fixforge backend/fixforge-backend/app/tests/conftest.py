@@ -0,0 +1,7 @@
+import os
+
+# app.core.config refuses to import without Supabase settings; the tests
+# fake every backend they touch, so placeholders are enough.
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+os.environ.setdefault("ENDEE_URL", "http://127.0.0.1:1")
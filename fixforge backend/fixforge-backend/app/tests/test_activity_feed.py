@@ -0,0 +1,109 @@
+import asyncio
+
+from postgrest.exceptions import APIError
+
+from app.db.session import db
+from app.services.activity_feed import ActivityWriter, activity, avatar_set, bug_reported
+
+
+def event(i, user_id="user-1", **metadata):
+    return activity(user_id, "milestone", f"Event {i}", "", "Milestone", 1, f"event-{i}",
+                    f"2026-10-17T00:00:{i:02d}+00:00", metadata)
+
+
+class FakeActivities:
+    """activities.upsert(...).execute(); rejects any batch holding an oversized row"""
+
+    def __init__(self, down=False):
+        self.rows = {}
+        self.batches = []
+        self.down = down
+
+    def table(self, name):
+        assert name == "activities"
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.batch = rows
+        return self
+
+    async def execute(self):
+        self.batches.append([row["event_key"] for row in self.batch])
+        if self.down:
+            raise ConnectionError("database unreachable")
+        if any(row["metadata"].get("blob") for row in self.batch):
+            raise APIError({"message": "value too long", "code": "22001"})
+        for row in self.batch:
+            self.rows.setdefault(row["event_key"], row)
+        return None
+
+
+def test_record_dedupes_and_caps_the_backlog():
+    writer = ActivityWriter(max_pending=3)
+    writer.record(avatar_set("user-1"), avatar_set("user-1"))
+    writer.record(bug_reported({"id": "FF-1", "user_id": None, "title": "No author"}))
+    assert list(writer._pending) == ["user-1-avatar"]
+
+    writer.record(*[event(i) for i in range(4)])
+    # Oldest first out once the backlog is full
+    assert list(writer._pending) == ["event-1", "event-2", "event-3"]
+    assert writer.dropped == 2
+
+
+def test_pending_for_includes_the_batch_being_written(monkeypatch):
+    activities = FakeActivities()
+    monkeypatch.setattr(db, "table", activities.table)
+    writer = ActivityWriter()
+    writer.record(event(1), event(2, user_id="user-2"), event(3))
+    seen = []
+
+    async def slow_execute():
+        seen.append([e["event_key"] for e in writer.pending_for("user-1")])
+        return await FakeActivities.execute(activities)
+
+    monkeypatch.setattr(activities, "execute", slow_execute)
+    assert [e["event_key"] for e in writer.pending_for("user-1")] == ["event-3", "event-1"]
+    assert asyncio.run(writer.flush()) == 3
+    assert seen == [["event-3", "event-1"]]
+    assert writer.pending_for("user-1") == []
+
+
+def test_flush_writes_in_batches_and_retries_failures(monkeypatch):
+    activities = FakeActivities(down=True)
+    monkeypatch.setattr(db, "table", activities.table)
+    writer = ActivityWriter(batch_size=2)
+    writer.record(*[event(i) for i in range(3)])
+
+    async def scenario():
+        assert await writer.flush() == 0
+        writer.record(event(3))
+        activities.down = False
+        return [await writer.flush() for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [2, 2, 0]
+    # The failed batch went back ahead of the newer event
+    assert activities.batches == [["event-0", "event-1"], ["event-0", "event-1"], ["event-2", "event-3"]]
+    assert set(activities.rows) == {f"event-{i}" for i in range(4)}
+    assert writer.failed_flushes == 1 and writer.written == 4
+
+
+def test_rejected_row_is_split_out_and_dropped(monkeypatch):
+    activities = FakeActivities()
+    monkeypatch.setattr(db, "table", activities.table)
+    writer = ActivityWriter(batch_size=4, max_retries=2)
+    writer.record(event(0), event(1), event(2, blob="x" * 10_000), event(3), event(4))
+
+    async def scenario():
+        for _ in range(10):
+            await writer.flush()
+            if not writer._pending:
+                break
+
+    asyncio.run(scenario())
+    sizes = [len(batch) for batch in activities.batches]
+    # Halves once the oldest event has failed twice; the bad row fails alone and
+    # is dropped, and the queue moves on
+    assert sizes == [4, 4, 2, 2, 1, 1, 1]
+    assert activities.batches[4] == ["event-2"]
+    assert set(activities.rows) == {"event-0", "event-1", "event-3", "event-4"}
+    assert writer.dropped == 1 and writer._failures == {}
@@ -0,0 +1,262 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import aisuggested
+from app.db.session import db
+from app.services import ai_suggestions
+from app.services.ai_suggestions import AISuggestionCache, suggestion_key
+from app.services.embedding_batcher import embedding_batcher
+from app.services.endee_client import endee_service
+
+
+class FakeSuggestions:
+    """The ai_suggestions table, keyed by prompt_hash"""
+
+    def __init__(self):
+        self.rows = {}
+        self.fail_writes = False
+
+    def table(self, name):
+        assert name == "ai_suggestions"
+        return FakeQuery(self)
+
+
+class FakeQuery:
+    def __init__(self, store):
+        self.store = store
+        self.action = "select"
+        self.row = None
+        self.filters = []
+
+    def select(self, columns):
+        return self
+
+    def upsert(self, row, on_conflict, returning):
+        assert on_conflict == "prompt_hash"
+        self.action, self.row = "upsert", row
+        return self
+
+    def delete(self, returning):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row[column] != value)
+        return self
+
+    def limit(self, n):
+        return self
+
+    async def execute(self):
+        rows = self.store.rows
+        if self.action != "select" and self.store.fail_writes:
+            raise ConnectionError("database unavailable")
+        if self.action == "upsert":
+            rows[self.row["prompt_hash"]] = dict(self.row)
+            return SimpleNamespace(data=[])
+        matched = [key for key, row in rows.items() if all(f(row) for f in self.filters)]
+        if self.action == "delete":
+            for key in matched:
+                del rows[key]
+            return SimpleNamespace(data=[])
+        return SimpleNamespace(data=[dict(rows[key]) for key in matched[:1]])
+
+
+@pytest.fixture
+def table(monkeypatch):
+    store = FakeSuggestions()
+    monkeypatch.setattr(db, "table", store.table)
+    return store
+
+
+def generator(answers=("Fix it", "primary")):
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return answers
+
+    return generate, calls
+
+
+def iso(delta_seconds):
+    return (datetime.now(timezone.utc) + timedelta(seconds=delta_seconds)).isoformat()
+
+
+def test_key_covers_prompt_screenshot_and_model():
+    key = suggestion_key("prompt", "shot-hash", "pro")
+    assert key == suggestion_key("prompt", "shot-hash", "pro")
+    assert len({key, suggestion_key("prompt!", "shot-hash", "pro"), suggestion_key("prompt", None, "pro"),
+                suggestion_key("prompt", "other-shot", "pro"), suggestion_key("prompt", "shot-hash", "flash")}) == 5
+    # Parts are delimited, so moving text between them changes the key
+    assert suggestion_key("bprompt", "a", "m") != suggestion_key("prompt", "ab", "m")
+
+
+def test_stored_suggestion_is_reused_until_refresh(table):
+    cache = AISuggestionCache(ttl=60)
+    generate, calls = generator()
+
+    async def scenario():
+        first = await cache.get_or_generate("FF-1", "k1", generate)
+        again = await cache.get_or_generate("FF-1", "k1", generate)
+        refreshed = await cache.get_or_generate("FF-1", "k1", generate, refresh=True)
+        return first, again, refreshed
+
+    (first, first_cached), (again, again_cached), (_, refresh_cached) = asyncio.run(scenario())
+    assert (first_cached, again_cached, refresh_cached) == (False, True, False)
+    assert again == first and first["suggestion"] == "Fix it" and first["model_used"] == "primary"
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["refreshes"] == 1
+
+
+def test_new_key_replaces_the_bugs_older_rows(table):
+    cache = AISuggestionCache(ttl=60)
+    generate, calls = generator()
+    table.rows["other"] = {"prompt_hash": "other", "bug_id": "FF-2", "created_at": iso(0), "expires_at": iso(60)}
+
+    async def scenario():
+        await cache.get_or_generate("FF-1", "before-edit", generate)
+        await cache.get_or_generate("FF-1", "after-edit", generate)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    # Only the current prompt's row is kept for FF-1; other bugs are untouched
+    assert sorted(table.rows) == ["after-edit", "other"]
+
+
+def test_expired_rows_are_regenerated(table):
+    cache = AISuggestionCache(ttl=60)
+    table.rows["expired"] = {"prompt_hash": "expired", "bug_id": "FF-1", "suggestion": "old",
+                             "created_at": iso(-10), "expires_at": iso(-1)}
+    # Rows from before expires_at existed age out after the cache's ttl
+    table.rows["legacy-old"] = {"prompt_hash": "legacy-old", "bug_id": "FF-2", "suggestion": "old",
+                                "created_at": iso(-61), "expires_at": None}
+    table.rows["legacy-new"] = {"prompt_hash": "legacy-new", "bug_id": "FF-3", "suggestion": "kept",
+                                "created_at": iso(-30).replace("+00:00", "Z"), "expires_at": None}
+
+    async def scenario():
+        return [await cache.get(key) for key in ("expired", "legacy-old", "legacy-new", "missing")]
+
+    expired, legacy_old, legacy_new, missing = asyncio.run(scenario())
+    assert expired is None and legacy_old is None and missing is None
+    assert legacy_new["suggestion"] == "kept"
+
+
+def test_ttl_sets_expiry_per_row(table):
+    cache = AISuggestionCache(ttl=3600)
+    generate, _ = generator(("Fix it", "fallback"))
+    row, _ = asyncio.run(cache.get_or_generate(
+        "FF-1", "k1", generate, ttl=lambda row: 60 if row["model_used"] == "fallback" else 3600))
+
+    lifetime = datetime.fromisoformat(row["expires_at"]) - datetime.fromisoformat(row["created_at"])
+    assert lifetime == timedelta(seconds=60)
+    assert table.rows["k1"]["expires_at"] == row["expires_at"]
+
+
+def test_concurrent_requests_share_one_generation(table):
+    cache = AISuggestionCache()
+    generate, calls = generator()
+
+    async def scenario():
+        return await asyncio.gather(*[cache.get_or_generate("FF-1", "k1", generate) for _ in range(5)])
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(row is results[0][0] and not cached for row, cached in results)
+    assert cache.stats()["shared_generations"] == 4 and cache.stats()["in_flight"] == 0
+
+
+def test_uncacheable_or_unstored_suggestions_are_still_returned(table):
+    cache = AISuggestionCache()
+    generate, _ = generator((aisuggested.NO_CANDIDATES, "primary"))
+    row, _ = asyncio.run(cache.get_or_generate(
+        "FF-1", "k1", generate, cacheable=lambda suggestion: suggestion != aisuggested.NO_CANDIDATES))
+    assert row["suggestion"] == aisuggested.NO_CANDIDATES and table.rows == {}
+
+    table.fail_writes = True
+    generate, _ = generator()
+    row, cached = asyncio.run(cache.get_or_generate("FF-1", "k2", generate))
+    assert row["suggestion"] == "Fix it" and not cached and table.rows == {}
+
+
+class FakeGemini:
+    def __init__(self):
+        self.calls = []
+        self.down = set()
+
+    def __call__(self, prompt, model):
+        self.calls.append((prompt, model))
+        if model in self.down:
+            raise HTTPException(status_code=503, detail=f"{model} overloaded or unresponsive.")
+        return f"Fix from {model}"
+
+
+@pytest.fixture
+def endpoint(table, monkeypatch):
+    bug = {"id": "FF-1", "title": "Crash on save", "description": "Stack trace", "severity": "High"}
+    gemini = FakeGemini()
+
+    async def get_bug_context(bug_id):
+        return dict(bug) if bug_id == bug["id"] else None
+
+    async def embed(text):
+        return [0.0] * 384
+
+    async def no_similar_bugs(**kwargs):
+        return []
+
+    monkeypatch.setattr(aisuggested, "get_bug_context", get_bug_context)
+    monkeypatch.setattr(aisuggested, "call_gemini", gemini)
+    monkeypatch.setattr(aisuggested, "ai_suggestion_cache", AISuggestionCache())
+    monkeypatch.setattr(embedding_batcher, "embed_async", embed)
+    monkeypatch.setattr(endee_service, "search_similar_bugs", no_similar_bugs)
+    return SimpleNamespace(client=TestClient(app), bug=bug, gemini=gemini, table=table)
+
+
+def test_endpoint_caches_until_the_bug_changes(endpoint):
+    client = endpoint.client
+    first = client.get("/aisuggested/FF-1").json()
+    assert first["cached"] is False and first["suggestion"] == f"Fix from {aisuggested.PRIMARY_MODEL}"
+    assert client.get("/aisuggested/FF-1").json()["cached"] is True
+    assert len(endpoint.gemini.calls) == 1
+
+    assert client.get("/aisuggested/FF-1", params={"refresh": "true"}).json()["cached"] is False
+    assert len(endpoint.gemini.calls) == 2
+
+    # An edited bug builds a different prompt, so the old suggestion isn't served for it
+    endpoint.bug["description"] = "Stack trace, now with the code that throws"
+    edited = client.get("/aisuggested/FF-1").json()
+    assert edited["cached"] is False and len(endpoint.gemini.calls) == 3
+    assert "now with the code" in endpoint.gemini.calls[-1][0]
+    assert len(endpoint.table.rows) == 1
+    assert client.get("/aisuggested/FF-404").status_code == 404
+
+
+def test_fallback_answers_expire_sooner(endpoint):
+    endpoint.gemini.down.add(aisuggested.PRIMARY_MODEL)
+    res = endpoint.client.get("/aisuggested/FF-1").json()
+
+    assert res["model_used"] == aisuggested.FALLBACK_MODEL
+    row = next(iter(endpoint.table.rows.values()))
+    lifetime = datetime.fromisoformat(row["expires_at"]) - datetime.fromisoformat(row["created_at"])
+    assert lifetime == timedelta(seconds=ai_suggestions.AI_SUGGESTION_FALLBACK_TTL)
+
+    # Stored under the primary model's key, so once the fallback row expires the primary is asked again
+    row["expires_at"] = iso(-1)
+    endpoint.gemini.down.clear()
+    again = endpoint.client.get("/aisuggested/FF-1").json()
+    assert again["cached"] is False and again["model_used"] == aisuggested.PRIMARY_MODEL
+    row = next(iter(endpoint.table.rows.values()))
+    lifetime = datetime.fromisoformat(row["expires_at"]) - datetime.fromisoformat(row["created_at"])
+    assert lifetime == timedelta(seconds=ai_suggestions.AI_SUGGESTION_TTL)
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app import dependencies
+from app.db.session import db
+from app.services.api_keys import ApiKeyCache, display_prefix, generate_api_key, hash_api_key
+
+
+class FakeKeys:
+    """api_keys rows keyed by key_hash; records each lookup's filters"""
+
+    def __init__(self, rows=()):
+        self.rows = {row["key_hash"]: row for row in rows}
+        self.lookups = []
+        self.delay = 0.0
+
+    def from_(self, name):
+        assert name == "api_keys"
+        return FakeQuery(self)
+
+
+class FakeQuery:
+    def __init__(self, store):
+        self.store = store
+        self.filters = {}
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def limit(self, n):
+        return self
+
+    async def execute(self):
+        self.store.lookups.append(dict(self.filters))
+        row = self.store.rows.get(self.filters["key_hash"])
+        await asyncio.sleep(self.store.delay)
+        active = row is not None and row["is_active"] == self.filters["is_active"]
+        return SimpleNamespace(data=[{"user_id": row["user_id"]}] if active else [])
+
+
+def key_row(api_key, user_id, is_active=True):
+    return {"key_hash": hash_api_key(api_key), "user_id": user_id, "is_active": is_active}
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    store = FakeKeys()
+    monkeypatch.setattr(db, "from_", store.from_)
+    return store
+
+
+def test_keys_are_stored_as_digests():
+    key = generate_api_key()
+    assert key.startswith("fx_") and len(key) > 30 and key != generate_api_key()
+    assert hash_api_key(key) == hashlib.sha256(key.encode()).hexdigest()
+    assert display_prefix(key) == key[:7]
+
+
+def test_lookup_queries_by_hash_once(keys):
+    keys.rows = {r["key_hash"]: r for r in [key_row("fx_alice", 42), key_row("fx_old", 7, is_active=False)]}
+    keys.delay = 0.01
+    cache = ApiKeyCache(ttl=60)
+
+    async def scenario():
+        concurrent = await asyncio.gather(*[cache.lookup("fx_alice") for _ in range(10)])
+        return concurrent, await cache.lookup("fx_alice"), await cache.lookup("fx_old")
+
+    concurrent, again, inactive = asyncio.run(scenario())
+    assert concurrent == ["42"] * 10 and again == "42"
+    assert inactive is None
+    # The plaintext key never reaches the database, and concurrent first lookups share one query
+    assert keys.lookups == [
+        {"key_hash": hash_api_key("fx_alice"), "is_active": True},
+        {"key_hash": hash_api_key("fx_old"), "is_active": True},
+    ]
+
+
+def test_unknown_keys_are_cached_for_the_negative_ttl(keys, monkeypatch):
+    cache = ApiKeyCache(ttl=60, negative_ttl=30)
+    now = [1000.0]
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now[0])
+
+    async def lookups(n):
+        return [await cache.lookup("fx_guess") for _ in range(n)]
+
+    assert asyncio.run(lookups(5)) == [None] * 5
+    assert len(keys.lookups) == 1 and cache.stats()["negative_hits"] == 4
+
+    # Once the negative entry expires, a key created since is found
+    keys.rows[hash_api_key("fx_guess")] = key_row("fx_guess", 9)
+    now[0] += 31
+    assert asyncio.run(lookups(1)) == ["9"]
+    assert len(keys.lookups) == 2
+
+
+def test_invalidate_user_drops_only_that_users_keys(keys):
+    keys.rows = {r["key_hash"]: r for r in [key_row("fx_a1", 1), key_row("fx_a2", 1), key_row("fx_b", 2)]}
+    cache = ApiKeyCache(ttl=60)
+
+    async def lookup_all():
+        return [await cache.lookup(k) for k in ("fx_a1", "fx_a2", "fx_b")]
+
+    assert asyncio.run(lookup_all()) == ["1", "1", "2"]
+    del keys.rows[hash_api_key("fx_a1")], keys.rows[hash_api_key("fx_a2")]
+    cache.invalidate_user(1)
+
+    assert asyncio.run(lookup_all()) == [None, None, "2"]
+    # Only the revoked user's keys were looked up again
+    assert len(keys.lookups) == 5 and cache.stats()["invalidations"] == 1
+
+
+def test_lookup_in_flight_during_revocation_is_not_cached(keys):
+    keys.rows = {r["key_hash"]: r for r in [key_row("fx_a", 1)]}
+    keys.delay = 0.05
+    cache = ApiKeyCache(ttl=60)
+
+    async def scenario():
+        stale = asyncio.ensure_future(cache.lookup("fx_a"))
+        await asyncio.sleep(0.01)  # the query has read the key
+        del keys.rows[hash_api_key("fx_a")]
+        cache.invalidate_user("1")
+        return await stale, await cache.lookup("fx_a")
+
+    # The caller already waiting gets the old answer, but it isn't kept
+    assert asyncio.run(scenario()) == ("1", None)
+
+
+def test_dependency_rejects_invalid_keys(keys, monkeypatch):
+    keys.rows = {r["key_hash"]: r for r in [key_row("fx_ok", 5)]}
+    monkeypatch.setattr(dependencies, "api_key_cache", ApiKeyCache())
+
+    assert asyncio.run(dependencies.get_user_from_api_key(None)) is None
+    assert asyncio.run(dependencies.get_user_from_api_key("fx_ok")) == "5"
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(dependencies.get_user_from_api_key("fx_bad"))
+    assert exc.value.status_code == 401
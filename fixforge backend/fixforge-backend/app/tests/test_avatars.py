@@ -0,0 +1,115 @@
+import io
+import asyncio
+import base64
+
+import pytest
+from PIL import Image
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import avatars
+from app.services.avatars import (
+    InvalidImage,
+    avatar_hash,
+    data_url_bytes,
+    delete_avatar,
+    render_thumbnails,
+    store_avatar,
+    thumbnail_urls,
+)
+from app.utils.file_storage import LocalFileStorage
+
+
+def image_bytes(size=(600, 300), mode="RGB", fmt="PNG"):
+    """A wide image: red left and right thirds, blue in the middle"""
+    img = Image.new(mode, size, (255, 0, 0, 255) if mode == "RGBA" else (255, 0, 0))
+    middle = Image.new(mode, (size[0] // 3, size[1]), (0, 0, 255, 128) if mode == "RGBA" else (0, 0, 255))
+    img.paste(middle, (size[0] // 3, 0))
+    out = io.BytesIO()
+    img.save(out, fmt)
+    return out.getvalue()
+
+
+def decode(data):
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    store = LocalFileStorage(str(tmp_path), "http://files.test/media")
+    monkeypatch.setattr(avatars, "file_storage", store)
+    return store
+
+
+def test_thumbnails_are_square_center_crops():
+    thumbnails = render_thumbnails(image_bytes(fmt="JPEG"), sizes=(64, 256, 128))
+
+    assert list(thumbnails) == [256, 128, 64]
+    for size, data in thumbnails.items():
+        img = decode(data)
+        assert img.format == "WEBP" and img.size == (size, size) and img.mode == "RGB"
+        # The crop keeps the middle of the wide image: blue centre, red edges
+        r, g, b = img.getpixel((size // 2, size // 2))
+        assert b > 200 and r < 60
+        assert img.getpixel((0, size // 2))[0] > 200
+
+
+def test_transparency_is_kept():
+    img = decode(render_thumbnails(image_bytes(mode="RGBA"), sizes=(64,))[64])
+    assert img.mode == "RGBA"
+    assert 100 < img.getpixel((32, 32))[3] < 160
+
+
+def test_unreadable_and_oversized_images_are_rejected(monkeypatch):
+    with pytest.raises(InvalidImage, match="not an image"):
+        render_thumbnails(b"GIF89a but not really", sizes=(64,))
+    monkeypatch.setattr(avatars, "AVATAR_MAX_PIXELS", 100 * 100)
+    with pytest.raises(InvalidImage, match=r"too large \(600x300\)"):
+        render_thumbnails(image_bytes(), sizes=(64,))
+
+
+def test_data_urls():
+    data = image_bytes()
+    assert data_url_bytes("data:image/png;base64," + base64.b64encode(data).decode()) == data
+    for bad in ("data:text/plain;base64,aGk=", "data:image/png,raw", "data:image/png;base64,***"):
+        with pytest.raises(InvalidImage):
+            data_url_bytes(bad)
+
+
+def test_store_and_delete(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_SIZES", (64, 128))
+    data = image_bytes()
+    stored = asyncio.run(store_avatar("user-1", data))
+    digest = avatar_hash(data)
+
+    base = f"http://files.test/media/avatars/user-1/{digest}"
+    assert stored == {
+        "avatar": f"{base}/128.webp",
+        "avatar_hash": digest,
+        "thumbnails": {"64": f"{base}/64.webp", "128": f"{base}/128.webp"},
+    }
+    assert decode((tmp_path / "avatars" / "user-1" / digest / "64.webp").read_bytes()).size == (64, 64)
+    # Other sizes are derived from the stored URL; preset avatars have none
+    assert thumbnail_urls({"avatar": stored["avatar"], "avatar_hash": digest}) == stored["thumbnails"]
+    assert thumbnail_urls({"avatar": "avatar-3", "avatar_hash": None}) is None
+    assert thumbnail_urls({"avatar": "https://elsewhere.test/me.png", "avatar_hash": digest}) is None
+
+    asyncio.run(delete_avatar("user-1", digest))
+    assert not (tmp_path / "avatars").exists()
+
+
+def test_store_refuses_large_uploads(storage, monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_MAX_BYTES", 1024)
+    with pytest.raises(InvalidImage, match="smaller than"):
+        asyncio.run(store_avatar("user-1", image_bytes(size=(2000, 2000), fmt="BMP")))
+
+
+def test_upload_endpoint_rejects_non_images(storage):
+    client = TestClient(app)
+    wrong_type = client.post("/users/user-1/upload/avatar", files={"file": ("me.txt", b"hello", "text/plain")})
+    assert wrong_type.status_code == 400 and wrong_type.json()["detail"] == "File must be an image"
+    # Decoding fails before anything is stored or the user row is touched
+    res = client.post("/users/user-1/upload/avatar", files={"file": ("me.png", b"not a picture", "image/png")})
+    assert res.status_code == 400 and res.json()["detail"] == "File is not an image format that can be read"
@@ -0,0 +1,152 @@
+import re
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import bugs as bugs_api
+from app.core import body_limit
+from app.db.session import db
+
+BUGS = [
+    {"id": f"FF-{i:04d}", "title": f"Bug {i}", "user_id": "user-1" if i % 2 else "user-2",
+     "created_at": f"2026-10-{1 + i:02d}T00:00:00+00:00"}
+    for i in range(7)
+]
+KEYSET = re.compile(r'created_at\.lt\."([^"]+)",and\(created_at\.eq\."[^"]+",id\.lt\."([^"]+)"\)')
+
+
+class FakeTable:
+    """The bits of the PostgREST builder list_bugs uses, over an in-memory table"""
+
+    def __init__(self, rows, requests):
+        self.rows = list(rows)
+        self.requests = requests
+        self.max_rows = None
+
+    def select(self, columns, **kwargs):
+        return self
+
+    def order(self, column, desc=False):
+        self.rows.sort(key=lambda r: r[column], reverse=desc)
+        return self
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if r[column] == value]
+        return self
+
+    def in_(self, column, values):
+        self.rows = [r for r in self.rows if r[column] in values]
+        return self
+
+    def or_(self, expr):
+        created_at, row_id = KEYSET.fullmatch(expr).groups()
+        self.rows = [r for r in self.rows if (r["created_at"], r["id"]) < (created_at, row_id)]
+        return self
+
+    def limit(self, n):
+        self.max_rows = n
+        return self
+
+    async def execute(self):
+        self.requests.append(self.max_rows)
+        return SimpleNamespace(data=[dict(r) for r in self.rows[:self.max_rows]])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    requests = []
+    monkeypatch.setattr(db, "table", lambda name: FakeTable(BUGS if name == "bugs" else [], requests))
+    monkeypatch.setattr(bugs_api, "select_columns", _all_columns)
+    client = TestClient(app)
+    client.requests = requests
+    return client
+
+
+async def _all_columns(*args, **kwargs):
+    return "*"
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_list_without_limit_returns_every_bug(client, monkeypatch):
+    monkeypatch.setattr(bugs_api, "FULL_LIST_BATCH", 3)
+    res = client.get("/bugs/", params={"include": ""})
+
+    assert res.status_code == 200
+    assert ids(res.json()) == [bug["id"] for bug in reversed(BUGS)]
+    assert "X-Next-Cursor" not in res.headers
+    # Read in batches of 3: 3 + 3 + 1
+    assert client.requests == [3, 3, 3]
+
+
+def test_list_with_limit_follows_cursor(client):
+    first = client.get("/bugs/", params={"limit": 5, "include": ""})
+    assert ids(first.json()) == ["FF-0006", "FF-0005", "FF-0004", "FF-0003", "FF-0002"]
+
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/bugs/", params={"cursor": cursor, "include": ""})
+    assert ids(second.json()) == ["FF-0001", "FF-0000"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_list_for_user_includes_children(client):
+    res = client.get("/bugs/", params={"user_id": "user-1"})
+    body = res.json()
+
+    assert ids(body) == ["FF-0005", "FF-0003", "FF-0001"]
+    assert all(bug["attachments"] == [] and bug["solutions"] == [] for bug in body)
+
+
+def test_list_rejects_bad_cursor(client):
+    assert client.get("/bugs/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_oversized_upload_without_content_length_is_413(client):
+    def chunks():
+        # A generator body is sent chunked, so only the bytes received can trip the limit
+        boundary = b"--x\r\n"
+        yield boundary + b'Content-Disposition: form-data; name="title"\r\n\r\nBig\r\n'
+        yield boundary + b'Content-Disposition: form-data; name="screenshot"; filename="a.png"\r\n'
+        yield b"Content-Type: image/png\r\n\r\n"
+        for _ in range(body_limit.MAX_REQUEST_BODY_BYTES // (1024 * 1024) + 1):
+            yield b"\0" * (1024 * 1024)
+        yield b"\r\n--x--\r\n"
+
+    res = client.post("/bugs/submit", content=chunks(),
+                      headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert res.status_code == 413
+
+
+def test_oversized_upload_with_content_length_is_413(client):
+    body = b"\0" * (body_limit.MAX_REQUEST_BODY_BYTES + 1)
+    res = client.post("/bugs/submit", content=body,
+                      headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert res.status_code == 413 and res.text == "Request body too large"
+
+
+def test_content_length_is_refused_before_the_body_is_read():
+    calls = {"app": 0, "receive": 0}
+    sent = []
+
+    async def endpoint(scope, receive, send):
+        calls["app"] += 1
+
+    async def receive():
+        calls["receive"] += 1
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = body_limit.BodySizeLimitMiddleware(endpoint, max_bytes=100)
+    scope = {"type": "http", "method": "POST", "path": "/bugs/submit",
+             "headers": [(b"content-length", b"101")]}
+    asyncio.run(middleware(scope, receive, send))
+
+    assert sent[0]["status"] == 413
+    assert calls == {"app": 0, "receive": 0}
@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import clusters_service
+from app.services.clusters_service import EMBED_DIM, SolvedBugIndex, bug_text
+
+
+def vec(seed):
+    return np.random.default_rng(seed).normal(size=EMBED_DIM).astype(np.float32)
+
+
+def solved_bug(i, **columns):
+    return {"id": f"FF-{i:04d}", "title": f"Bug {i}", "description": "Crash", "severity": "High",
+            "client_type": "Web", "tags": ["ui"], "embedding": None, "embedding_384": None, **columns}
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = 0
+
+    def table(self, name):
+        return self
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.reads += 1
+        return SimpleNamespace(data=self.rows)
+
+
+def test_top_k_uses_stored_vectors_and_matches_brute_force(monkeypatch):
+    rows = [solved_bug(i, embedding=vec(i).tolist()) for i in range(40)]
+    # pgvector text in the other column, and one bug with no stored vector at all
+    rows += [solved_bug(40, embedding_384=json.dumps(vec(40).tolist())), solved_bug(41)]
+    encoded = []
+
+    def fake_encode(texts):
+        encoded.append(list(texts))
+        return np.stack([vec(41)] * len(texts))
+
+    supabase = FakeSupabase(rows)
+    monkeypatch.setattr(clusters_service, "supabase", supabase)
+    monkeypatch.setattr(clusters_service.embedding_service, "encode", fake_encode)
+    index = SolvedBugIndex(ttl=3600)
+
+    stored = np.stack([vec(i) for i in range(42)])
+    stored /= np.linalg.norm(stored, axis=1, keepdims=True)
+    for seed in range(100, 110):
+        query = vec(seed)
+        expected = np.argsort(-(stored @ (query / np.linalg.norm(query))))[:3]
+        ranked = index.top_k(query, k=3)
+        assert [bug["id"] for bug, _ in ranked] == [rows[i]["id"] for i in expected]
+        assert ranked[0][1] >= ranked[1][1] >= ranked[2][1]
+
+    # Loaded once; only the bug without a vector was embedded, from its bug text
+    assert supabase.reads == 1
+    assert encoded == [[bug_text(rows[41])]]
+    assert len(index.top_k(vec(1), k=100)) == 42
+
+
+def test_invalidate_reloads_on_next_use(monkeypatch):
+    supabase = FakeSupabase([solved_bug(0, embedding=vec(0).tolist())])
+    monkeypatch.setattr(clusters_service, "supabase", supabase)
+    index = SolvedBugIndex(ttl=3600)
+    assert [b["id"] for b, _ in index.top_k(vec(1))] == ["FF-0000"]
+
+    supabase.rows = supabase.rows + [solved_bug(1, embedding=vec(1).tolist())]
+    assert len(index.top_k(vec(1))) == 1
+    index.invalidate()
+    assert index.top_k(vec(1))[0][0]["id"] == "FF-0001"
+    assert supabase.reads == 2
+
+
+def test_empty_corpus(monkeypatch):
+    monkeypatch.setattr(clusters_service, "supabase", FakeSupabase([]))
+    assert SolvedBugIndex().top_k(vec(0)) == []
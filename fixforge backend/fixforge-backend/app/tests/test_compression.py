@@ -0,0 +1,136 @@
+"""
+Encoding negotiation and the ETag / 304 path, on a small app wired the way
+app.main is (ORJSONResponse by default, CompressionMiddleware outermost).
+"""
+
+import gzip
+
+import orjson
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+from app.utils.etag import json_with_etag, rows_etag
+
+ROWS = [{"id": f"FF-{i}", "title": f"Bug {i}", "updated_at": "2026-10-17T10:00:00+00:00"} for i in range(100)]
+
+
+def make_app():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    async def big():
+        return ROWS
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for row in ROWS:
+                yield orjson.dumps(row) + b"\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/tagged")
+    async def tagged(request: Request):
+        return json_with_etag(request, ROWS, rows_etag(ROWS))
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(make_app())
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.5, identity;q=0, deflate;q=x") == {
+        "gzip": 1.0, "br": 0.5, "identity": 0.0, "deflate": 0.0,
+    }
+    assert parse_accept_encoding("") == {}
+
+
+def test_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip;q=0.8") == "gzip"
+    assert choose_encoding("*") == "gzip"
+    assert choose_encoding("br") is None
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("") is None
+
+
+def test_brotli_negotiation():
+    pytest.importorskip("brotli")
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+    assert choose_encoding("*;q=0.3, gzip;q=0.2") == "br"
+
+
+def test_large_json_is_gzipped(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    res = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert int(res.headers["content-length"]) < len(orjson.dumps(ROWS))
+    assert res.json() == ROWS
+    assert "accept-encoding" in res.headers["vary"].lower()
+
+
+def test_small_and_unaccepted_bodies_go_out_as_they_are(client):
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers and small.json() == {"ok": True}
+    plain = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    # The default response class serializes with orjson
+    assert plain.content == orjson.dumps(ROWS)
+
+
+def test_streamed_response_is_compressed_chunk_by_chunk(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as res:
+        raw = b"".join(res.iter_raw())
+    assert res.headers["content-encoding"] == "gzip" and "content-length" not in res.headers
+    assert [orjson.loads(line) for line in gzip.decompress(raw).splitlines()] == ROWS
+
+
+def test_brotli_response(client):
+    brotli = pytest.importorskip("brotli")
+    with client.stream("GET", "/big", headers={"Accept-Encoding": "br, gzip"}) as res:
+        raw = b"".join(res.iter_raw())
+    assert res.headers["content-encoding"] == "br"
+    assert orjson.loads(brotli.decompress(raw)) == ROWS
+
+
+def test_etag_and_not_modified(client):
+    first = client.get("/tagged")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and first.headers["cache-control"] == "no-cache"
+    assert first.json() == ROWS
+
+    for if_none_match in (etag, etag.removeprefix("W/"), f'W/"other", {etag}', "*"):
+        res = client.get("/tagged", headers={"If-None-Match": if_none_match})
+        assert res.status_code == 304 and res.content == b"" and res.headers["etag"] == etag
+
+    assert client.get("/tagged", headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+
+def test_rows_etag_follows_row_versions():
+    etag = rows_etag(ROWS)
+    assert rows_etag([dict(r) for r in ROWS]) == etag
+    assert rows_etag(ROWS[::-1]) != etag
+    bumped = [dict(ROWS[0], updated_at="2026-10-17T11:00:00+00:00")] + ROWS[1:]
+    assert rows_etag(bumped) != etag
+    # The same rows fetched with other columns are a different representation
+    assert rows_etag(ROWS, extra="id,title") != etag
+    # Rows never updated fall back to created_at; rows without either are hashed by content
+    assert rows_etag([{"id": 1, "updated_at": None, "created_at": "a"}]) != \
+        rows_etag([{"id": 1, "updated_at": None, "created_at": "b"}])
+    assert rows_etag([{"id": 1, "n": 1}]) != rows_etag([{"id": 1, "n": 2}])
+    # A title edit alone doesn't change the tag when updated_at is present
+    assert rows_etag([dict(ROWS[0], title="edited")] + ROWS[1:]) == etag
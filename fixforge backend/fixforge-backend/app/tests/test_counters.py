@@ -0,0 +1,96 @@
+"""
+The counter RPCs against scripts/fake_postgrest_server.py, which implements
+the functions from the atomic_counters and batched_votes migrations.
+"""
+
+import asyncio
+
+import pytest
+
+from app.db.session import AsyncSupabase
+from app.services import counters as counters_module
+from app.services.counters import CounterService, _scalar
+from scripts.benchmark_supabase_client import free_port, start_server
+
+
+@pytest.fixture(scope="module")
+def postgrest_url():
+    port = free_port()
+    server = start_server(port, 0, 20)
+    yield f"http://127.0.0.1:{port}"
+    server.terminate()
+
+
+def run(monkeypatch, url, scenario):
+    client = AsyncSupabase(url=url, key="k")
+    monkeypatch.setattr(counters_module, "db", client)
+
+    async def main():
+        await client.start()
+        try:
+            return await scenario(CounterService())
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+def test_scalar_accepts_every_response_shape():
+    assert _scalar(3) == 3
+    assert _scalar([4]) == 4
+    assert _scalar([{"adjust_bug_votes": 5}]) == 5
+    assert _scalar([]) is None and _scalar(None) is None
+
+
+def test_concurrent_adjustments_are_not_lost(postgrest_url, monkeypatch):
+    async def scenario(counters):
+        # bug 1 starts at 1 vote, solution comments at 0
+        await asyncio.gather(*[counters.adjust_bug_votes("FF-00000001") for _ in range(20)])
+        after = await counters.adjust_bug_votes("FF-00000001", -1)
+        comments = await counters.adjust_solution_comments("sol-1-0", 3)
+        floor = await counters.adjust_solution_comments("sol-1-0", -10)
+        missing = await counters.adjust_bug_votes("FF-missing")
+        return after, comments, floor, missing
+
+    assert run(monkeypatch, postgrest_url, scenario) == (20, 3, 0, None)
+
+
+def test_toggle_solution_upvote(postgrest_url, monkeypatch):
+    async def scenario(counters):
+        return [
+            await counters.toggle_solution_upvote("sol-2-0", "alice"),
+            await counters.toggle_solution_upvote("sol-2-0", "bob"),
+            await counters.toggle_solution_upvote("sol-2-0", "alice"),
+            await counters.toggle_solution_upvote("sol-missing", "alice"),
+        ]
+
+    assert run(monkeypatch, postgrest_url, scenario) == [(True, 1), (True, 2), (False, 1), None]
+
+
+def test_bug_vote_batch_is_applied_once(postgrest_url, monkeypatch):
+    async def scenario(counters):
+        deltas = {"FF-00000002": 3, "FF-00000003": -1, "FF-missing": 5, "FF-00000004": 0}
+        first = await counters.apply_bug_votes(deltas, batch_id="batch-1")
+        # A retry of the same flush (e.g. after a lost response) changes nothing
+        retry = await counters.apply_bug_votes(deltas, batch_id="batch-1")
+        empty = await counters.apply_bug_votes({"FF-00000002": 0})
+        votes = await counters.adjust_bug_votes("FF-00000002", 0)
+        return first, retry, empty, votes
+
+    # Zero deltas aren't sent, unknown bugs aren't counted; bug 2 started at 2
+    assert run(monkeypatch, postgrest_url, scenario) == (2, 0, 0, 5)
+
+
+def test_apply_solution_upvotes_sets_state(postgrest_url, monkeypatch):
+    async def scenario(counters):
+        added = await counters.apply_solution_upvotes(
+            add=[("sol-3-0", "u1"), ("sol-3-0", "u2"), ("sol-3-1", "u1")], remove=[]
+        )
+        # Adding an existing upvote or removing an absent one is not a change
+        again = await counters.apply_solution_upvotes(add=[("sol-3-0", "u1")], remove=[("sol-3-1", "u2")])
+        removed = await counters.apply_solution_upvotes(add=[], remove=[("sol-3-0", "u2")])
+        nothing = await counters.apply_solution_upvotes(add=[], remove=[])
+        state = await counters.toggle_solution_upvote("sol-3-0", "u3")
+        return added, again, removed, nothing, state
+
+    assert run(monkeypatch, postgrest_url, scenario) == (3, 0, 1, 0, (True, 2))
@@ -0,0 +1,93 @@
+"""
+The ONNX backend's numpy side (pooling, normalization, batching order) with
+a fake tokenizer and session, so it runs without onnxruntime or a model file.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import embedding_backends
+from app.services.embedding_backends import OnnxBackend, create_backend
+
+DIM = 4
+
+
+def fake_tokenizer(texts, padding, truncation, max_length, return_tensors):
+    # One "token" per word, padded to the longest text in the batch
+    width = max(len(t.split()) for t in texts)
+    ids = np.zeros((len(texts), width), dtype=np.int32)
+    mask = np.zeros((len(texts), width), dtype=np.int32)
+    for i, text in enumerate(texts):
+        words = text.split()
+        ids[i, :len(words)] = [len(w) for w in words]
+        mask[i, :len(words)] = 1
+    return {"input_ids": ids, "attention_mask": mask, "token_type_ids": np.zeros_like(ids)}
+
+
+class FakeSession:
+    def __init__(self):
+        self.feeds = []
+
+    def run(self, outputs, feed):
+        self.feeds.append(feed)
+        ids = feed["input_ids"].astype(np.float32)
+        # Token embedding [id, 1, 0, 0]; padding tokens get junk that pooling must ignore
+        emb = np.stack([ids, np.ones_like(ids), np.zeros_like(ids), np.zeros_like(ids)], axis=-1)
+        emb[feed["attention_mask"] == 0] = 100.0
+        return [emb]
+
+
+def backend():
+    onnx = OnnxBackend.__new__(OnnxBackend)
+    onnx.name = "onnx-int8"
+    onnx.session = FakeSession()
+    onnx.tokenizer = fake_tokenizer
+    onnx._input_names = {"input_ids", "attention_mask"}
+    return onnx
+
+
+def expected(text):
+    lengths = [len(w) for w in text.split()]
+    pooled = np.array([np.mean(lengths), 1.0, 0.0, 0.0])
+    return pooled / np.linalg.norm(pooled)
+
+
+def test_mean_pooling_ignores_padding_and_normalizes():
+    onnx = backend()
+    texts = ["a bb ccc", "dddd", "ee f"]
+    vectors = onnx.encode(texts, batch_size=8)
+
+    assert vectors.shape == (3, DIM) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    for text, vec in zip(texts, vectors):
+        assert np.allclose(vec, expected(text), atol=1e-6)
+    # Only inputs the model declares are fed, as int64
+    assert set(onnx.session.feeds[0]) == {"input_ids", "attention_mask"}
+    assert all(v.dtype == np.int64 for v in onnx.session.feeds[0].values())
+
+
+def test_length_sorted_batches_come_back_in_input_order():
+    onnx = backend()
+    texts = ["x", "a much longer text here", "mid size text", "yy zz", "one two three four five six"]
+    vectors = onnx.encode(texts, batch_size=2)
+
+    assert len(onnx.session.feeds) == 3
+    # Longest first, so each batch pads to similar lengths
+    assert [f["input_ids"].shape[1] for f in onnx.session.feeds] == [6, 3, 1]
+    for text, vec in zip(texts, vectors):
+        assert np.allclose(vec, expected(text), atol=1e-6)
+
+
+def test_onnx_falls_back_to_torch(monkeypatch):
+    def torch_backend(model_name):
+        return SimpleNamespace(name="torch", model_name=model_name)
+
+    def missing_onnx():
+        raise FileNotFoundError("model.int8.onnx not found")
+
+    monkeypatch.setattr(embedding_backends, "TorchBackend", torch_backend)
+    monkeypatch.setattr(embedding_backends, "OnnxBackend", missing_onnx)
+    # No exported model (or no onnxruntime): the service keeps working on torch
+    assert create_backend("all-MiniLM-L6-v2", "onnx").name == "torch"
+    assert create_backend("all-MiniLM-L6-v2", "torch").model_name == "all-MiniLM-L6-v2"
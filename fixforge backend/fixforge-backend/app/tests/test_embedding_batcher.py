@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+class FakeService:
+    def __init__(self, cached=(), fail=False):
+        self.cached = set(cached)
+        self.fail = fail
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def peek(self, text):
+        return np.array([-1.0], dtype=np.float32) if text in self.cached else None
+
+    def encode(self, texts, batch_size=32):
+        self.release.wait()
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return np.array([[float(t.split("-")[1])] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_share_batches():
+    service = FakeService()
+    batcher = EmbeddingBatcher(service, max_batch_size=8, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(*[batcher.embed_async(f"text-{i}") for i in range(20)])
+
+    results = asyncio.run(scenario())
+    # Every caller gets its own vector back
+    assert results == [[float(i)] for i in range(20)]
+    assert [len(b) for b in service.batches] == [8, 8, 4]
+    assert batcher.stats()["batches"] == 3 and batcher.stats()["items"] == 20
+
+
+def test_single_request_waits_at_most_max_wait():
+    service = FakeService()
+    batcher = EmbeddingBatcher(service, max_batch_size=32, max_wait_ms=1)
+    assert batcher.embed("text-7") == [7.0]
+    assert service.batches == [["text-7"]]
+
+
+def test_cached_text_skips_the_queue():
+    service = FakeService(cached={"text-1"})
+    batcher = EmbeddingBatcher(service)
+    assert batcher.embed("text-1") == [-1.0]
+    assert service.batches == [] and batcher._thread is None
+
+
+def test_failure_reaches_every_caller_in_the_batch():
+    service = FakeService(fail=True)
+    batcher = EmbeddingBatcher(service, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(f"text-{i}") for i in range(4)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(timeout=5)
+    # The dispatcher survives and serves the next batch
+    service.fail = False
+    assert batcher.embed("text-9") == [9.0]
+
+
+def test_cancelled_requests_are_not_encoded():
+    service = FakeService()
+    batcher = EmbeddingBatcher(service, max_batch_size=1, max_wait_ms=0)
+    service.release.clear()
+    blocking = batcher.submit("text-0")  # holds the dispatcher inside encode
+    while batcher._queue.qsize():  # until the dispatcher has taken it
+        pass
+    cancelled = batcher.submit("text-1")
+    kept = batcher.submit("text-2")
+    assert cancelled.cancel()
+    service.release.set()
+
+    assert blocking.result(timeout=5) == [0.0] and kept.result(timeout=5) == [2.0]
+    assert ["text-1"] not in service.batches
@@ -0,0 +1,91 @@
+import multiprocessing
+
+import numpy as np
+
+from app.services.embedding_cache import DiskEmbeddingStore
+
+DIM = 8
+
+
+def vec(seed):
+    return np.random.default_rng(seed).normal(size=DIM).astype(np.float32)
+
+
+def key(i):
+    return f"{i:064x}"
+
+
+def test_reload_returns_stored_vectors(tmp_path):
+    store = DiskEmbeddingStore(str(tmp_path), DIM)
+    for i in range(5):
+        store.put(key(i), vec(i))
+    store.put(key(0), vec(99))  # already stored: ignored
+
+    reloaded = DiskEmbeddingStore(str(tmp_path), DIM)
+    assert len(reloaded) == 5
+    for i in range(5):
+        assert np.array_equal(reloaded.get(key(i)), vec(i))
+    assert reloaded.get(key(5)) is None
+
+
+def test_two_writers_keep_rows_straight(tmp_path):
+    # Two stores on one directory, as two uvicorn workers would have
+    a = DiskEmbeddingStore(str(tmp_path), DIM)
+    b = DiskEmbeddingStore(str(tmp_path), DIM)
+    a.put(key(1), vec(1))
+    b.put(key(2), vec(2))
+    a.put(key(3), vec(3))
+    b.put(key(1), vec(1))  # a already wrote it
+
+    # Each sees the other's vectors, under the right keys
+    assert np.array_equal(a.get(key(2)), vec(2))
+    assert np.array_equal(b.get(key(3)), vec(3))
+    fresh = DiskEmbeddingStore(str(tmp_path), DIM)
+    assert len(fresh) == 3
+    for i in (1, 2, 3):
+        assert np.array_equal(fresh.get(key(i)), vec(i))
+
+
+def _append(directory, start):
+    store = DiskEmbeddingStore(directory, DIM)
+    for i in range(start, start + 200):
+        store.put(key(i), vec(i))
+
+
+def test_concurrent_processes(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_append, args=(str(tmp_path), start)) for start in (0, 100, 200)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    store = DiskEmbeddingStore(str(tmp_path), DIM)
+    assert len(store) == 400
+    assert all(np.array_equal(store.get(key(i)), vec(i)) for i in range(400))
+
+
+def test_mismatched_files_are_repaired(tmp_path):
+    vec_path = tmp_path / "embeddings.f32"
+    key_path = tmp_path / "embeddings.keys"
+    # Written before rows were recorded: line i is row i. Then a crash left a
+    # key line with no vector, a half-written key line and a half-written row.
+    vec_path.write_bytes(vec(0).tobytes() + vec(1).tobytes() + vec(2).tobytes()[:5])
+    key_path.write_text(f"{key(0)}\n{key(1)}\n{key(2)}\n{key(3)[:20]}")
+
+    store = DiskEmbeddingStore(str(tmp_path), DIM)
+    assert len(store) == 2
+    assert np.array_equal(store.get(key(1)), vec(1))
+    assert store.get(key(2)) is None
+
+    store.put(key(4), vec(4))
+    store.put(key(2), vec(2))
+    assert vec_path.stat().st_size == 4 * DIM * 4
+    # The dangling lines were cut off before row 2 existed, so key(2) can't claim key(4)'s row
+    assert key_path.read_text().splitlines() == [key(0), key(1), f"{key(4)} 2", f"{key(2)} 3"]
+
+    reloaded = DiskEmbeddingStore(str(tmp_path), DIM)
+    assert len(reloaded) == 4
+    for i in (0, 1, 2, 4):
+        assert np.array_equal(reloaded.get(key(i)), vec(i))
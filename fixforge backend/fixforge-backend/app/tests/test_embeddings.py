@@ -0,0 +1,67 @@
+import time
+import threading
+
+import numpy as np
+
+from app.api import cluster_job
+from app.services import clusters_service, embeddings
+from app.services.embedding_batcher import embedding_batcher
+from app.services.embeddings import EMBED_DIM, EmbeddingService, embedding_service
+
+
+class FakeBackend:
+    name = "torch"  # what the label says before loading, as the real backends do
+    loads = 0
+
+    def __init__(self):
+        # Slow enough that concurrent first callers would all load without the lock
+        time.sleep(0.05)
+        FakeBackend.loads += 1
+        self.batches = []
+
+    def encode(self, texts, batch_size=32):
+        self.batches.append(list(texts))
+        return np.stack([np.full(EMBED_DIM, len(t), dtype=np.float32) for t in texts])
+
+
+def service(monkeypatch):
+    FakeBackend.loads = 0
+    monkeypatch.setattr(embeddings, "create_backend", lambda model_name, backend: FakeBackend())
+    return EmbeddingService(backend="torch")
+
+
+def test_model_loads_once_on_first_use(monkeypatch):
+    svc = service(monkeypatch)
+    assert not svc.is_loaded and FakeBackend.loads == 0
+
+    backends = []
+    threads = [threading.Thread(target=lambda: backends.append(svc.backend)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert FakeBackend.loads == 1
+    assert all(b is backends[0] for b in backends)
+    assert svc.model_id == f"{embeddings.EMBED_MODEL}:torch"
+
+
+def test_encode_skips_cached_and_repeated_texts(monkeypatch):
+    svc = service(monkeypatch)
+    single = svc.encode("Crash on save")
+    assert single.shape == (EMBED_DIM,)
+
+    batch = svc.encode(["Crash  on save ", "Login loop", "Login loop"])
+    assert batch.shape == (3, EMBED_DIM)
+    # Whitespace-normalized repeats and the earlier text never reach the model
+    assert svc.backend.batches == [["Crash on save"], ["Login loop"]]
+    assert np.array_equal(batch[0], single)
+    assert svc.encode([]).shape == (0, EMBED_DIM)
+    assert svc.encode_one("Login loop") == batch[1].tolist()
+
+
+def test_callers_share_the_process_service():
+    # Routes reach the model through the batcher, jobs and clustering directly
+    assert embedding_batcher.service is embedding_service
+    for module in (cluster_job, clusters_service):
+        assert module.embedding_service is embedding_service
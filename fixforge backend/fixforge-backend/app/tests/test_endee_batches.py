@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import endee_client
+from app.services.endee_client import ENDEE_DIM, AsyncEndeeClient, EndeeService, validate_vectors
+
+
+def item(i, dim=ENDEE_DIM):
+    return {"id": f"FF-{i}", "values": np.full(dim, 0.1 * (i + 1), dtype=np.float32).tolist(),
+            "metadata": {"status": "Open"}}
+
+
+class FakeHttp:
+    """Records each batch request; batches holding `reject` ids fail"""
+
+    def __init__(self, reject=(), error=None):
+        self.reject = set(reject)
+        self.error = error
+        self.payloads = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def post(self, path, json, timeout):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.payloads.append((path, json))
+        ids = [v["id"] for v in json["vectors"]] if "vectors" in json else json["ids"]
+        if self.reject & set(ids):
+            if self.error:
+                raise self.error
+            return SimpleNamespace(status_code=500, text="index full")
+        return SimpleNamespace(status_code=200, text="")
+
+
+def client_with(monkeypatch, http):
+    monkeypatch.setenv("ENDEE_INDEX", f"test_{uuid.uuid4().hex[:8]}")
+    client = AsyncEndeeClient()
+
+    async def ready():
+        return http
+
+    monkeypatch.setattr(client, "_ensure_index", ready)
+    return client
+
+
+def test_validate_vectors_reports_each_bad_item():
+    bad_dim = item(1, dim=3)
+    nan = item(2)
+    nan["values"][5] = float("nan")
+    no_values = {"id": "FF-3"}
+    valid, failed = validate_vectors([item(0), bad_dim, nan, no_values, item(4)])
+
+    assert [v["id"] for v in valid] == ["FF-0", "FF-4"]
+    assert all(isinstance(v["values"], list) and len(v["values"]) == ENDEE_DIM for v in valid)
+    assert {f["id"]: f["error"] for f in failed} == {
+        "FF-1": f"Expected {ENDEE_DIM}-dim embedding, got 3",
+        "FF-3": f"Expected {ENDEE_DIM}-dim embedding, got 0",
+        "FF-2": "Embedding contains NaN or inf",
+    }
+
+
+def test_upsert_chunks_and_reports_failed_batches(monkeypatch):
+    monkeypatch.setattr(endee_client, "ENDEE_BATCH_CONCURRENCY", 2)
+    http = FakeHttp(reject={"FF-5"})
+    client = client_with(monkeypatch, http)
+    vectors = [item(i) for i in range(10)] + [item(10, dim=7)]
+
+    report = asyncio.run(client.upsert_vectors(vectors, batch_size=4))
+
+    assert sorted(len(p["vectors"]) for _, p in http.payloads) == [2, 4, 4]
+    assert http.max_in_flight == 2
+    # The whole batch holding the rejected item is reported, item by item
+    assert sorted(report["upserted"]) == sorted(f"FF-{i}" for i in (0, 1, 2, 3, 8, 9))
+    errors = {f["id"]: f["error"] for f in report["failed"]}
+    assert sorted(errors) == sorted(f"FF-{i}" for i in (4, 5, 6, 7, 10))
+    assert errors["FF-4"] == "Upsert failed: 500 - index full"
+    assert errors["FF-10"].startswith(f"Expected {ENDEE_DIM}-dim")
+
+
+def test_delete_chunks_and_reports_failed_batches(monkeypatch):
+    http = FakeHttp(reject={"FF-0"}, error=ConnectionError("reset by peer"))
+    client = client_with(monkeypatch, http)
+
+    report = asyncio.run(client.delete_vectors([f"FF-{i}" for i in range(5)], batch_size=2))
+
+    assert sorted(p["ids"] for _, p in http.payloads) == [["FF-0", "FF-1"], ["FF-2", "FF-3"], ["FF-4"]]
+    assert sorted(report["deleted"]) == ["FF-2", "FF-3", "FF-4"]
+    assert report["failed"] == [{"id": f"FF-{i}", "error": "Delete failed: reset by peer"} for i in (0, 1)]
+
+
+def test_service_bulk_upsert_mirrors_valid_bugs(monkeypatch):
+    http = FakeHttp()
+    monkeypatch.setenv("ENDEE_INDEX", f"test_{uuid.uuid4().hex[:8]}")
+    service = EndeeService()
+    service.local.directory = ""
+
+    async def ready():
+        return http
+
+    monkeypatch.setattr(service.client, "_ensure_index", ready)
+    documents = []
+    monkeypatch.setattr(endee_client.lexical_index, "upsert", lambda docs: documents.extend(docs))
+    bugs = [{"bug_id": f"FF-{i}", "embedding": item(i)["values"], "metadata": {"status": "Open"}} for i in range(3)]
+    bugs.append({"bug_id": "FF-9", "embedding": [0.1, 0.2], "metadata": {}})
+
+    report = asyncio.run(service.upsert_bug_vectors(bugs, batch_size=2))
+
+    assert sorted(report["upserted"]) == ["FF-0", "FF-1", "FF-2"]
+    assert [f["id"] for f in report["failed"]] == ["FF-9"]
+    assert len(http.payloads) == 2
+    # Endee metadata always names the bug; the local mirror only holds valid vectors
+    assert all(v["metadata"]["bug_id"] == v["id"] for _, p in http.payloads for v in p["vectors"])
+    assert len(service.local) == 3 and "FF-9" not in service.local
+    assert [doc[0] for doc in documents] == ["FF-0", "FF-1", "FF-2", "FF-9"]
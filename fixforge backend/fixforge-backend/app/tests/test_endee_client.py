@@ -0,0 +1,150 @@
+"""
+AsyncEndeeClient against scripts/fake_endee_server.py over real HTTP: the
+lazy index check, one connection pool per event loop, and the per-operation
+timeouts (a slow search raises EndeeError, which EndeeService fails over on).
+"""
+
+import time
+import uuid
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+from app.services import endee_client
+from app.services.endee_client import AsyncEndeeClient, EndeeError, EndeeService
+from scripts.benchmark_endee_client import free_port, start_server
+
+DIM = 384
+SLOW_MS = 300
+
+
+@pytest.fixture(scope="module")
+def endee_url():
+    port = free_port()
+    server = start_server(port, 0)
+    yield f"http://127.0.0.1:{port}"
+    server.terminate()
+
+
+@pytest.fixture(scope="module")
+def slow_endee_url():
+    port = free_port()
+    server = start_server(port, SLOW_MS)
+    yield f"http://127.0.0.1:{port}"
+    server.terminate()
+
+
+def make_client(monkeypatch, url):
+    monkeypatch.setenv("ENDEE_URL", url)
+    monkeypatch.setenv("ENDEE_INDEX", f"test_{uuid.uuid4().hex[:8]}")
+    return AsyncEndeeClient()
+
+
+def vector(seed):
+    return np.random.default_rng(seed).normal(size=DIM).astype(np.float32).tolist()
+
+
+def indexes(url):
+    return httpx.get(f"{url}/api/v1/index/list").json()["indexes"]
+
+
+def test_index_is_created_on_first_use(monkeypatch, endee_url):
+    client = make_client(monkeypatch, endee_url)
+    # Constructing the client makes no requests
+    assert client.index_name not in indexes(endee_url)
+
+    async def scenario():
+        # Concurrent first calls share one index check
+        results = await asyncio.gather(*[client.search_similar(vector(i), 5) for i in range(10)])
+        report = await client.upsert_vectors([
+            {"id": f"FF-{i}", "values": vector(i), "metadata": {"status": "Open" if i % 2 else "Closed"}}
+            for i in range(6)
+        ], batch_size=4)
+        found = await client.search_similar(vector(3), 3, {"status": {"$ne": "Closed"}})
+        deleted = await client.delete_vectors(["FF-3"])
+        after = await client.search_similar(vector(3), 1)
+        await client.aclose()
+        return results, report, found, deleted, after
+
+    results, report, found, deleted, after = asyncio.run(scenario())
+    assert client._index_ready
+    assert client.index_name in indexes(endee_url)
+    assert results == [[]] * 10
+    assert sorted(report["upserted"]) == [f"FF-{i}" for i in range(6)] and report["failed"] == []
+    assert found[0]["id"] == "FF-3" and all(r["metadata"]["status"] == "Open" for r in found)
+    assert deleted == {"deleted": ["FF-3"], "failed": []}
+    assert after[0]["id"] != "FF-3"
+
+
+def test_index_check_retries_after_failure(monkeypatch):
+    client = make_client(monkeypatch, f"http://127.0.0.1:{free_port()}")
+
+    async def search():
+        with pytest.raises(EndeeError):
+            await client.search_similar(vector(0), 1)
+
+    asyncio.run(search())
+    # Nothing was reachable, so the next call checks again
+    assert not client._index_ready
+
+
+def test_one_connection_pool_per_event_loop(monkeypatch, endee_url):
+    client = make_client(monkeypatch, endee_url)
+
+    async def session_and_search():
+        first, _ = client._session()
+        second, _ = client._session()
+        assert first is second
+        await client.upsert_vector("FF-1", vector(1), {"status": "Open"})
+        return first, await client.search_similar(vector(1), 1)
+
+    first_client, first = asyncio.run(session_and_search())
+    # A new loop gets its own httpx client instead of reusing one bound to a closed loop
+    second_client, second = asyncio.run(session_and_search())
+    assert first_client is not second_client
+    assert first[0]["id"] == second[0]["id"] == "FF-1"
+
+    # So does a loop driven by hand, as SyncEndeeService's thread does
+    loop = asyncio.new_event_loop()
+    try:
+        thread_client, thread_result = loop.run_until_complete(session_and_search())
+    finally:
+        loop.close()
+    assert thread_client not in (first_client, second_client)
+    assert thread_result[0]["id"] == "FF-1"
+
+
+def test_search_timeout_raises_endee_error(monkeypatch, slow_endee_url):
+    monkeypatch.setattr(endee_client, "ENDEE_SEARCH_TIMEOUT", 0.05)
+    monkeypatch.setattr(endee_client, "ENDEE_WRITE_TIMEOUT", 0.05)
+    client = make_client(monkeypatch, slow_endee_url)
+
+    async def scenario():
+        start = time.perf_counter()
+        with pytest.raises(EndeeError, match="Timeout"):
+            await client.search_similar(vector(0), 1)
+        elapsed = time.perf_counter() - start
+        # Writes report their failures instead of raising
+        report = await client.upsert_vectors([{"id": "FF-1", "values": vector(1), "metadata": {}}])
+        return elapsed, report
+
+    elapsed, report = asyncio.run(scenario())
+    assert elapsed < SLOW_MS / 1000
+    assert report["upserted"] == [] and report["failed"][0]["id"] == "FF-1"
+
+
+def test_service_fails_over_to_local_index_on_timeout(monkeypatch, slow_endee_url):
+    monkeypatch.setattr(endee_client, "ENDEE_SEARCH_TIMEOUT", 0.05)
+    monkeypatch.setattr(endee_client, "ENDEE_LOCAL_READS", False)
+    monkeypatch.setenv("ENDEE_URL", slow_endee_url)
+    monkeypatch.setenv("ENDEE_INDEX", f"test_{uuid.uuid4().hex[:8]}")
+    service = EndeeService()
+    service.local.directory = ""
+    service.local.upsert([{"id": "FF-1", "values": vector(1), "metadata": {"status": "Open"}}])
+
+    results = asyncio.run(service.search_similar_bugs(vector(1), top_k=1))
+    assert [r["id"] for r in results] == ["FF-1"]
+    # Endee stays skipped for the cooldown
+    assert service._endee_down_until > time.monotonic()
@@ -0,0 +1,116 @@
+"""
+/health must stay responsive while a burst of /bugs/submit calls is in flight.
+
+The app runs in-process on httpx's ASGI transport, so the probe and the
+submissions share one event loop. Embedding inference is faked with a
+blocking sleep (it runs on the batcher's thread, like the real model), and
+Supabase and Endee with awaitable fakes. If a submit handler did blocking
+work on the loop, /health would wait behind it and its p99 would approach
+EMBED_SECONDS.
+"""
+
+import gc
+import math
+import time
+import uuid
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+
+from app.main import app
+from app.db.session import db
+from app.services.embeddings import EMBED_DIM, embedding_service
+from app.services.endee_client import endee_service
+
+BURST = 40
+EMBED_SECONDS = 0.2
+IO_SECONDS = 0.005
+MAX_P99_MS = 100.0
+
+
+class FakeQuery:
+    """Any PostgREST builder chain; execute() waits like a round trip and returns no rows"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        await asyncio.sleep(IO_SECONDS)
+        return SimpleNamespace(data=[], count=None)
+
+
+def fake_infer(texts, batch_size):
+    time.sleep(EMBED_SECONDS)
+    return np.ones((len(texts), EMBED_DIM), dtype=np.float32)
+
+
+async def fake_search(*args, **kwargs):
+    await asyncio.sleep(IO_SECONDS)
+    return []
+
+
+async def fake_upsert(*args, **kwargs):
+    await asyncio.sleep(IO_SECONDS)
+    return True
+
+
+async def probe(client, stop, interval=0.005):
+    latencies = []
+    while not stop.is_set():
+        # A request made while the loop is blocked starts late, so the oversleep counts too
+        start = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        res = await client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert res.status_code == 200
+    return latencies
+
+
+async def submit(client):
+    marker = uuid.uuid4().hex
+    return await client.post("/bugs/submit", data={
+        "title": f"Loop lag check {marker}",
+        "description": f"Synthetic submission {marker}",
+        "severity": "Low",
+        "clientType": "Web",
+        "tags": '["loadtest"]',
+        "user_id": "user-1",
+    })
+
+
+async def burst():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop))
+        responses = await asyncio.gather(*[submit(client) for _ in range(BURST)])
+        stop.set()
+        return responses, await probe_task
+
+
+def test_health_p99_during_submit_burst(monkeypatch):
+    monkeypatch.setattr(embedding_service, "_infer", fake_infer)
+    monkeypatch.setattr(endee_service, "search_similar_bugs", fake_search)
+    monkeypatch.setattr(endee_service, "upsert_bug_vector", fake_upsert)
+    monkeypatch.setattr(db, "table", lambda name: FakeQuery())
+    monkeypatch.setattr(db, "from_", lambda name: FakeQuery())
+
+    # Objects left by earlier tests would make a full collection during the
+    # burst stall the loop for reasons unrelated to the handlers; freeze them
+    gc.collect()
+    gc.freeze()
+    try:
+        responses, latencies = asyncio.run(burst())
+    finally:
+        gc.unfreeze()
+
+    assert [r.status_code for r in responses] == [200] * BURST
+    assert all(r.json()["message"] == "Bug submitted successfully" for r in responses)
+    # The burst spans several embedding batches, so the probe saw all of it
+    assert len(latencies) >= 10
+    latencies.sort()
+    # Nearest rank: with under a hundred samples this is the slowest probe
+    p99 = latencies[math.ceil(len(latencies) * 0.99) - 1]
+    assert p99 < MAX_P99_MS, f"/health p99 {p99:.1f}ms during the burst"
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db.session import db
+from app.utils import fields
+from app.utils.fields import parse_fields, project, select_columns
+
+COLUMNS = {
+    "bugs": ["id", "title", "votes", "created_at", "embedding", "embedding_384", "code"],
+    "solutions": ["id", "bug_id", "content", "votes"],
+}
+
+
+@pytest.fixture
+def schema(monkeypatch):
+    """Fresh schema cache over COLUMNS; schema.reads counts OpenAPI reads"""
+    monkeypatch.setattr(fields, "_columns", None)
+    monkeypatch.setattr(fields, "_loaded_at", float("-inf"))
+    state = {"reads": 0, "fail": False}
+
+    async def table_columns():
+        state["reads"] += 1
+        if state["fail"]:
+            raise ConnectionError("schema unavailable")
+        return COLUMNS
+
+    monkeypatch.setattr(db, "table_columns", table_columns)
+    return state
+
+
+def test_parse_fields():
+    assert parse_fields(" id, title ,,id,votes ") == ["id", "title", "votes"]
+    assert parse_fields(None) == [] and parse_fields("") == []
+    for bad in ("id,title;drop", "votes.desc", "author:user_id", "1st", "*"):
+        with pytest.raises(ValueError, match="Invalid field name"):
+            parse_fields(bad)
+
+
+def test_select_columns(schema):
+    async def scenario():
+        return [
+            await select_columns("bugs"),
+            await select_columns("bugs", "title,embedding"),
+            await select_columns("bugs", "votes", require=("id", "created_at")),
+            await select_columns("solutions", exclude=("content",)),
+        ]
+
+    assert asyncio.run(scenario()) == [
+        "id,title,votes,created_at",  # heavy columns only when asked for by name
+        "title,embedding,id",
+        "votes,id,created_at",
+        "id,bug_id,votes",
+    ]
+    assert schema["reads"] == 1
+
+
+def test_unknown_fields_are_rejected(schema):
+    with pytest.raises(ValueError, match=r"Unknown fields for bugs: \['secret', 'password'\]"):
+        asyncio.run(select_columns("bugs", "id,secret,password"))
+
+
+def test_without_a_schema_fields_pass_through(schema, monkeypatch):
+    schema["fail"] = True
+    now = [1000.0]
+    monkeypatch.setattr(fields.time, "monotonic", lambda: now[0])
+
+    assert asyncio.run(select_columns("bugs")) == "*"
+    assert asyncio.run(select_columns("bugs", "title,anything")) == "title,anything,id"
+    # Malformed names are still refused
+    with pytest.raises(ValueError):
+        asyncio.run(select_columns("bugs", "title,id)"))
+    assert schema["reads"] == 1
+
+    # The read is retried after FIELDS_SCHEMA_RETRY, not on every request
+    schema["fail"] = False
+    now[0] += fields.FIELDS_SCHEMA_RETRY
+    assert asyncio.run(select_columns("bugs")) == "id,title,votes,created_at"
+    assert schema["reads"] == 2
+
+
+def test_project():
+    row = {"id": "FF-1", "title": "Crash", "votes": 3, "code": "x"}
+    assert project(row, "title,votes") == {"title": "Crash", "votes": 3, "id": "FF-1"}
+    assert project(row, None) is row
+    with pytest.raises(ValueError):
+        project(row, "title;votes")
+
+
+def test_endpoints_answer_400_for_bad_fields(schema, monkeypatch):
+    queried = []
+    monkeypatch.setattr(db, "table", lambda name: queried.append(name))
+    client = TestClient(app)
+
+    for path in ("/bugs/FF-1/solutions", "/getsolution/"):
+        unknown = client.get(path, params={"fields": "content,secret"})
+        assert unknown.status_code == 400
+        assert unknown.json()["detail"] == "Unknown fields for solutions: ['secret']"
+        malformed = client.get(path, params={"fields": "content,votes.desc"})
+        assert malformed.status_code == 400 and "Invalid field name" in malformed.json()["detail"]
+
+    assert client.get("/bugs/", params={"fields": "title,secret"}).status_code == 400
+    # Rejected before any query was built
+    assert queried == []
@@ -0,0 +1,147 @@
+"""
+The local mirror must answer like Endee: same ids, order and scores for a
+search, under the filters the app sends. scripts/fake_endee_server.py is the
+reference, since it implements Endee's filter semantics.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import config
+from app.services import local_vector_index
+from app.services.local_vector_index import LocalVectorIndex
+from app.services.clusters_service import bug_text
+from app.services.embeddings import embedding_service
+from scripts.fake_endee_server import create_app
+
+DIM = 384
+INDEX = "fixforge_bugs"
+STATUSES = ["Open", "Closed", "Solved"]
+SEVERITIES = ["Low", "Medium", "High"]
+
+FILTERS = [
+    None,
+    {"status": "Open"},
+    {"status": {"$ne": "Closed"}},
+    {"severity": {"$in": ["High", "Medium"]}},
+    {"status": {"$ne": "Solved"}, "severity": {"$in": ["Low"]}},
+    {"status": {"$in": []}},
+]
+
+
+def vectors(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "id": f"FF-{i:04d}",
+            "values": rng.normal(size=DIM).astype(np.float32).tolist(),
+            "metadata": {"status": STATUSES[i % 3], "severity": SEVERITIES[i // 3 % 3], "bug_id": f"FF-{i:04d}"},
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(scope="module")
+def endee():
+    client = TestClient(create_app())
+    client.post("/api/v1/index/create", json={"name": INDEX, "dimension": DIM})
+    return client
+
+
+def endee_search(endee, query, top_k, filters):
+    res = endee.post("/api/v1/vector/search", json={
+        "index": INDEX, "vector": query, "top_k": top_k, "include_metadata": True, "filter": filters,
+    })
+    res.raise_for_status()
+    return res.json()["matches"]
+
+
+def test_search_matches_endee(endee):
+    items = vectors(120)
+    endee.post("/api/v1/vector/upsert", json={"index": INDEX, "vectors": items}).raise_for_status()
+    index = LocalVectorIndex(dim=DIM, directory="")
+    index.upsert(items)
+
+    # Also delete a few on both sides, which moves rows around in the local matrix
+    gone = ["FF-0003", "FF-0050", "FF-0119"]
+    endee.post("/api/v1/vector/delete", json={"index": INDEX, "ids": gone}).raise_for_status()
+    assert index.delete(gone) == 3
+
+    for query in vectors(10, seed=11):
+        for filters in FILTERS:
+            for top_k in (1, 10, 200):
+                remote = endee_search(endee, query["values"], top_k, filters)
+                local = index.search(query["values"], top_k, filters)
+                assert [r["id"] for r in local] == [r["id"] for r in remote], filters
+                assert np.allclose([r["score"] for r in local], [r["score"] for r in remote], atol=1e-5)
+                assert [r["metadata"] for r in local] == [r["metadata"] for r in remote]
+
+
+def test_filters_select_expected_rows():
+    index = LocalVectorIndex(dim=DIM, directory="")
+    index.upsert(vectors(30))
+    query = vectors(1, seed=3)[0]["values"]
+
+    not_closed = index.search(query, 100, {"status": {"$ne": "Closed"}})
+    assert len(not_closed) == 20 and all(r["metadata"]["status"] != "Closed" for r in not_closed)
+    high_or_low = index.search(query, 100, {"severity": {"$in": ["High", "Low"]}})
+    assert {r["metadata"]["severity"] for r in high_or_low} <= {"High", "Low"}
+    assert index.search(query, 100, {"status": {"$in": []}}) == []
+
+
+class FakeBugsTable:
+    def __init__(self, rows):
+        self.rows = rows
+        self.bounds = (0, len(rows))
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        self.rows = sorted(self.rows, key=lambda r: r[column])
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows[slice(*self.bounds)])
+
+
+def test_bootstrap_from_supabase(monkeypatch, tmp_path):
+    stored = vectors(1, seed=5)[0]["values"]
+    rows = [
+        {"id": f"FF-{i:04d}", "title": f"Bug {i}", "description": "Crash on save", "severity": "High",
+         "client_type": "Web", "status": "Open", "tags": ["ui"], "created_at": "2026-10-17T00:00:00+00:00",
+         "embedding": stored if i % 2 else None, "embedding_384": None}
+        for i in range(5)
+    ]
+    encoded = []
+
+    def fake_encode(texts):
+        encoded.extend(texts)
+        return np.ones((len(texts), DIM), dtype=np.float32)
+
+    monkeypatch.setattr(config, "supabase", SimpleNamespace(table=lambda name: FakeBugsTable(rows)))
+    monkeypatch.setattr(embedding_service, "encode", fake_encode)
+
+    index = LocalVectorIndex(dim=DIM, directory=str(tmp_path))
+    # Written live before the bootstrap reached it: must not be replaced by the row
+    live = {"id": "FF-0000", "values": stored, "metadata": {"status": "Closed", "bug_id": "FF-0000"}}
+    index.upsert([live])
+
+    assert local_vector_index.bootstrap_from_supabase(index, page_size=2) == 4
+    assert len(index) == 5
+    # Only bugs without a stored vector were encoded, from the text they are embedded from
+    assert encoded == [bug_text(rows[2]), bug_text(rows[4])]
+    assert index.search(stored, 1, {"status": "Closed"})[0]["metadata"] == live["metadata"]
+    assert {r["id"] for r in index.search(stored, 10, {"status": "Open"})} == {f"FF-{i:04d}" for i in range(1, 5)}
+
+    # The snapshot now holds the mirror, so a restart starts full
+    restarted = LocalVectorIndex(dim=DIM, directory=str(tmp_path))
+    assert len(restarted) == 5
+    assert local_vector_index.bootstrap_from_supabase(restarted, page_size=2) == 0
@@ -0,0 +1,167 @@
+import io
+import base64
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+from fastapi import UploadFile
+
+from app.db.session import db
+from app.services import screenshots
+from app.services.screenshots import InvalidScreenshot, ScreenshotStore, prepare_screenshot, read_upload
+from app.utils.file_storage import LocalFileStorage
+
+
+def png(size=(2000, 1000), mode="RGB", color=(0, 128, 255)):
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+def upload(data):
+    return UploadFile(file=io.BytesIO(data), filename="shot.png")
+
+
+def decode(data):
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+class FakeScreenshots:
+    """The screenshots table: lookups by content_hash and upserts"""
+
+    def __init__(self):
+        self.rows = {}
+        self.filters = {}
+        self.upserts = []
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def limit(self, n):
+        return self
+
+    def upsert(self, row, on_conflict, ignore_duplicates, returning):
+        assert on_conflict == "content_hash" and ignore_duplicates
+        self.upserts.append(row)
+        self.rows.setdefault(row["content_hash"], row)
+        return self
+
+    async def execute(self):
+        row = self.rows.get(self.filters.pop("content_hash", None))
+        return SimpleNamespace(data=[row] if row else [])
+
+
+class CountingStorage(LocalFileStorage):
+    def __init__(self, root):
+        super().__init__(root, "http://files.test/screenshots")
+        self.puts = []
+        self.gets = []
+
+    async def put(self, path, data, content_type):
+        self.puts.append((path, content_type))
+        return await super().put(path, data, content_type)
+
+    async def get(self, path):
+        self.gets.append(path)
+        return await super().get(path)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    screenshots_table = FakeScreenshots()
+
+    def table(name):
+        assert name == "screenshots"
+        return screenshots_table
+
+    monkeypatch.setattr(db, "table", table)
+    return screenshots_table
+
+
+def make_store(tmp_path):
+    store = ScreenshotStore()
+    store.storage = CountingStorage(str(tmp_path))
+    return store
+
+
+def test_same_image_is_stored_once(table, tmp_path):
+    store = make_store(tmp_path)
+    data = png()
+    digest = hashlib.sha256(data).hexdigest()
+
+    async def scenario():
+        return await store.ingest(upload(data)), await store.ingest(upload(data))
+
+    first, again = asyncio.run(scenario())
+    assert first == again and len(table.upserts) == 1
+    assert first["content_hash"] == digest and first["size_bytes"] == len(data)
+    assert (first["width"], first["height"], first["content_type"]) == (2000, 1000, "image/png")
+    assert first["original_path"] == f"{digest[:2]}/{digest}/original.png"
+    assert first["original_url"] == f"http://files.test/screenshots/{first['original_path']}"
+    # The second upload was matched by hash: nothing decoded or uploaded again
+    assert sorted(store.storage.puts) == [(f"{digest[:2]}/{digest}/ai.jpg", "image/jpeg"),
+                                          (first["original_path"], "image/png")]
+    assert store.stats()["ingested"] == 1 and store.stats()["deduplicated"] == 1
+    assert (tmp_path / first["original_path"]).read_bytes() == data
+
+
+def test_ai_image_is_a_small_jpeg(table, tmp_path):
+    side = screenshots.SCREENSHOT_AI_MAX_SIDE
+    store = make_store(tmp_path)
+    row = asyncio.run(store.ingest(upload(png(size=(side * 2, side)))))
+
+    ai = base64.b64decode(asyncio.run(store.ai_image_base64(row["content_hash"])))
+    assert decode(ai).format == "JPEG" and decode(ai).size == (side, side // 2)
+    assert ai == (tmp_path / row["ai_path"]).read_bytes()
+    assert store.storage.gets == []  # cached at ingest
+
+    # Another process finds it through the table and reads it from storage once
+    other = make_store(tmp_path)
+    assert asyncio.run(other.ai_image_base64(row["content_hash"])) == base64.b64encode(ai).decode()
+    asyncio.run(other.ai_image_base64(row["content_hash"]))
+    assert other.storage.gets == [row["ai_path"]]
+    assert asyncio.run(other.ai_image_base64("0" * 64)) is None
+
+
+def test_transparent_screenshots_are_flattened_onto_white():
+    prepared = prepare_screenshot(png(size=(50, 50), mode="RGBA", color=(0, 0, 0, 0)))
+    assert decode(prepared["ai_jpeg"]).getpixel((25, 25)) >= (250, 250, 250)
+
+
+def test_unsupported_and_unreadable_images_are_rejected():
+    bmp = io.BytesIO()
+    Image.new("RGB", (10, 10)).save(bmp, "BMP")
+    with pytest.raises(InvalidScreenshot, match="Unsupported screenshot format: BMP"):
+        prepare_screenshot(bmp.getvalue())
+    with pytest.raises(InvalidScreenshot, match="can be read"):
+        prepare_screenshot(b"\x89PNG\r\n\x1a\n garbage")
+
+
+def test_upload_reads_stop_at_the_limit(monkeypatch):
+    monkeypatch.setattr(screenshots, "SCREENSHOT_CHUNK_SIZE", 1024)
+    data = bytes(range(256)) * 40
+    assert asyncio.run(read_upload(upload(data), max_bytes=len(data))) == (data, hashlib.sha256(data).hexdigest())
+
+    reads = []
+    big = upload(b"\0" * (10 * 1024 * 1024))
+    original_read = big.read
+
+    async def counted_read(size=-1):
+        reads.append(size)
+        return await original_read(size)
+
+    big.read = counted_read
+    with pytest.raises(InvalidScreenshot, match="smaller than 1MB"):
+        asyncio.run(read_upload(big, max_bytes=1024 * 1024))
+    # Gave up one chunk past the limit rather than reading the whole file
+    assert len(reads) == 1024 + 1
+    with pytest.raises(InvalidScreenshot, match="empty"):
+        asyncio.run(read_upload(upload(b"")))
@@ -0,0 +1,114 @@
+import gc
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db.session import db
+from app.routers import search
+from app.services.search_cache import SearchCache
+from app.services.embedding_batcher import embedding_batcher
+from app.services.endee_client import endee_service
+from app.services.lexical_index import lexical_index
+
+
+async def fake_embed(query):
+    return [0.0] * 384
+
+
+async def fake_vector_search(query_vector, top_k, metadata_filters=None):
+    return [{"id": "FF-1", "score": 0.9}, {"id": "FF-2", "score": 0.7}]
+
+
+def fake_lexical_search(query, top_k, filters=None):
+    return [{"id": "FF-3", "score": 12.5}, {"id": "FF-1", "score": 4.0}]
+
+
+def test_hybrid_scores_are_null_for_the_ranker_that_missed(monkeypatch):
+    monkeypatch.setattr(embedding_batcher, "embed_async", fake_embed)
+    monkeypatch.setattr(endee_service, "search_similar_bugs", fake_vector_search)
+    monkeypatch.setattr(lexical_index, "search", fake_lexical_search)
+
+    results = {r["id"]: r for r in asyncio.run(search._hybrid_search("NullPointerException", 3))}
+
+    assert results["FF-1"]["score"] == 0.9 and results["FF-1"]["lexical_score"] == 4.0
+    assert results["FF-2"]["score"] == 0.7 and results["FF-2"]["lexical_score"] is None
+    assert results["FF-3"]["score"] is None and results["FF-3"]["lexical_score"] == 12.5
+    assert all(r["fusion_score"] > 0 for r in results.values())
+
+
+def test_failed_embedding_leaves_no_unawaited_lexical_search(monkeypatch):
+    async def broken_embed(query):
+        raise RuntimeError("model unavailable")
+
+    def failing_lexical_search(query, top_k, filters=None):
+        time.sleep(0.05)
+        raise ValueError("index not loaded")
+
+    monkeypatch.setattr(embedding_batcher, "embed_async", broken_embed)
+    monkeypatch.setattr(lexical_index, "search", failing_lexical_search)
+    unhandled = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            await search._hybrid_search("NullPointerException", 3)
+        # Let the lexical side finish and fail
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    gc.collect()
+    assert unhandled == []
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self.rows = [r for r in self.rows if r[column] in values]
+        return self
+
+    async def execute(self):
+        return SimpleNamespace(data=[dict(r) for r in self.rows])
+
+
+def test_cached_ranking_serves_fresh_rows(monkeypatch):
+    tables = {
+        "bugs": [{"id": "FF-1", "votes": 1, "status": "Open"}, {"id": "FF-2", "votes": 0, "status": "Open"}],
+        "solutions": [],
+    }
+    searches = []
+
+    async def counting_vector_search(query_vector, top_k, metadata_filters=None):
+        searches.append(top_k)
+        return await fake_vector_search(query_vector, top_k, metadata_filters)
+
+    async def all_columns(*args, **kwargs):
+        return "*"
+
+    monkeypatch.setattr(search, "search_cache", SearchCache())
+    monkeypatch.setattr(search, "select_columns", all_columns)
+    monkeypatch.setattr(embedding_batcher, "embed_async", fake_embed)
+    monkeypatch.setattr(endee_service, "search_similar_bugs", counting_vector_search)
+    monkeypatch.setattr(db, "table", lambda name: FakeTable(tables[name]))
+    client = TestClient(app)
+
+    first = client.get("/search/semantic", params={"query": "Crash on save"}).json()
+    assert [(b["id"], b["votes"], b["solution_count"]) for b in first["bugs"]] == [("FF-1", 1, 0), ("FF-2", 0, 0)]
+
+    # Writes that don't touch the vector index (votes, solutions) don't invalidate the cache
+    tables["bugs"][0]["votes"] = 5
+    tables["solutions"].append({"id": "S-1", "bug_id": "FF-2"})
+    second = client.get("/search/semantic", params={"query": "crash  on SAVE"}).json()
+
+    assert searches == [10]
+    assert second["query"] == "crash  on SAVE"
+    assert [(b["id"], b["votes"], b["solution_count"]) for b in second["bugs"]] == [("FF-1", 5, 0), ("FF-2", 0, 1)]
+    assert second["bugs"][0]["similarity_score"] == 0.9
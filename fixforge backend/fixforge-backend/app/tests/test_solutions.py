@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db.session import db
+from app.services.entity_cache import bug_cache, user_cache
+
+PAYLOAD = {"bug_id": "FF-1", "title": "Fix", "explanation": "Because", "code": "pass", "user_id": "user-1"}
+
+
+class Trace:
+    """Records when each fake round trip starts and ends, to see which overlapped"""
+
+    def __init__(self):
+        self.events = []
+
+    async def call(self, name, result, delay=0.02):
+        self.events.append(("start", name))
+        await asyncio.sleep(delay)
+        self.events.append(("end", name))
+        return result
+
+    def overlapped(self, a, b):
+        starts = {name: i for i, (kind, name) in enumerate(self.events) if kind == "start"}
+        ends = {name: i for i, (kind, name) in enumerate(self.events) if kind == "end"}
+        return starts[a] < ends[b] and starts[b] < ends[a]
+
+
+class FakeQuery:
+    def __init__(self, trace, table, fail_insert=False):
+        self.trace = trace
+        self.table = table
+        self.op = "select"
+        self.fail_insert = fail_insert
+
+    def __getattr__(self, name):
+        def chain(*args, **kwargs):
+            if name in ("insert", "update", "upsert"):
+                self.op = name
+                self.row = args[0]
+            return self
+        return chain
+
+    async def execute(self):
+        name = f"{self.op} {self.table}"
+        if self.fail_insert and self.op == "insert":
+            return await self.trace.call(name, SimpleNamespace(data=[]))
+        return await self.trace.call(name, SimpleNamespace(data=[self.row] if self.op != "select" else []))
+
+
+def submit(monkeypatch, fail_insert=False):
+    trace = Trace()
+    monkeypatch.setattr(bug_cache, "exists", lambda bug_id: trace.call("bug exists", True))
+    monkeypatch.setattr(user_cache, "exists", lambda user_id: trace.call("user exists", True))
+    monkeypatch.setattr(db, "table", lambda name: FakeQuery(trace, name, fail_insert))
+    monkeypatch.setattr(db, "from_", lambda name: FakeQuery(trace, name, fail_insert))
+    res = TestClient(app).post("/solutions/", json=PAYLOAD)
+    return res, trace
+
+
+def test_submit_solution_runs_independent_queries_together(monkeypatch):
+    res, trace = submit(monkeypatch)
+
+    assert res.status_code == 200
+    assert res.json()["solution"]["bug_id"] == "FF-1"
+    # Three round trips on the critical path: the checks, the insert, then status and milestone
+    assert trace.overlapped("bug exists", "user exists")
+    assert trace.overlapped("update bugs", "upsert user_milestones")
+    order = [name for kind, name in trace.events if kind == "start"]
+    assert order.index("insert solutions") > order.index("user exists")
+    assert order.index("update bugs") > order.index("insert solutions")
+
+
+def test_failed_insert_does_not_mark_bug_solved(monkeypatch):
+    res, trace = submit(monkeypatch, fail_insert=True)
+
+    assert res.status_code == 500
+    assert ("start", "update bugs") not in trace.events
@@ -0,0 +1,119 @@
+import asyncio
+
+from app.services import vote_buffer as vote_buffer_module
+from app.services.vote_buffer import VoteBuffer
+
+
+class FlakyCounters:
+    """apply_bug_votes commits, then loses its response the first time"""
+
+    def __init__(self):
+        self.votes = {"FF-1": 0, "FF-2": 0}
+        self.batches = set()
+        self.calls = []
+        self.fail_next = True
+
+    async def apply_bug_votes(self, deltas, batch_id=None):
+        self.calls.append((dict(deltas), batch_id))
+        if batch_id not in self.batches:
+            self.batches.add(batch_id)
+            for bug_id, delta in deltas.items():
+                self.votes[bug_id] += delta
+        if self.fail_next:
+            self.fail_next = False
+            raise TimeoutError("response lost after commit")
+        return len(deltas)
+
+    async def apply_solution_upvotes(self, add, remove):
+        return 0
+
+
+def test_retried_bug_batch_is_applied_once(monkeypatch):
+    counters = FlakyCounters()
+    monkeypatch.setattr(vote_buffer_module, "counters", counters)
+
+    async def fake_bug(bug_id):
+        return {"id": bug_id, "votes": counters.votes[bug_id]}
+
+    monkeypatch.setattr(vote_buffer_module.bug_cache, "get", fake_bug)
+
+    async def scenario():
+        buffer = VoteBuffer(interval=3600)
+        for _ in range(3):
+            await buffer.upvote_bug("FF-1")
+        assert await buffer.flush() == 0
+        assert buffer.failed_flushes == 1
+        # Readers keep counting the unconfirmed batch
+        assert buffer.pending_bug_votes("FF-1") == 3
+
+        # Votes arriving before the retry go in a later batch
+        await buffer.upvote_bug("FF-1")
+        await buffer.upvote_bug("FF-2")
+        await buffer.flush()
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert counters.votes == {"FF-1": 4, "FF-2": 1}
+    first, retry, second = counters.calls
+    assert retry == first == ({"FF-1": 3}, first[1])
+    assert second[0] == {"FF-1": 1, "FF-2": 1} and second[1] != first[1]
+    assert buffer.pending() == 0
+
+
+class RejectingCounters:
+    """apply_bug_votes rejects any batch touching a deleted bug, every time"""
+
+    def __init__(self):
+        self.votes = {"FF-1": 0}
+        self.upvotes = set()
+        self.calls = []
+
+    async def apply_bug_votes(self, deltas, batch_id=None):
+        self.calls.append(dict(deltas))
+        if "FF-GONE" in deltas:
+            raise ValueError("bug FF-GONE no longer exists")
+        for bug_id, delta in deltas.items():
+            self.votes[bug_id] += delta
+        return len(deltas)
+
+    async def apply_solution_upvotes(self, add, remove):
+        self.upvotes.update(add)
+        self.upvotes.difference_update(remove)
+        return len(add) + len(remove)
+
+
+def test_rejected_bug_batch_is_dropped_after_retries(monkeypatch):
+    counters = RejectingCounters()
+    monkeypatch.setattr(vote_buffer_module, "counters", counters)
+
+    async def fake_get(entity_id):
+        return {"id": entity_id, "votes": 0}
+
+    monkeypatch.setattr(vote_buffer_module.bug_cache, "get", fake_get)
+    monkeypatch.setattr(vote_buffer_module.solution_cache, "get", fake_get)
+
+    async def scenario():
+        buffer = VoteBuffer(interval=3600, max_retries=2)
+        await buffer.upvote_bug("FF-GONE")
+        await buffer.upvote_bug("FF-1")
+        # Solution toggles don't wait on the failing bug batch
+        buffer._upvotes[("S-1", "user-1")] = True
+        buffer._solution_deltas["S-1"] = 1
+        await buffer.flush()
+        assert counters.upvotes == {("S-1", "user-1")}
+        assert buffer.pending_upvote("S-1", "user-1") is None
+
+        await buffer.upvote_bug("FF-1")
+        await buffer.flush()  # retry 1
+        assert buffer.pending_bug_votes("FF-1") == 2
+        await buffer.flush()  # retry 2 fails too, so the batch is dropped
+        assert buffer.pending_bug_votes("FF-1") == 1
+        await buffer.flush()  # and the later vote goes through
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert counters.calls == [{"FF-GONE": 1, "FF-1": 1}] * 3 + [{"FF-1": 1}]
+    assert counters.votes == {"FF-1": 1}
+    assert buffer.dropped_votes == 2 and buffer.failed_flushes == 3
+    assert buffer.pending() == 0
@@ -0,0 +1,72 @@
+"""
+Weak ETags from row versions, for the list endpoints the web client polls.
+
+A list's ETag hashes each row's (id, updated_at) instead of the response
+body, so it can be checked before anything is serialized; a poll whose rows
+haven't changed is answered 304 Not Modified with an empty body. updated_at
+is bumped on every update by the triggers in
+supabase/migrations/20261017150000_updated_at_triggers.sql (rows never
+updated since then fall back to created_at). Rows without an updated_at
+column are hashed by content.
+
+The tags are weak (W/"...") because the same rows may be sent gzip- or
+brotli-encoded, or not at all (app/core/compression.py).
+
+    etag = rows_etag(rows)
+    return json_with_etag(request, rows, etag)
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+# Cached copies must be revalidated on every use
+CACHE_CONTROL = "no-cache"
+
+
+def _version(row: Dict[str, Any]) -> bytes:
+    if "updated_at" in row:
+        return str(row["updated_at"] or row.get("created_at")).encode("utf-8")
+    return orjson.dumps(row, option=orjson.OPT_SORT_KEYS, default=str)
+
+
+def rows_etag(*row_lists: Iterable[Dict[str, Any]], key: str = "id", extra: str = "") -> str:
+    """Weak ETag over the ids and versions of one or more lists of rows"""
+    digest = hashlib.blake2b(extra.encode("utf-8"), digest_size=16)
+    for rows in row_lists:
+        digest.update(b"\x1e")
+        for row in rows:
+            digest.update(str(row.get(key)).encode("utf-8"))
+            digest.update(b"@")
+            digest.update(_version(row))
+            digest.update(b"\n")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check with weak comparison"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def etag_headers(etag: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    return {**(headers or {}), "ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag, headers))
+
+
+def json_with_etag(request: Request, content: Any, etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """304 if the client has this version, else the content as JSON with its ETag"""
+    if etag_matches(request, etag):
+        return not_modified(etag, headers)
+    return ORJSONResponse(content, headers=etag_headers(etag, headers))
@@ -0,0 +1,111 @@
+"""
+Sparse fieldsets for the read endpoints (`?fields=id,title,votes`).
+
+`fields=` is checked against the table's columns and becomes the PostgREST
+select list, so columns the client didn't ask for never leave the database.
+Without it an endpoint gets a lean default: every column except the heavy
+ones in HEAVY_COLUMNS (embedding vectors, code).
+
+Column names come from PostgREST's OpenAPI description, read once and
+refreshed every FIELDS_SCHEMA_TTL seconds, so new columns show up without
+code changes. If the description can't be read, defaults fall back to "*"
+and requested fields are passed through unchecked (PostgREST rejects
+unknown ones).
+
+    columns = await select_columns("bugs", fields, require=("id", "created_at"))
+    res = await db.table("bugs").select(columns)...
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.db.session import db
+
+logger = logging.getLogger(__name__)
+
+FIELDS_SCHEMA_TTL = float(os.getenv("FIELDS_SCHEMA_TTL", "300"))
+# After a failed schema read, retry no sooner than this
+FIELDS_SCHEMA_RETRY = 30.0
+
+# Left out of responses unless asked for by name
+HEAVY_COLUMNS: Dict[str, tuple] = {
+    "bugs": ("embedding", "embedding_384", "code"),
+    "solutions": (),
+}
+
+_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_columns: Optional[Dict[str, List[str]]] = None
+_loaded_at = float("-inf")
+_lock = asyncio.Lock()
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Field names from a fields= value, in order, without duplicates; raises ValueError"""
+    names: List[str] = []
+    for part in (fields or "").split(","):
+        name = part.strip()
+        if not name:
+            continue
+        if not _FIELD.match(name):
+            raise ValueError(f"Invalid field name: {name!r}")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+async def table_columns(table: str) -> Optional[List[str]]:
+    """The table's columns, or None if the schema is unavailable"""
+    global _columns, _loaded_at
+    if time.monotonic() - _loaded_at >= (FIELDS_SCHEMA_TTL if _columns is not None else FIELDS_SCHEMA_RETRY):
+        async with _lock:
+            if time.monotonic() - _loaded_at >= (FIELDS_SCHEMA_TTL if _columns is not None else FIELDS_SCHEMA_RETRY):
+                try:
+                    _columns = await db.table_columns()
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not read table columns, sparse fieldsets fall back to '*': {e}")
+                _loaded_at = time.monotonic()
+    return (_columns or {}).get(table)
+
+
+async def select_columns(
+    table: str,
+    fields: Optional[str] = None,
+    *,
+    exclude: Optional[Iterable[str]] = None,
+    require: Iterable[str] = ("id",),
+) -> str:
+    """
+    PostgREST select list for `table`: the requested fields plus `require`
+    (columns the endpoint itself needs), or every column but `exclude`
+    (default HEAVY_COLUMNS[table]) when no fields were requested.
+    Raises ValueError for malformed or unknown field names.
+    """
+    requested = parse_fields(fields)
+    known = await table_columns(table)
+
+    if requested:
+        if known is not None:
+            unknown = [name for name in requested if name not in known]
+            if unknown:
+                raise ValueError(f"Unknown fields for {table}: {unknown}")
+        extra = [name for name in require if name not in requested and (known is None or name in known)]
+        return ",".join(requested + extra)
+
+    if known is None:
+        return "*"
+    skipped = set(HEAVY_COLUMNS.get(table, ()) if exclude is None else exclude)
+    return ",".join(name for name in known if name not in skipped)
+
+
+def project(row: Dict[str, Any], fields: Optional[str], require: Iterable[str] = ("id",)) -> Dict[str, Any]:
+    """Apply fields= to a row that was already fetched in full (e.g. from an entity cache)"""
+    requested = parse_fields(fields)
+    if not requested:
+        return row
+    wanted = requested + [name for name in require if name not in requested]
+    return {name: row[name] for name in wanted if name in row}
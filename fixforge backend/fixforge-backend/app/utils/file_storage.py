@@ -0,0 +1,126 @@
+"""
+Blob storage for user-uploaded files (avatars, screenshots).
+
+FILE_STORAGE_BACKEND selects where objects go:
+    - supabase (default): a Supabase Storage bucket, through the pooled
+      async client in app.db.session
+    - local: files under FILE_STORAGE_DIR, which app.main serves at
+      FILE_STORAGE_URL_PATH; a stand-in for development without a project
+
+`file_storage` is the avatars bucket; open_storage() gives any other one.
+
+Callers write objects under content-addressed paths (the path includes a
+hash of the content), so an object never changes once written and is served
+with a year-long Cache-Control.
+
+    url = await file_storage.put("avatars/u1/3f2a.../128.webp", data, "image/webp")
+"""
+
+import os
+import threading
+from typing import Iterable
+
+from app.core.executors import run_blocking
+from app.db.session import db
+
+FILE_STORAGE_BACKEND = os.getenv("FILE_STORAGE_BACKEND", "supabase").lower()
+FILE_STORAGE_BUCKET = os.getenv("FILE_STORAGE_BUCKET", "avatars")
+FILE_STORAGE_DIR = os.getenv("FILE_STORAGE_DIR", "media")
+FILE_STORAGE_URL_PATH = "/media"
+FILE_STORAGE_PUBLIC_URL = os.getenv("FILE_STORAGE_PUBLIC_URL", f"http://localhost:8000{FILE_STORAGE_URL_PATH}")
+
+# Objects are immutable, so browsers and CDNs may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class SupabaseFileStorage:
+    """Objects in a Supabase Storage bucket"""
+
+    def __init__(self, bucket: str = FILE_STORAGE_BUCKET):
+        self.bucket = bucket
+
+    async def put(self, path: str, data: bytes, content_type: str) -> str:
+        bucket = db.storage.from_(self.bucket)
+        await bucket.upload(path, data, {
+            "content-type": content_type,
+            "cache-control": str(IMMUTABLE_MAX_AGE),
+            # Same path means same content, so re-uploading is harmless
+            "upsert": "true",
+        })
+        return (await bucket.get_public_url(path)).rstrip("?")
+
+    async def get(self, path: str) -> bytes:
+        return await db.storage.from_(self.bucket).download(path)
+
+    async def delete(self, paths: Iterable[str]) -> None:
+        paths = list(paths)
+        if paths:
+            await db.storage.from_(self.bucket).remove(paths)
+
+
+class LocalFileStorage:
+    """Objects as files under a directory, served by app.main"""
+
+    def __init__(self, root: str = FILE_STORAGE_DIR, public_url: str = FILE_STORAGE_PUBLIC_URL):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url.rstrip("/")
+
+    def _file(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if not full.startswith(self.root + os.sep):
+            raise ValueError(f"Path escapes the storage directory: {path!r}")
+        return full
+
+    def _write(self, path: str, data: bytes) -> None:
+        full = self._file(path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        # Write then rename, so a reader never sees a partial file
+        tmp = f"{full}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, full)
+
+    def _read(self, path: str) -> bytes:
+        with open(self._file(path), "rb") as f:
+            return f.read()
+
+    def _remove(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            full = self._file(path)
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                pass
+            # Drop directories left empty, up to the root
+            parent = os.path.dirname(full)
+            while parent != self.root:
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    break
+                parent = os.path.dirname(parent)
+
+    async def put(self, path: str, data: bytes, content_type: str) -> str:
+        await run_blocking(self._write, path, data)
+        return f"{self.public_url}/{path}"
+
+    async def get(self, path: str) -> bytes:
+        return await run_blocking(self._read, path)
+
+    async def delete(self, paths: Iterable[str]) -> None:
+        await run_blocking(self._remove, list(paths))
+
+
+def uses_local_storage() -> bool:
+    return FILE_STORAGE_BACKEND == "local"
+
+
+def open_storage(bucket: str):
+    """Storage for a bucket; the local backend keeps each bucket in a subdirectory"""
+    if uses_local_storage():
+        return LocalFileStorage(os.path.join(FILE_STORAGE_DIR, bucket), f"{FILE_STORAGE_PUBLIC_URL}/{bucket}")
+    return SupabaseFileStorage(bucket)
+
+
+# Singleton instance
+file_storage = open_storage(FILE_STORAGE_BUCKET)
@@ -0,0 +1,45 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row on a page, (created_at, id),
+encoded as URL-safe base64 JSON. The next page is every row strictly after
+it in (created_at DESC, id DESC) order, which stays correct while rows are
+inserted and costs the same on page 1000 as on page 1.
+"""
+
+import json
+import base64
+from typing import Any, Dict, Optional, Tuple
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    payload = json.dumps({"c": row["created_at"], "i": row["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return (created_at, id); raises ValueError for a malformed cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(data["c"]), str(data["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _quote(value: str) -> str:
+    # PostgREST logic trees need reserved characters (':', ',', '.') in quoted values
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_after(query, cursor: Optional[str]):
+    """
+    Order a PostgREST query by (created_at DESC, id DESC) and, given a cursor,
+    restrict it to rows after that position
+    """
+    query = query.order("created_at", desc=True).order("id", desc=True)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        c, i = _quote(created_at), _quote(row_id)
+        query = query.or_(f"created_at.lt.{c},and(created_at.eq.{c},id.lt.{i})")
+    return query
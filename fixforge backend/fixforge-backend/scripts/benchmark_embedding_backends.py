@@ -0,0 +1,143 @@
+"""
+Parity check and latency/throughput comparison of the embedding backends.
+
+Encodes the same corpus with the PyTorch SentenceTransformer (reference) and
+the ONNX fp32 / int8 backends, then reports:
+    - cosine agreement with the reference (min / mean / p1)
+    - top-5 neighbour overlap within the corpus (what Endee search would see)
+    - single-text latency (p50 / p95) and batched throughput
+
+Exits non-zero if any backend's minimum cosine falls below --min-cosine.
+
+Usage:
+    python scripts/export_onnx_embedding_model.py
+    python scripts/benchmark_embedding_backends.py
+    python scripts/benchmark_embedding_backends.py --from-db --limit 2000 --min-cosine 0.98
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.embeddings import EMBED_MODEL, EMBED_DIM
+from app.services.embedding_backends import TorchBackend, OnnxBackend
+
+SAMPLE_BUGS = [
+    "TypeError: Cannot read properties of undefined (reading 'map') in Dashboard",
+    "Login button does nothing on Safari iOS 17 after entering credentials",
+    "CORS error when calling /bugs/submit from localhost:5173",
+    "Segmentation fault in native image resize module on large PNG uploads",
+    "React useEffect runs twice in development and duplicates API requests",
+    "Supabase insert fails with 409 conflict on duplicate primary key",
+    "Dark mode toggle resets after page refresh",
+    "Memory leak in websocket reconnect loop after network drop",
+    "Python ModuleNotFoundError: No module named 'sentence_transformers' in Docker",
+    "Gemini API returns 503 overloaded for large prompts with screenshots",
+    "Pagination skips items when new bugs are inserted between page loads",
+    "KeyError: 'created_at' when listing activities for new users",
+]
+
+
+def load_corpus(from_db: bool, limit: int):
+    if not from_db:
+        # Cheap augmentation so throughput numbers are not dominated by a dozen strings
+        return [f"{text} severity {sev} client {client}"
+                for text in SAMPLE_BUGS
+                for sev in ("Low", "Medium", "High", "Critical")
+                for client in ("Web", "Android", "iOS", "Desktop")]
+
+    from app.core.config import supabase
+    res = supabase.table("bugs").select("title, description, severity, client_type, tags").limit(limit).execute()
+    return [
+        f"{b['title']} {b['description']} {b['severity']} {b['client_type']} {' '.join(b.get('tags') or [])}"
+        for b in (res.data or [])
+    ]
+
+
+def measure(backend, corpus, batch_size, single_runs):
+    start = time.perf_counter()
+    vectors = backend.encode(corpus, batch_size=batch_size)
+    throughput = len(corpus) / (time.perf_counter() - start)
+
+    latencies = []
+    for text in corpus[:single_runs]:
+        t0 = time.perf_counter()
+        backend.encode([text])
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+
+    return np.asarray(vectors, dtype=np.float32), {
+        "throughput": throughput,
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+    }
+
+
+def top_k_overlap(reference, candidate, k=5):
+    ref_sims = reference @ reference.T
+    cand_sims = candidate @ candidate.T
+    np.fill_diagonal(ref_sims, -np.inf)
+    np.fill_diagonal(cand_sims, -np.inf)
+    k = min(k, len(reference) - 1)
+    ref_top = np.argpartition(-ref_sims, k, axis=1)[:, :k]
+    cand_top = np.argpartition(-cand_sims, k, axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare torch vs ONNX embedding backends")
+    parser.add_argument("--from-db", action="store_true", help="Use bug texts from Supabase as the corpus")
+    parser.add_argument("--limit", type=int, default=1000, help="Max bugs to load with --from-db")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--single-runs", type=int, default=100, help="Single-text latency samples")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail if any backend drops below this")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.from_db, args.limit)
+    print(f"🔵 Corpus: {len(corpus)} texts")
+
+    backends = [("torch", lambda: TorchBackend(EMBED_MODEL)),
+                ("onnx", lambda: OnnxBackend(quantized=False)),
+                ("onnx-int8", lambda: OnnxBackend(quantized=True))]
+
+    reference = None
+    failed = False
+    print(f"\n{'backend':<10} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'cos min':>8} {'cos mean':>9} {'top5':>6}")
+    for name, factory in backends:
+        try:
+            backend = factory()
+        except Exception as e:
+            print(f"{name:<10} ⚠️ unavailable: {e}")
+            continue
+
+        backend.encode(corpus[:8])  # warm up
+        vectors, perf = measure(backend, corpus, args.batch_size, args.single_runs)
+        assert vectors.shape[1] == EMBED_DIM, f"{name} produced {vectors.shape[1]}-dim vectors"
+
+        if reference is None:
+            reference = vectors
+        cosines = np.sum(reference * vectors, axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(vectors, axis=1)
+        )
+        overlap = top_k_overlap(reference, vectors)
+        print(f"{name:<10} {perf['throughput']:9.1f} {perf['p50']:8.2f} {perf['p95']:8.2f} "
+              f"{cosines.min():8.4f} {cosines.mean():9.4f} {overlap:6.2f}")
+
+        if cosines.min() < args.min_cosine:
+            failed = True
+
+    if failed:
+        print(f"\n❌ Parity check failed: cosine below {args.min_cosine}")
+        sys.exit(1)
+    print("\n✅ Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: one-at-a-time encodes vs the micro-batching EmbeddingBatcher.
+
+Simulates N concurrent request threads, each embedding single unique texts
+(so the embedding cache never hits), and reports throughput and latency for
+both paths.
+
+Usage:
+    python scripts/benchmark_embedding_batching.py
+    python scripts/benchmark_embedding_batching.py --concurrency 32 --requests 2000 --max-batch 64 --max-wait-ms 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.embeddings import EmbeddingService
+from app.services.embedding_batcher import EmbeddingBatcher
+
+SAMPLE = (
+    "TypeError: Cannot read properties of undefined (reading 'map') in Dashboard "
+    "after login on Chrome, severity High, client Web"
+)
+
+
+def unique_texts(n):
+    return [f"{SAMPLE} {uuid.uuid4().hex}" for _ in range(n)]
+
+
+def run(label, fn, texts, concurrency):
+    latencies = []
+
+    def timed(text):
+        start = time.perf_counter()
+        fn(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, texts))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"\n📊 {label}")
+    print(f"   throughput: {len(texts) / elapsed:8.1f} texts/s")
+    print(f"   latency p50: {statistics.median(latencies):7.1f} ms")
+    print(f"   latency p95: {latencies[int(len(latencies) * 0.95) - 1]:7.1f} ms")
+    return len(texts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single vs micro-batched embedding throughput")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent request threads")
+    parser.add_argument("--requests", type=int, default=1000, help="Texts to embed per run")
+    parser.add_argument("--max-batch", type=int, default=32, help="Batcher max batch size")
+    parser.add_argument("--max-wait-ms", type=float, default=5, help="Batcher max wait in ms")
+    args = parser.parse_args()
+
+    service = EmbeddingService()
+    print(f"🔵 Loading {service.model_name}...")
+    service.warmup()
+    service.encode(unique_texts(8))
+
+    # Baseline: what the routes did before, one model.encode per request
+    baseline = run(
+        "one-at-a-time model.encode",
+        lambda t: service.backend.encode([t]),
+        unique_texts(args.requests),
+        args.concurrency,
+    )
+
+    batcher = EmbeddingBatcher(service, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+    batched = run("micro-batched EmbeddingBatcher", batcher.embed, unique_texts(args.requests), args.concurrency)
+
+    stats = batcher.stats()
+    print(f"\n   batches: {stats['batches']}, avg batch size: {stats['avg_batch_size']}")
+    print(f"\n✅ Speedup: {batched / baseline:.2f}x at concurrency {args.concurrency}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark Endee search latency under concurrency against the local fake server.
+
+Starts scripts/fake_endee_server.py in a subprocess (with artificial latency),
+seeds it with random vectors, then compares:
+    - requests.Session from a thread pool (the previous blocking client)
+    - AsyncEndeeClient (pooled, keep-alive httpx.AsyncClient) via asyncio.gather
+
+Usage:
+    python scripts/benchmark_endee_client.py
+    python scripts/benchmark_endee_client.py --concurrency 200 --requests 5000 --latency-ms 10
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+INDEX = "fixforge_bench"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, latency_ms: float) -> subprocess.Popen:
+    # Separate process so the server doesn't compete with the clients for the GIL
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_endee_server.py")
+    server = subprocess.Popen([
+        sys.executable, script, "--port", str(port), "--latency-ms", str(latency_ms)
+    ])
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/api/v1/index/list", timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Fake Endee server did not start")
+
+
+def report(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    pct = lambda p: latencies[max(0, int(len(latencies) * p) - 1)]
+    print(f"\n📊 {label}")
+    print(f"   throughput: {len(latencies) / elapsed:8.1f} req/s")
+    print(f"   p50 {statistics.median(latencies):6.1f} ms | p95 {pct(0.95):6.1f} ms | p99 {pct(0.99):6.1f} ms")
+    return len(latencies) / elapsed
+
+
+def bench_requests(base_url, queries, concurrency):
+    session = requests.Session()
+    latencies = []
+
+    def one(q):
+        start = time.perf_counter()
+        session.post(f"{base_url}/api/v1/vector/search",
+                     json={"index": INDEX, "vector": q, "top_k": 10, "include_metadata": True})
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    return report(f"requests.Session, {concurrency} threads", latencies, time.perf_counter() - start)
+
+
+async def bench_async(client, queries, concurrency):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(q):
+        async with sem:
+            start = time.perf_counter()
+            await client.search_similar(q, top_k=10)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await one(queries[0])  # verify index + open pool outside the timed run
+    latencies.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*[one(q) for q in queries])
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return report(f"AsyncEndeeClient, {concurrency} concurrent (http2={client.http2})", latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endee client latency under concurrency")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--vectors", type=int, default=2000, help="Vectors to seed")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Fake server latency per request")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, args.latency_ms)
+    print(f"🔵 Fake Endee on {base_url} ({args.latency_ms}ms latency)")
+
+    rng = np.random.default_rng(42)
+    requests.post(f"{base_url}/api/v1/index/create", json={"name": INDEX, "dimension": 384})
+    for i in range(0, args.vectors, 500):
+        requests.post(f"{base_url}/api/v1/vector/upsert", json={"index": INDEX, "vectors": [
+            {"id": f"FF-{j}", "values": rng.random(384).tolist(), "metadata": {"status": "Open"}}
+            for j in range(i, min(i + 500, args.vectors))
+        ]})
+    queries = [rng.random(384).tolist() for _ in range(args.requests)]
+
+    baseline = bench_requests(base_url, queries, args.concurrency)
+
+    os.environ["ENDEE_URL"] = base_url
+    os.environ["ENDEE_INDEX"] = INDEX
+    from app.services.endee_client import AsyncEndeeClient
+    pooled = asyncio.run(bench_async(AsyncEndeeClient(), queries, args.concurrency))
+
+    print(f"\n✅ Async client throughput: {pooled / baseline:.2f}x the blocking client")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
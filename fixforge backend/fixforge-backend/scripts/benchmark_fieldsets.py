@@ -0,0 +1,104 @@
+"""
+Bytes per request for GET /bugs/ with and without sparse fieldsets.
+
+Starts scripts/fake_postgrest_server.py --heavy in a subprocess (bugs carry
+768-d and 384-d embeddings and a code snippet, like the real rows) and calls
+the app in-process through httpx's ASGI transport. Each page is fetched three
+ways:
+    - full rows: select=* (what every read endpoint did before fields=)
+    - lean default: no fields=, heavy columns left out
+    - fields=id,title,status,votes: what the bug list view renders
+and the response sizes are reported both uncompressed and gzip-encoded,
+along with the mean request latency.
+
+Usage:
+    python scripts/benchmark_fieldsets.py
+    python scripts/benchmark_fieldsets.py --limit 200 --requests 50 --latency-ms 5
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.benchmark_supabase_client import free_port, start_server
+
+
+async def measure(client, params, encoding, requests_count):
+    sizes, elapsed = [], 0.0
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        res = await client.get("/bugs/", params=params, headers={"Accept-Encoding": encoding})
+        elapsed += time.perf_counter() - start
+        res.raise_for_status()
+        # num_bytes_downloaded counts the body as sent, before httpx decodes it
+        sizes.append(res.num_bytes_downloaded)
+    return sum(sizes) / len(sizes), elapsed / requests_count * 1000
+
+
+async def run(limit, requests_count):
+    import httpx
+    from app.main import app
+    from app.db.session import db
+    from app.utils import fields
+
+    await db.start()
+    transport = httpx.ASGITransport(app=app)
+    base_params = {"limit": str(limit), "include": ""}
+    modes = (
+        ("full rows (select=*)", base_params, ()),
+        ("lean default", base_params, None),
+        ("fields=id,title,status,votes", {**base_params, "fields": "id,title,status,votes"}, None),
+    )
+    results = []
+    heavy = fields.HEAVY_COLUMNS["bugs"]
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for label, params, exclude in modes:
+                # An empty exclusion list selects every column, as select("*") did
+                fields.HEAVY_COLUMNS["bugs"] = heavy if exclude is None else exclude
+                with contextlib.redirect_stdout(io.StringIO()):
+                    identity, latency = await measure(client, params, "identity", requests_count)
+                    gzipped, _ = await measure(client, params, "gzip", requests_count)
+                results.append((label, identity, gzipped, latency))
+    finally:
+        fields.HEAVY_COLUMNS["bugs"] = heavy
+        await db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response size of GET /bugs/ with sparse fieldsets")
+    parser.add_argument("--bugs", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50, help="Bugs per page")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per mode")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake server latency per request")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, args.latency_ms, args.bugs, "--heavy")
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark-service-key")
+    try:
+        from app.db import session
+        session.db.url = base_url
+        results = asyncio.run(run(args.limit, args.requests))
+    finally:
+        server.terminate()
+
+    full = results[0][1]
+    print(f"\n📊 GET /bugs/?limit={args.limit}, {args.requests} requests per mode")
+    for label, identity, gzipped, latency in results:
+        print(f"   {label:32s} {identity / 1024:9.1f} KiB | gzip {gzipped / 1024:8.1f} KiB | "
+              f"{latency:6.1f} ms | {full / identity:5.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the in-process BM25 index used by /search/semantic?mode=hybrid.
+
+Builds a LexicalIndex over synthetic bug reports (stack-trace symbols, error
+codes, tags and filler words with a Zipf-like distribution) and reports build
+time, memory-relevant sizes and query latency, with and without a status
+filter.
+
+Usage:
+    python scripts/benchmark_lexical_index.py
+    python scripts/benchmark_lexical_index.py --docs 1000000 --queries 500
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.lexical_index import LexicalIndex
+
+PACKAGES = ["java.lang", "org.springframework.beans", "android.view", "os.path", "django.db.models",
+            "react.dom", "std", "tokio.runtime", "numpy.linalg", "com.fixforge.api"]
+ERRORS = ["NullPointerException", "IllegalStateException", "KeyError", "TypeError", "ECONNREFUSED",
+          "SegmentationFault", "OutOfMemoryError", "IndexOutOfBoundsException", "TimeoutError"]
+WORDS = ["crash", "login", "button", "page", "fails", "when", "after", "upload", "screen", "click",
+         "mobile", "slow", "error", "user", "save", "profile", "dark", "mode", "api", "request",
+         "the", "on", "and", "is", "not", "with", "loading", "blank", "safari", "chrome"]
+TAGS = ["frontend", "backend", "android", "ios", "auth", "payments", "ui", "performance"]
+
+
+def synthetic_bug(rng: random.Random) -> str:
+    words = [rng.choice(WORDS[:int(len(WORDS) * rng.random()) + 1]) for _ in range(rng.randint(15, 60))]
+    symbol = f"{rng.choice(PACKAGES)}.{rng.choice(ERRORS)}"
+    frames = " ".join(f"at {rng.choice(PACKAGES)}.Handler{rng.randint(0, 5000)}.run" for _ in range(rng.randint(0, 4)))
+    return f"{' '.join(words[:8])}\n{symbol}: code {rng.randint(100, 99999)} {' '.join(words[8:])} {frames}\n" \
+           f"{' '.join(rng.sample(TAGS, 2))}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 lexical index benchmark")
+    parser.add_argument("--docs", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=40)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = LexicalIndex()
+    statuses = ["Open", "In Progress", "Solved"]
+
+    print(f"🔵 Indexing {args.docs} synthetic bugs...")
+    start = time.perf_counter()
+    batch = []
+    for i in range(args.docs):
+        batch.append((f"FF-{i:08x}", synthetic_bug(rng), {"status": rng.choice(statuses), "severity": "High"}))
+        if len(batch) == 10000:
+            index.upsert(batch)
+            batch = []
+    index.upsert(batch)
+    print(f"✅ Built in {time.perf_counter() - start:.1f}s: {index.stats()}")
+
+    queries = [
+        f"{rng.choice(ERRORS)} in {rng.choice(PACKAGES)}.Handler{rng.randint(0, 5000)}.run"
+        if i % 2 else f"{rng.choice(WORDS)} {rng.choice(WORDS)} code {rng.randint(100, 99999)}"
+        for i in range(args.queries)
+    ]
+    for label, filters in (("no filter", None), ("status != Solved", {"status": {"$ne": "Solved"}})):
+        latencies = []
+        for q in queries:
+            t = time.perf_counter()
+            index.search(q, args.top_k, filters)
+            latencies.append((time.perf_counter() - t) * 1000)
+        latencies.sort()
+        print(f"📊 {label}: p50 {statistics.median(latencies):.2f} ms | "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms | max {latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
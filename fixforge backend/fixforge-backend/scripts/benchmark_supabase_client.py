@@ -0,0 +1,134 @@
+"""
+Benchmark Supabase reads under concurrency against the local fake PostgREST.
+
+Starts scripts/fake_postgrest_server.py in a subprocess (with artificial
+latency) and runs the same row lookups the routers make, comparing:
+    - the sync supabase client on the I/O thread pool via run_blocking
+      (how the routers queried before app.db.session)
+    - the async `db` client (sharded keep-alive httpx pools)
+
+Usage:
+    python scripts/benchmark_supabase_client.py
+    python scripts/benchmark_supabase_client.py --concurrency 100 --requests 5000 --latency-ms 10
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+import requests
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, latency_ms: float, bugs: int, *extra_args: str) -> subprocess.Popen:
+    # Separate process so the server doesn't compete with the clients for the GIL
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_postgrest_server.py")
+    server = subprocess.Popen([
+        sys.executable, script, "--port", str(port), "--latency-ms", str(latency_ms), "--bugs", str(bugs), *extra_args
+    ])
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/rest/v1/bugs", params={"limit": "1"}, timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Fake PostgREST server did not start")
+
+
+def report(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    pct = lambda p: latencies[max(0, int(len(latencies) * p) - 1)]
+    print(f"\n📊 {label}")
+    print(f"   throughput: {len(latencies) / elapsed:8.1f} req/s")
+    print(f"   p50 {statistics.median(latencies):6.1f} ms | p95 {pct(0.95):6.1f} ms | p99 {pct(0.99):6.1f} ms")
+    return len(latencies) / elapsed
+
+
+def lookup(client, i: int, bugs: int):
+    """Alternate a bug row lookup and a solutions-for-bug lookup"""
+    bug_id = f"FF-{i % bugs:08x}"
+    if i % 2:
+        return client.table("solutions").select("id, bug_id, votes").eq("bug_id", bug_id)
+    return client.table("bugs").select("*").eq("id", bug_id)
+
+
+async def run(label, query, total, concurrency):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            res = await query(i)
+            assert res.data, f"empty result for request {i}"
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*[one(i) for i in range(concurrency)])  # warm up pools/threads
+    latencies.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(total)])
+    return report(label, latencies, time.perf_counter() - start)
+
+
+async def bench(total, concurrency, bugs):
+    from app.core.config import supabase
+    from app.core.executors import run_blocking, IO_POOL_WORKERS
+    from app.db.session import db
+
+    before = await run(
+        f"sync client via run_blocking ({IO_POOL_WORKERS} I/O threads), {concurrency} concurrent",
+        lambda i: run_blocking(lookup(supabase, i, bugs).execute),
+        total, concurrency,
+    )
+
+    await db.start()
+    try:
+        after = await run(
+            f"async db client, {concurrency} concurrent",
+            lambda i: lookup(db, i, bugs).execute(),
+            total, concurrency,
+        )
+    finally:
+        await db.close()
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supabase client throughput under concurrency")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--bugs", type=int, default=1000, help="Bugs to seed")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake server latency per request (a cloud round-trip)")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, args.latency_ms, args.bugs)
+    print(f"🔵 Fake PostgREST on {base_url} ({args.latency_ms}ms latency)")
+
+    # Both clients read their URL and key from the environment at import time
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark-service-key")
+    try:
+        before, after = asyncio.run(bench(args.requests, args.concurrency, args.bugs))
+        print(f"\n✅ Async client throughput: {after / before:.2f}x the thread-pool client")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Stress benchmark for the write-behind vote buffer under a skewed workload.
+
+Starts scripts/fake_postgrest_server.py in a subprocess and fires upvotes at
+the real endpoint functions (upvote_bug, toggle_upvote) from 100 concurrent
+clients. Targets follow a Zipf distribution, so a few hot bugs and
+solutions get most of the votes. The run is done twice:
+    - write-through: every vote is its own counter RPC (VOTE_BUFFER_ENABLED=false)
+    - write-behind: votes go through app.services.vote_buffer
+It reports votes/s and database write statements/s (counted by the fake
+server), and checks that both runs leave the same vote totals.
+
+Usage:
+    python scripts/benchmark_vote_buffer.py
+    python scripts/benchmark_vote_buffer.py --votes 50000 --skew 1.1 --flush-interval 0.5
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+
+import numpy as np
+import requests
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.benchmark_supabase_client import free_port, start_server
+
+
+def workload(votes: int, bugs: int, users: int, skew: float, solution_share: float, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    # Zipf ranks, folded onto the entity range and shuffled so hot ids aren't just the first ones
+    hot = rng.permutation(bugs)
+    ranks = (rng.zipf(skew, size=votes) - 1) % bugs
+    targets = hot[ranks]
+    is_solution = rng.random(votes) < solution_share
+    voters = rng.integers(0, users, size=votes)
+    return [
+        ("solution", f"sol-{t}-0", f"user-{u}") if s else ("bug", f"FF-{t:08x}", None)
+        for t, s, u in zip(targets, is_solution, voters)
+    ]
+
+
+def totals(base_url: str):
+    bugs = requests.get(f"{base_url}/rest/v1/bugs", params={"select": "votes"}).json()
+    solutions = requests.get(f"{base_url}/rest/v1/solutions", params={"select": "votes"}).json()
+    return sum(b["votes"] for b in bugs), sum(s["votes"] for s in solutions)
+
+
+def write_statements(base_url: str) -> int:
+    return requests.get(f"{base_url}/__stats").json()["write_statements"]
+
+
+async def run(label, base_url, ops, concurrency, buffered, flush_interval):
+    from app.api import bugs, solutions
+    from app.api.solutions import UpvoteRequest
+    from app.db.session import db
+    from app.services.vote_buffer import vote_buffer
+    from app.services.entity_cache import bug_cache, solution_cache
+
+    bug_cache.clear()
+    solution_cache.clear()
+    bugs.VOTE_BUFFER_ENABLED = solutions.VOTE_BUFFER_ENABLED = buffered
+    vote_buffer.interval = flush_interval
+    await db.start()
+    if buffered:
+        vote_buffer.start()
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(kind, target, user):
+        async with sem:
+            if kind == "bug":
+                await bugs.upvote_bug(target)
+            else:
+                await solutions.toggle_upvote(target, UpvoteRequest(user_id=user))
+
+    writes_before = write_statements(base_url)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the endpoints print per vote
+        await asyncio.gather(*[one(*op) for op in ops])
+        if buffered:
+            await vote_buffer.close()
+    elapsed = time.perf_counter() - start
+    await db.close()
+
+    writes = write_statements(base_url) - writes_before
+    print(f"\n📊 {label}")
+    print(f"   votes:       {len(ops) / elapsed:8.1f} /s ({len(ops)} in {elapsed:.1f}s)")
+    print(f"   DB writes:   {writes / elapsed:8.1f} /s ({writes} statements)")
+    if buffered:
+        print(f"   buffer:      {vote_buffer.stats()}")
+    return writes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vote write-behind buffer under a skewed workload")
+    parser.add_argument("--votes", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--bugs", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--skew", type=float, default=1.2, help="Zipf exponent (higher = hotter hot spots)")
+    parser.add_argument("--solution-share", type=float, default=0.3, help="Fraction of votes that are solution toggles")
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake server latency per request")
+    args = parser.parse_args()
+
+    ops = workload(args.votes, args.bugs, args.users, args.skew, args.solution_share)
+    hottest = max(set(op[1] for op in ops), key=[op[1] for op in ops].count)
+    print(f"🔵 {args.votes} votes, Zipf {args.skew}; hottest target {hottest} gets "
+          f"{sum(op[1] == hottest for op in ops) / len(ops):.0%}")
+
+    results = {}
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark-service-key")
+    for label, buffered in (("write-through (counter RPC per vote)", False), ("write-behind (vote_buffer)", True)):
+        # Fresh server per run so both start from the same vote totals
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.latency_ms, args.bugs)
+        os.environ["SUPABASE_URL"] = base_url
+        try:
+            from app.db import session
+            session.db.url = base_url  # the singleton was created for the first run's server
+            results[buffered] = (
+                asyncio.run(run(label, base_url, ops, args.concurrency, buffered, args.flush_interval)),
+                totals(base_url),
+            )
+        finally:
+            server.terminate()
+
+    (direct_wps, direct_totals), (buffered_wps, buffered_totals) = results[False], results[True]
+    print(f"\n✅ DB writes/s: {direct_wps:.1f} -> {buffered_wps:.1f} ({direct_wps / max(buffered_wps, 1e-9):.0f}x fewer)")
+    print(f"   vote totals (bugs, solutions): write-through {direct_totals}, write-behind {buffered_totals}"
+          f" -> {'match' if direct_totals == buffered_totals else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ from collections import Counter
 
 import numpy as np
 from sklearn.cluster import KMeans
-from sentence_transformers import SentenceTransformer
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Try to reuse your existing supabase client; fallback to creating one from env vars
 try:
@@ -22,14 +24,13 @@ except Exception:
         raise RuntimeError("Set SUPABASE_URL and SUPABASE_KEY environment variables or provide app.core.config.supabase.")
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+from app.services.embeddings import embedding_service
+
 # Config
-MODEL_NAME = os.environ.get("EMBED_MODEL", "all-MiniLM-L6-v2")
 DIM = 384
 DEFAULT_K = int(os.environ.get("CLUSTER_K", "6"))
 STATUS_FILTER = os.environ.get("BUG_STATUS_FILTER", "Solved")  # change if needed
 
-model = SentenceTransformer(MODEL_NAME)
-
 
 def fetch_bugs(status=None):
     print("DEBUG: fetch_bugs called with status:", repr(status))
@@ -75,7 +76,7 @@ def ensure_embedding(bug):
         parts.append(tags)
 
     text = " ".join([p for p in parts if p])
-    vec = model.encode(text).tolist()
+    vec = embedding_service.encode_one(text)
     vec = [float(x) for x in vec]
 
     # write back to DB; tolerate client variations
@@ -0,0 +1,98 @@
+"""
+Check that the event loop stays responsive during a /bugs/submit burst.
+
+Fires a burst of concurrent bug submissions at a running backend while a
+probe polls GET /health every few milliseconds. If submit handlers blocked
+the loop (inline model.encode, synchronous Supabase/Endee calls), /health
+latency would climb to the length of those calls; with the executor layer
+it stays near the idle baseline.
+
+Run against a dev/staging stack: submissions create real bug rows.
+
+Usage:
+    uvicorn app.main:app --port 8000
+    python scripts/check_event_loop_lag.py --base-url http://localhost:8000 --user-id <uuid>
+    python scripts/check_event_loop_lag.py --burst 100 --max-p99-ms 50
+"""
+
+import sys
+import math
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float):
+    latencies = []
+    while not stop.is_set():
+        # A request made while the loop is blocked starts late, so the oversleep counts too
+        start = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        await client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def submit(client: httpx.AsyncClient, user_id: str):
+    marker = uuid.uuid4().hex
+    return await client.post("/bugs/submit", data={
+        "title": f"Loop lag check {marker}",
+        "description": f"Synthetic submission {marker} to measure event loop responsiveness",
+        "severity": "Low",
+        "clientType": "Web",
+        "tags": '["loadtest"]',
+        "user_id": user_id,
+    })
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[math.ceil(len(latencies) * 0.99) - 1]
+    print(f"📊 {label}: n={len(latencies)} p50={statistics.median(latencies):.1f}ms "
+          f"p99={p99:.1f}ms max={latencies[-1]:.1f}ms")
+    return p99
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        # Idle baseline
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, args.interval))
+        await asyncio.sleep(2)
+        stop.set()
+        idle = await task
+
+        # Same probe during the burst
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, args.interval))
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[submit(client, args.user_id) for _ in range(args.burst)], return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        busy = await task
+
+    ok = sum(1 for r in responses if isinstance(r, httpx.Response) and r.status_code == 200)
+    print(f"🔵 Burst: {args.burst} submits in {elapsed:.1f}s ({ok} succeeded)")
+    summarize("/health idle", idle)
+    busy_p99 = summarize("/health during burst", busy)
+
+    if busy_p99 > args.max_p99_ms:
+        print(f"❌ Event loop lagged: p99 {busy_p99:.1f}ms > {args.max_p99_ms}ms")
+        sys.exit(1)
+    print("✅ Event loop stayed responsive")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure /health latency during a /bugs/submit burst")
+    parser.add_argument("--base-url", type=str, default="http://localhost:8000")
+    parser.add_argument("--user-id", type=str, required=True, help="Existing user id to submit bugs as")
+    parser.add_argument("--burst", type=int, default=50, help="Concurrent submissions")
+    parser.add_argument("--interval", type=float, default=0.01, help="Probe interval in seconds")
+    parser.add_argument("--max-p99-ms", type=float, default=100.0, help="Fail above this /health p99")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""
+Export all-MiniLM-L6-v2 to ONNX (and an int8 dynamically quantized copy)
+for the onnxruntime embedding backend.
+
+Writes into EMBED_ONNX_DIR (default models/all-MiniLM-L6-v2-onnx):
+    model.onnx        fp32 transformer, outputs token embeddings
+    model.int8.onnx   dynamic int8 quantization of the above (unless --no-quantize)
+    tokenizer files   loaded by the backend via AutoTokenizer
+
+Usage:
+    python scripts/export_onnx_embedding_model.py
+    python scripts/export_onnx_embedding_model.py --output models/minilm-onnx --no-quantize
+
+Then run with EMBED_BACKEND=onnx and check parity with
+scripts/benchmark_embedding_backends.py.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+from sentence_transformers import SentenceTransformer
+
+from app.services.embeddings import EMBED_MODEL
+from app.services.embedding_backends import EMBED_ONNX_DIR, ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE
+
+
+def export(model_name: str, output_dir: str, quantize: bool = True, opset: int = 17):
+    print(f"🔵 Loading {model_name}...")
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["FixForge export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    print(f"📦 Exporting to {model_path} (opset {opset})...")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[n] for n in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    print(f"✅ Exported fp32 model ({os.path.getsize(model_path) / 1e6:.1f} MB)")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILE)
+        print(f"📦 Quantizing to {int8_path}...")
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"✅ Exported int8 model ({os.path.getsize(int8_path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX for onnxruntime inference")
+    parser.add_argument("--model", type=str, default=EMBED_MODEL, help="SentenceTransformer model name")
+    parser.add_argument("--output", type=str, default=EMBED_ONNX_DIR, help="Output directory")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 quantized copy")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    args = parser.parse_args()
+
+    export(args.model, args.output, quantize=not args.no_quantize, opset=args.opset)
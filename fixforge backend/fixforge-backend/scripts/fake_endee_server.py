@@ -0,0 +1,154 @@
+"""
+Local in-memory stand-in for the Endee HTTP API.
+
+Implements the endpoints AsyncEndeeClient uses (index list/create/stats,
+vector upsert/search/delete) with brute-force cosine search and the same
+metadata filters (equality, $ne, $in). An optional artificial latency makes it
+useful for measuring client behaviour under concurrency without a real Endee.
+
+Usage:
+    python scripts/fake_endee_server.py --port 8081 --latency-ms 5
+    ENDEE_URL=http://localhost:8081 uvicorn app.main:app
+"""
+
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+
+class IndexCreate(BaseModel):
+    name: str
+    dimension: int = 384
+    metric: str = "cosine"
+
+
+class VectorIn(BaseModel):
+    id: str
+    values: List[float]
+    metadata: Dict[str, Any] = {}
+
+
+class UpsertRequest(BaseModel):
+    index: str
+    vectors: List[VectorIn]
+
+
+class SearchRequest(BaseModel):
+    index: str
+    vector: List[float]
+    top_k: int = 10
+    include_metadata: bool = True
+    filter: Optional[Dict[str, Any]] = None
+
+
+class DeleteRequest(BaseModel):
+    index: str
+    ids: List[str]
+
+
+def matches_filter(metadata: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    for field, condition in (filters or {}).items():
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def create_app(latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake Endee")
+    indexes: Dict[str, Dict[str, Any]] = {}
+
+    async def delay():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000.0)
+
+    def get_index(name: str) -> Dict[str, Any]:
+        if name not in indexes:
+            raise HTTPException(status_code=404, detail=f"Index {name} not found")
+        return indexes[name]
+
+    @app.get("/api/v1/index/list")
+    async def list_indexes():
+        return {"indexes": list(indexes)}
+
+    @app.post("/api/v1/index/create")
+    async def create_index(payload: IndexCreate):
+        indexes.setdefault(payload.name, {"dimension": payload.dimension, "vectors": {}})
+        return {"created": payload.name}
+
+    @app.get("/api/v1/index/stats/{name}")
+    async def index_stats(name: str):
+        index = get_index(name)
+        return {"index": name, "dimension": index["dimension"], "total_vectors": len(index["vectors"])}
+
+    @app.post("/api/v1/vector/upsert")
+    async def upsert(payload: UpsertRequest):
+        await delay()
+        index = get_index(payload.index)
+        for v in payload.vectors:
+            if len(v.values) != index["dimension"]:
+                raise HTTPException(status_code=400, detail=f"Bad dimension for {v.id}")
+            vec = np.asarray(v.values, dtype=np.float32)
+            index["vectors"][v.id] = (vec / max(float(np.linalg.norm(vec)), 1e-12), v.metadata)
+        index["matrix"] = None
+        return {"upserted": len(payload.vectors)}
+
+    @app.post("/api/v1/vector/search")
+    async def search(payload: SearchRequest):
+        await delay()
+        index = get_index(payload.index)
+        if index.get("matrix") is None:
+            ids = list(index["vectors"])
+            index["ids"] = ids
+            index["matrix"] = (
+                np.vstack([index["vectors"][vid][0] for vid in ids])
+                if ids else np.zeros((0, index["dimension"]), dtype=np.float32)
+            )
+        q = np.asarray(payload.vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        sims = index["matrix"] @ q
+
+        matches = []
+        for i in np.argsort(-sims):
+            vid = index["ids"][i]
+            meta = index["vectors"][vid][1]
+            if not matches_filter(meta, payload.filter):
+                continue
+            match = {"id": vid, "score": float(sims[i])}
+            if payload.include_metadata:
+                match["metadata"] = meta
+            matches.append(match)
+            if len(matches) >= payload.top_k:
+                break
+        return {"matches": matches}
+
+    @app.post("/api/v1/vector/delete")
+    async def delete(payload: DeleteRequest):
+        await delay()
+        index = get_index(payload.index)
+        deleted = sum(1 for vid in payload.ids if index["vectors"].pop(vid, None) is not None)
+        index["matrix"] = None
+        return {"deleted": deleted}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run an in-memory fake Endee server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial per-request latency")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
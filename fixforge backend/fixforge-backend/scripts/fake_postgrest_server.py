@@ -0,0 +1,221 @@
+"""
+Local in-memory stand-in for the Supabase PostgREST API.
+
+Serves GET /rest/v1/{table} with the parts of the PostgREST query syntax the
+routers' read paths use (select, eq./in. filters, limit) over seeded
+synthetic bugs and solutions, and the vote/counter functions from
+supabase/migrations under POST /rest/v1/rpc/{fn}. Other writes are accepted
+and echoed back. GET /rest/v1/ serves the OpenAPI description's table
+definitions, and GET /__stats reports how many write statements arrived. An
+optional artificial latency stands in for the network round-trip and query
+time of a real Supabase project. --heavy adds embedding vectors and code
+snippets to the seeded bugs, as the real rows carry.
+
+Usage:
+    python scripts/fake_postgrest_server.py --port 54321 --latency-ms 5 --bugs 1000
+    python scripts/fake_postgrest_server.py --bugs 1000 --heavy
+"""
+
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+RESERVED_PARAMS = {"select", "limit", "offset", "order", "on_conflict", "columns"}
+
+
+def seed(bugs: int, solutions_per_bug: int = 2, heavy: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    tables: Dict[str, List[Dict[str, Any]]] = {"bugs": [], "solutions": [], "votes": []}
+    for i in range(bugs):
+        bug_id = f"FF-{i:08x}"
+        bug = {
+            "id": bug_id,
+            "title": f"Bug {i}",
+            "description": f"Synthetic bug number {i}",
+            "severity": ("Low", "Medium", "High")[i % 3],
+            "status": "Open" if i % 4 else "Solved",
+            "votes": i % 17,
+            "user_id": f"user-{i % 50}",
+            "created_at": f"2026-01-01T00:00:{i % 60:02d}+00:00",
+        }
+        if heavy:
+            # Same shapes as production: 768-d and 384-d vectors, a pasted snippet
+            rng = random.Random(i)
+            bug["embedding"] = [round(rng.uniform(-0.1, 0.1), 6) for _ in range(768)]
+            bug["embedding_384"] = [round(rng.uniform(-0.1, 0.1), 6) for _ in range(384)]
+            bug["code"] = f"def handler_{i}(request):\n    return process(request.json())\n" * 20
+        tables["bugs"].append(bug)
+        for j in range(solutions_per_bug):
+            tables["solutions"].append({
+                "id": f"sol-{i}-{j}",
+                "bug_id": bug_id,
+                "user_id": f"user-{(i + j) % 50}",
+                "content": f"Fix {j} for bug {i}",
+                "votes": 0,
+                "comments": 0,
+            })
+    return tables
+
+
+def _matches(row: Dict[str, Any], column: str, expr: str) -> bool:
+    op, _, value = expr.partition(".")
+    current = "" if row.get(column) is None else str(row.get(column))
+    if op == "eq":
+        return current == value
+    if op == "neq":
+        return current != value
+    if op == "in":
+        return current in [v.strip('"') for v in value.strip("()").split(",")]
+    return True
+
+
+def create_app(latency_ms: float = 0.0, bugs: int = 1000, heavy: bool = False) -> FastAPI:
+    app = FastAPI(title="Fake PostgREST")
+    tables = seed(bugs, heavy=heavy)
+    # Equality lookups on these columns are the hot path; index them like the real tables
+    indexed_columns = {"bugs": ("id",), "solutions": ("id", "bug_id"), "votes": ("solution_id",)}
+    indexes: Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]] = {
+        name: {column: {} for column in columns} for name, columns in indexed_columns.items()
+    }
+    writes = {"statements": 0}
+    # apply_bug_votes batch ids already applied
+    vote_batches = set()
+
+    def insert(table: str, row: Dict[str, Any]) -> None:
+        tables[table].append(row)
+        for column, index in indexes[table].items():
+            index.setdefault(str(row.get(column)), []).append(row)
+
+    def delete(table: str, row: Dict[str, Any]) -> None:
+        tables[table].remove(row)
+        for column, index in indexes[table].items():
+            index[str(row.get(column))].remove(row)
+
+    for name in list(tables):
+        rows, tables[name] = tables[name], []
+        for row in rows:
+            insert(name, row)
+
+    def row(table: str, row_id: Any) -> Any:
+        rows = indexes[table]["id"].get(str(row_id))
+        return rows[0] if rows else None
+
+    def find_upvote(solution_id: Any, user_id: Any) -> Any:
+        return next((v for v in indexes["votes"]["solution_id"].get(str(solution_id), [])
+                     if str(v["user_id"]) == str(user_id) and v["vote_type"] == "upvote"), None)
+
+    def adjust(target: Any, column: str, delta: int) -> int:
+        target[column] = max((target.get(column) or 0) + delta, 0)
+        return target[column]
+
+    def toggle_upvote(solution_id: Any, user_id: Any, upvoted: Any = None) -> Any:
+        """Set (or flip, if upvoted is None) a user's upvote; returns (state, changed)"""
+        existing = find_upvote(solution_id, user_id)
+        want = existing is None if upvoted is None else upvoted
+        if want and existing is None:
+            insert("votes", {"solution_id": solution_id, "user_id": user_id, "vote_type": "upvote"})
+            adjust(row("solutions", solution_id), "votes", 1)
+            return want, 1
+        if not want and existing is not None:
+            delete("votes", existing)
+            adjust(row("solutions", solution_id), "votes", -1)
+            return want, 1
+        return want, 0
+
+    async def delay():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    @app.get("/rest/v1/")
+    async def openapi():
+        definitions = {}
+        for name, rows in tables.items():
+            properties = {column: {} for r in rows[:1] for column in r}
+            definitions[name] = {"type": "object", "properties": properties}
+        return {"swagger": "2.0", "definitions": definitions}
+
+    @app.get("/rest/v1/{table}")
+    async def select(table: str, request: Request):
+        await delay()
+        params = request.query_params
+        filters = [(k, v) for k, v in params.multi_items() if k not in RESERVED_PARAMS]
+
+        indexed = next(((k, v) for k, v in filters if k in indexes.get(table, {}) and v.startswith("eq.")), None)
+        if indexed is not None:
+            rows = indexes[table][indexed[0]].get(indexed[1][3:], [])
+        else:
+            rows = tables.get(table, [])
+        rows = [r for r in rows if all(_matches(r, k, v) for k, v in filters)]
+
+        if "limit" in params:
+            rows = rows[: int(params["limit"])]
+        columns = params.get("select", "*")
+        if columns != "*":
+            wanted = [c.strip() for c in columns.split(",")]
+            rows = [{c: r.get(c) for c in wanted} for r in rows]
+        return JSONResponse(rows, headers={"Content-Range": f"0-{max(len(rows) - 1, 0)}/*"})
+
+    @app.post("/rest/v1/rpc/{fn}")
+    async def rpc(fn: str, request: Request):
+        await delay()
+        writes["statements"] += 1
+        args = await request.json()
+        if fn == "adjust_bug_votes":
+            bug = row("bugs", args["p_bug_id"])
+            return JSONResponse(adjust(bug, "votes", args.get("p_delta", 1)) if bug else None)
+        if fn == "adjust_solution_comments":
+            solution = row("solutions", args["p_solution_id"])
+            return JSONResponse(adjust(solution, "comments", args.get("p_delta", 1)) if solution else None)
+        if fn == "toggle_solution_upvote":
+            solution = row("solutions", args["p_solution_id"])
+            if solution is None:
+                return JSONResponse([])
+            state, _ = toggle_upvote(args["p_solution_id"], args["p_user_id"])
+            return JSONResponse([{"has_upvoted": state, "votes": solution["votes"]}])
+        if fn == "apply_bug_votes":
+            batch_id = args.get("p_batch_id")
+            if batch_id is not None:
+                if batch_id in vote_batches:
+                    return JSONResponse(0)
+                vote_batches.add(batch_id)
+            updated = [d for d in args["p_deltas"] if row("bugs", d["id"])]
+            for d in updated:
+                adjust(row("bugs", d["id"]), "votes", d["votes"])
+            return JSONResponse(len(updated))
+        if fn == "apply_solution_upvotes":
+            changed = 0
+            for items, state in ((args["p_remove"], False), (args["p_add"], True)):
+                for item in items:
+                    if row("solutions", item["solution_id"]):
+                        changed += toggle_upvote(item["solution_id"], item["user_id"], state)[1]
+            return JSONResponse(changed)
+        return JSONResponse({"message": f"Unknown function {fn}"}, status_code=404)
+
+    @app.get("/__stats")
+    async def stats():
+        return {"write_statements": writes["statements"]}
+
+    @app.api_route("/rest/v1/{table}", methods=["POST", "PATCH", "DELETE"])
+    async def write(table: str, request: Request):
+        await delay()
+        writes["statements"] += 1
+        body = await request.body()
+        return JSONResponse(await request.json() if body else [], status_code=201 if request.method == "POST" else 200)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Supabase PostgREST server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--bugs", type=int, default=1000)
+    parser.add_argument("--heavy", action="store_true", help="Seed bugs with embeddings and code")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.bugs, args.heavy), host=args.host, port=args.port, log_level="warning")
@@ -1,12 +1,15 @@
 # scripts/migrate_to_384.py
 import os
+import sys
 import time
 from collections import Counter
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
 
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 # Supabase client import (adjust to your project)
 try:
     from app.core.config import supabase
@@ -18,13 +21,12 @@ except Exception:
         raise RuntimeError("Set SUPABASE_URL and SUPABASE_SERVICE_KEY (or SUPABASE_KEY) env vars.")
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-MODEL_NAME = os.environ.get("EMBED_MODEL", "all-MiniLM-L6-v2")
+from app.services.embeddings import embedding_service
+
 DIM = 384
 K = int(os.environ.get("CLUSTER_K", "6"))
 BATCH = int(os.environ.get("BATCH_SIZE", "64"))
 
-model = SentenceTransformer(MODEL_NAME)
-
 def fetch_bugs(status=None):
     q = supabase.table("bugs").select("*")
     if status:
@@ -47,7 +49,7 @@ def compute_and_persist_embeddings(bugs):
     embeddings = []
     for i in range(0, len(texts), BATCH):
         batch = texts[i:i+BATCH]
-        embs = model.encode(batch, show_progress_bar=False)
+        embs = embedding_service.encode(batch, batch_size=BATCH)
         for e in embs:
             embeddings.append([float(x) for x in e.tolist()])
 
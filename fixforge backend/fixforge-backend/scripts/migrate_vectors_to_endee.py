@@ -3,14 +3,15 @@ Migration Script: Transfer Bug Embeddings from Supabase to Endee
 
 This script:
 1. Fetches all bugs from Supabase
-2. Generates embeddings if missing (using sentence-transformers)
-3. Upserts vectors into Endee with metadata
+2. Generates embeddings if missing (one batched encode for all of them)
+3. Upserts vectors into Endee with metadata, --batch-size vectors per request
 
 Run once after setting up Endee to migrate existing data.
 
 Usage:
     python scripts/migrate_vectors_to_endee.py
     python scripts/migrate_vectors_to_endee.py --dry-run  # Preview without executing
+    python scripts/migrate_vectors_to_endee.py --batch-size 200
 """
 
 import os
@@ -19,21 +20,53 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.services.endee_client import endee_service
+from app.services.endee_client import endee_sync
 from app.core.config import supabase
-from sentence_transformers import SentenceTransformer
+from app.services.embeddings import embedding_service
+from app.services.endee_client import ENDEE_BATCH_SIZE
+from app.services.clusters_service import bug_text, parse_embedding
+from app.services.lexical_index import bug_document
 import argparse
 
-# Initialize embedding model
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
+def build_vector_items(bugs):
+    """
+    Turn bug rows into upsert_bug_vectors() items, reusing stored embeddings
+    and encoding the rest in one batch
+    """
+    embeddings = [parse_embedding(bug.get("embedding")) for bug in bugs]
+    missing = [i for i, vec in enumerate(embeddings) if vec is None]
+    if missing:
+        print(f"  📝 Generating {len(missing)} embeddings (384 dimensions)...")
+        texts = [bug_text(bugs[i]) for i in missing]
+        for i, vec in zip(missing, embedding_service.encode(texts)):
+            embeddings[i] = vec
+    print(f"  ✓ Using {len(bugs) - len(missing)} existing embeddings")
+
+    return [
+        {
+            "bug_id": bug.get("id"),
+            "embedding": vec.tolist(),
+            "document": bug_document(bug),
+            "metadata": {
+                "title": bug.get("title", ""),
+                "severity": bug.get("severity", "Low"),
+                "status": bug.get("status", "Open"),
+                "tags": bug.get("tags", []),
+                "created_at": bug.get("created_at", "")
+            }
+        }
+        for bug, vec in zip(bugs, embeddings)
+    ]
 
-def migrate(dry_run=False):
+
+def migrate(dry_run=False, batch_size=ENDEE_BATCH_SIZE):
     """
     Migrate all bug embeddings from Supabase to Endee
     
     Args:
         dry_run: If True, only show what would be migrated without executing
+        batch_size: Vectors per Endee upsert request
     """
     print("=" * 60)
     print("🚀 FixForge: Migrating Bug Vectors to Endee")
@@ -53,61 +86,22 @@ def migrate(dry_run=False):
         print("⚠️ No bugs found in database. Nothing to migrate.")
         return
     
-    # Process each bug
     print(f"\n🔄 Processing {len(bugs)} bugs...")
-    success_count = 0
-    error_count = 0
-    
-    for i, bug in enumerate(bugs, 1):
-        bug_id = bug.get("id")
-        print(f"\n[{i}/{len(bugs)}] Processing {bug_id}...")
-        
-        try:
-            # Generate embedding
-            embedding = bug.get("embedding")
-            if not embedding or len(embedding) != 384:
-                # Generate new embedding if missing or wrong dimension
-                text = f"{bug.get('title', '')} {bug.get('description', '')} {bug.get('severity', '')} {bug.get('client_type', '')}"
-                tags = bug.get('tags', [])
-                if isinstance(tags, list):
-                    text += " " + " ".join(tags)
-                
-                embedding = model.encode(text).tolist()
-                print(f"  📝 Generated new embedding (384 dimensions)")
-            else:
-                print(f"  ✓ Using existing embedding")
-            
-            # Prepare metadata
-            metadata = {
-                "title": bug.get("title", ""),
-                "severity": bug.get("severity", "Low"),
-                "status": bug.get("status", "Open"),
-                "tags": bug.get("tags", []),
-                "created_at": bug.get("created_at", "")
-            }
-            
-            if dry_run:
-                print(f"  🔍 [DRY RUN] Would upsert vector for {bug_id}")
-                print(f"     Metadata: {metadata}")
-                success_count += 1
-            else:
-                # Upsert to Endee
-                result = endee_service.upsert_bug_vector(
-                    bug_id=bug_id,
-                    embedding=embedding,
-                    metadata=metadata
-                )
-                
-                if result:
-                    print(f"  ✅ Upserted to Endee: {bug_id}")
-                    success_count += 1
-                else:
-                    print(f"  ⚠️ Failed to upsert {bug_id}")
-                    error_count += 1
-                    
-        except Exception as e:
-            print(f"  ❌ Error processing {bug_id}: {e}")
-            error_count += 1
+    items = build_vector_items(bugs)
+
+    if dry_run:
+        batches = (len(items) + batch_size - 1) // batch_size
+        print(f"  🔍 [DRY RUN] Would upsert {len(items)} vectors in {batches} batches of {batch_size}")
+        for item in items[:5]:
+            print(f"     {item['bug_id']}: {item['metadata']}")
+        success_count, error_count = len(items), 0
+    else:
+        report = endee_sync.upsert_bug_vectors(items, batch_size=batch_size)
+        success_count, error_count = len(report["upserted"]), len(report["failed"])
+        for failure in report["failed"]:
+            print(f"  ⚠️ Failed to upsert {failure['id']}: {failure['error']}")
+        if endee_sync.local.save():
+            print(f"  💾 Saved local vector index snapshot ({len(endee_sync.local)} vectors)")
     
     # Summary
     print("\n" + "=" * 60)
@@ -127,7 +121,7 @@ def migrate(dry_run=False):
         
         # Get collection stats
         print("\n📊 Endee Collection Stats:")
-        stats = endee_service.get_collection_stats()
+        stats = endee_sync.get_collection_stats()
         print(f"   {stats}")
 
 
@@ -139,6 +133,13 @@ if __name__ == "__main__":
         help="Preview migration without executing (no changes made)"
     )
     
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=ENDEE_BATCH_SIZE,
+        help=f"Vectors per Endee upsert request (default: {ENDEE_BATCH_SIZE})"
+    )
+    
     args = parser.parse_args()
     
-    migrate(dry_run=args.dry_run)
+    migrate(dry_run=args.dry_run, batch_size=args.batch_size)
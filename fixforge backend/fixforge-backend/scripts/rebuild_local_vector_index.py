@@ -0,0 +1,109 @@
+"""
+Rebuild the local fallback vector index from Supabase and check parity with Endee.
+
+The backend mirrors Endee writes into an in-process index and fails searches
+over to it when Endee is down. This script (re)builds that index from the bugs
+table, writes the snapshot to LOCAL_VECTOR_INDEX_DIR, and optionally compares
+its results with Endee for a sample of queries under the filters the app uses.
+
+Usage:
+    python scripts/rebuild_local_vector_index.py --dir data/vector_index
+    python scripts/rebuild_local_vector_index.py --dir data/vector_index --parity 50
+    python scripts/rebuild_local_vector_index.py --parity 50 --no-save --min-recall 0.9
+"""
+
+import os
+import sys
+import random
+import argparse
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import supabase
+from app.services.endee_client import EndeeError, endee_sync
+from app.services.local_vector_index import LOCAL_VECTOR_INDEX_DIR, LocalVectorIndex
+from migrate_vectors_to_endee import build_vector_items
+
+# Filters used by semantic search, duplicate detection and RAG
+PARITY_FILTERS = [
+    None,
+    {"status": "Open"},
+    {"status": {"$ne": "Solved"}},
+    {"severity": "High"},
+]
+
+
+def check_parity(index: LocalVectorIndex, items, samples: int, top_k: int) -> float:
+    """Mean recall@k of the local index against Endee over sampled bug vectors"""
+    queries = random.sample(items, min(samples, len(items)))
+    recalls = []
+    max_score_diff = 0.0
+
+    for filters in PARITY_FILTERS:
+        for item in queries:
+            try:
+                remote = endee_sync.search_endee(item["embedding"], top_k, filters)
+            except EndeeError as e:
+                print(f"❌ Endee unavailable for parity check: {e}")
+                return 0.0
+            local = index.search(item["embedding"], top_k, filters)
+
+            remote_ids = {r["id"] for r in remote}
+            if not remote_ids:
+                continue
+            recalls.append(len(remote_ids & {r["id"] for r in local}) / len(remote_ids))
+
+            local_scores = {r["id"]: r["score"] for r in local}
+            for r in remote:
+                if r["id"] in local_scores:
+                    max_score_diff = max(max_score_diff, abs(local_scores[r["id"]] - r.get("score", 0)))
+
+        print(f"   filter={filters}: recall@{top_k} so far {sum(recalls) / max(len(recalls), 1):.3f}")
+
+    recall = sum(recalls) / max(len(recalls), 1)
+    print(f"📊 Parity over {len(recalls)} queries: recall@{top_k}={recall:.3f}, max score diff={max_score_diff:.4f}")
+    return recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the local fallback vector index")
+    parser.add_argument("--dir", type=str, default=LOCAL_VECTOR_INDEX_DIR, help="Snapshot directory")
+    parser.add_argument("--no-save", action="store_true", help="Build in memory only")
+    parser.add_argument("--parity", type=int, default=0, help="Sample queries to compare against Endee")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.95, help="Fail below this parity recall")
+    args = parser.parse_args()
+
+    print("📥 Fetching bugs from Supabase...")
+    bugs = supabase.table("bugs").select("*").execute().data or []
+    print(f"✅ Fetched {len(bugs)} bugs")
+
+    items = build_vector_items(bugs)
+    index = LocalVectorIndex(directory="")
+    index.upsert([
+        {"id": it["bug_id"], "values": it["embedding"], "metadata": {**it["metadata"], "bug_id": it["bug_id"]}}
+        for it in items
+    ])
+    print(f"✅ Built local index: {len(index)} vectors")
+
+    if not args.no_save:
+        if not args.dir:
+            print("⚠️ No --dir or LOCAL_VECTOR_INDEX_DIR set; snapshot not saved")
+        else:
+            index.directory = args.dir
+            index.save()
+            print(f"💾 Saved snapshot to {args.dir}")
+
+    if args.parity:
+        print(f"\n🔍 Comparing {args.parity} sample queries against Endee...")
+        recall = check_parity(index, items, args.parity, args.top_k)
+        if recall < args.min_recall:
+            print(f"❌ Parity below {args.min_recall}")
+            sys.exit(1)
+        print("✅ Local index matches Endee")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+-- Indexes backing keyset pagination on GET /bugs/ (ORDER BY created_at DESC, id DESC)
+-- and the per-page attachments/solutions lookups (WHERE bug_id IN (...)).
+
+create index if not exists bugs_created_at_id_idx
+    on public.bugs (created_at desc, id desc);
+
+create index if not exists bugs_user_id_created_at_id_idx
+    on public.bugs (user_id, created_at desc, id desc);
+
+create index if not exists attachments_bug_id_idx
+    on public.attachments (bug_id);
+
+create index if not exists solutions_bug_id_idx
+    on public.solutions (bug_id);
@@ -0,0 +1,95 @@
+-- Atomic counters for bugs.votes, solutions.comments and solution upvotes.
+--
+-- Each function changes the counter in a single statement (no read-modify-write
+-- from the API) and returns the new value, or no value if the row doesn't exist.
+-- Counters never go below zero. Called through app/services/counters.py.
+-- Parameter types follow the columns (%TYPE), so PostgREST coerces the JSON
+-- arguments to whatever the id columns are.
+
+create or replace function public.adjust_bug_votes(
+    p_bug_id public.bugs.id%type,
+    p_delta integer default 1
+)
+returns integer
+language sql
+as $$
+    update public.bugs
+       set votes = greatest(coalesce(votes, 0) + p_delta, 0)
+     where id = p_bug_id
+    returning votes;
+$$;
+
+create or replace function public.adjust_solution_comments(
+    p_solution_id public.solutions.id%type,
+    p_delta integer default 1
+)
+returns integer
+language sql
+as $$
+    update public.solutions
+       set comments = greatest(coalesce(comments, 0) + p_delta, 0)
+     where id = p_solution_id
+    returning comments;
+$$;
+
+-- Add the user's upvote if they have none, remove it if they do, and move
+-- solutions.votes by one in the same transaction. The solution row lock
+-- serializes toggles on one solution, so double clicks can't double count;
+-- the unique index below covers inserts that don't take the lock.
+create or replace function public.toggle_solution_upvote(
+    p_solution_id public.solutions.id%type,
+    p_user_id public.votes.user_id%type
+)
+returns table (has_upvoted boolean, votes integer)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+    perform 1 from public.solutions s where s.id = p_solution_id for update;
+    if not found then
+        return;
+    end if;
+
+    delete from public.votes v
+     where v.solution_id = p_solution_id
+       and v.user_id = p_user_id
+       and v.vote_type = 'upvote';
+    has_upvoted := not found;
+
+    if not has_upvoted then
+        update public.solutions s
+           set votes = greatest(coalesce(s.votes, 0) - 1, 0)
+         where s.id = p_solution_id
+        returning s.votes into votes;
+    else
+        insert into public.votes (solution_id, user_id, vote_type)
+        values (p_solution_id, p_user_id, 'upvote')
+        on conflict do nothing;
+
+        if found then
+            update public.solutions s
+               set votes = coalesce(s.votes, 0) + 1
+             where s.id = p_solution_id
+            returning s.votes into votes;
+        else
+            -- A vote buffer flush added it meanwhile and already counted it
+            select s.votes into votes from public.solutions s where s.id = p_solution_id;
+        end if;
+    end if;
+    return next;
+end;
+$$;
+
+-- One upvote per (solution, user). The unique index is what makes concurrent
+-- inserts (two toggles, or a toggle and a vote buffer flush) count once:
+-- the loser hits the conflict instead of adding a second row. Duplicates left
+-- by the old read-modify-write path are removed first.
+delete from public.votes v
+ using public.votes d
+ where d.solution_id = v.solution_id
+   and d.user_id = v.user_id
+   and d.vote_type = v.vote_type
+   and d.ctid < v.ctid;
+
+create unique index if not exists votes_solution_id_user_id_vote_type_key
+    on public.votes (solution_id, user_id, vote_type);
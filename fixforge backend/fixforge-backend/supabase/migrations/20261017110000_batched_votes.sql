@@ -0,0 +1,64 @@
+-- Batched vote writes for the write-behind buffer in app/services/vote_buffer.py.
+--
+-- Rows are passed as JSON arrays and typed with jsonb_populate_recordset
+-- against the real tables, so ids compare with the column types and indexes.
+-- Each function applies a whole flush in one statement and returns the
+-- number of rows it changed.
+
+-- p_deltas: [{"id": <bug id>, "votes": <delta>}, ...] (one entry per bug)
+create or replace function public.apply_bug_votes(p_deltas jsonb)
+returns integer
+language sql
+as $$
+    with updated as (
+        update public.bugs b
+           set votes = greatest(coalesce(b.votes, 0) + d.votes, 0)
+          from jsonb_populate_recordset(null::public.bugs, p_deltas) d
+         where b.id = d.id
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;
+
+-- p_add / p_remove: [{"solution_id": ..., "user_id": ...}, ...]
+-- The final upvote state per (solution, user), not deltas. Inserts skip
+-- upvotes that exist on the unique (solution_id, user_id, vote_type) index
+-- (20261017100000_atomic_counters.sql), including ones a concurrent flush or
+-- toggle_solution_upvote has just inserted, and a row deleted by a concurrent
+-- transaction isn't returned again. solutions.votes moves only by the rows
+-- this call actually inserted and deleted, so a flush applied twice, or from
+-- two workers at once, counts each upvote once.
+create or replace function public.apply_solution_upvotes(p_add jsonb, p_remove jsonb)
+returns integer
+language sql
+as $$
+    with removed as (
+        delete from public.votes v
+         using jsonb_populate_recordset(null::public.votes, p_remove) r
+         where v.solution_id = r.solution_id
+           and v.user_id = r.user_id
+           and v.vote_type = 'upvote'
+        returning v.solution_id, -1 as delta
+    ),
+    added as (
+        insert into public.votes (solution_id, user_id, vote_type)
+        select distinct a.solution_id, a.user_id, 'upvote'
+          from jsonb_populate_recordset(null::public.votes, p_add) a
+         where exists (select 1 from public.solutions s where s.id = a.solution_id)
+        on conflict do nothing
+        returning solution_id, 1 as delta
+    ),
+    deltas as (
+        select solution_id, sum(delta)::integer as delta
+          from (select * from removed union all select * from added) changes
+         group by solution_id
+    ),
+    updated as (
+        update public.solutions s
+           set votes = greatest(coalesce(s.votes, 0) + deltas.delta, 0)
+          from deltas
+         where s.id = deltas.solution_id
+        returning 1
+    )
+    select ((select count(*) from removed) + (select count(*) from added))::integer;
+$$;
@@ -0,0 +1,288 @@
+-- Per-user contribution stats, kept up to date by triggers on solutions, bugs
+-- and votes so GET /users/{id}/contribution-stats is a single-row read.
+--
+-- Counters move by +/-1 per write. The streak state is the last day with a
+-- solution plus the length of the run of consecutive days ending there;
+-- recent_counts holds solutions per day for the 30 days ending recent_day
+-- (newest first) for this_week / this_month. Anything that can't be applied
+-- incrementally (deleting a solution, a backdated created_at) recomputes that
+-- user from history with rebuild_user_stats, which app/jobs/user_stats_job.py
+-- also uses for the backfill. Days are UTC. user_id is stored as text so the
+-- table works whatever type the users/solutions/bugs user_id columns have.
+
+create table if not exists public.user_stats (
+    user_id text primary key,
+    total_solutions integer not null default 0,
+    accepted_solutions integer not null default 0,
+    total_upvotes integer not null default 0,
+    total_bugs integer not null default 0,
+    first_solution_at timestamptz,
+    last_solution_at timestamptz,
+    streak_last_day date,
+    streak_length integer not null default 0,
+    longest_streak integer not null default 0,
+    recent_day date,
+    recent_counts integer[] not null default '{}',
+    updated_at timestamptz not null default now()
+);
+
+-- rebuild_user_stats filters history by user_id::text
+create index if not exists solutions_user_id_text_idx on public.solutions ((user_id::text));
+create index if not exists bugs_user_id_text_idx on public.bugs ((user_id::text));
+
+
+-- Recompute the given users (all users with solutions or bugs when null) from history
+create or replace function public.rebuild_user_stats(p_user_ids text[] default null)
+returns integer
+language plpgsql
+as $$
+declare
+    rebuilt integer;
+begin
+    with sol as (
+        select s.user_id::text as user_id,
+               s.status,
+               s.created_at::timestamptz as created_at,
+               (s.created_at::timestamptz at time zone 'utc')::date as day
+          from public.solutions s
+         where p_user_ids is null or s.user_id::text = any (p_user_ids)
+    ),
+    targets as (
+        select unnest(p_user_ids) as user_id
+        union select user_id from sol
+        union select b.user_id::text from public.bugs b where p_user_ids is null
+    ),
+    sol_agg as (
+        select user_id,
+               count(*) as total,
+               count(*) filter (where status = 'accepted') as accepted,
+               min(created_at) as first_at,
+               max(created_at) as last_at,
+               max(day) as last_day
+          from sol
+         group by user_id
+    ),
+    per_day as (
+        select user_id, day, count(*) as n from sol group by user_id, day
+    ),
+    -- Gaps and islands: consecutive days share day - row_number()
+    runs as (
+        select user_id, max(day) as run_end, count(*) as run_len
+          from (
+              select user_id, day, day - (row_number() over (partition by user_id order by day))::integer as grp
+                from per_day
+          ) islands
+         group by user_id, grp
+    ),
+    streaks as (
+        select user_id,
+               max(run_len) as longest,
+               (array_agg(run_len order by run_end desc))[1] as last_run
+          from runs
+         group by user_id
+    ),
+    recent as (
+        select a.user_id, array_agg(coalesce(d.n, 0)::integer order by i) as counts
+          from sol_agg a
+         cross join generate_series(0, 29) as i
+          left join per_day d on d.user_id = a.user_id and d.day = a.last_day - i
+         group by a.user_id
+    ),
+    upvotes as (
+        select s.user_id::text as user_id, count(*) as n
+          from public.votes v
+          join public.solutions s on s.id = v.solution_id
+         where v.vote_type = 'upvote'
+           and (p_user_ids is null or s.user_id::text = any (p_user_ids))
+         group by 1
+    ),
+    bug_counts as (
+        select b.user_id::text as user_id, count(*) as n
+          from public.bugs b
+         where p_user_ids is null or b.user_id::text = any (p_user_ids)
+         group by 1
+    ),
+    upserted as (
+        insert into public.user_stats as us (
+            user_id, total_solutions, accepted_solutions, total_upvotes, total_bugs,
+            first_solution_at, last_solution_at, streak_last_day, streak_length,
+            longest_streak, recent_day, recent_counts, updated_at
+        )
+        select t.user_id,
+               coalesce(a.total, 0), coalesce(a.accepted, 0), coalesce(u.n, 0), coalesce(b.n, 0),
+               a.first_at, a.last_at, a.last_day, coalesce(st.last_run, 0),
+               coalesce(st.longest, 0), a.last_day, coalesce(r.counts, '{}'), now()
+          from targets t
+          left join sol_agg a on a.user_id = t.user_id
+          left join streaks st on st.user_id = t.user_id
+          left join recent r on r.user_id = t.user_id
+          left join upvotes u on u.user_id = t.user_id
+          left join bug_counts b on b.user_id = t.user_id
+         where t.user_id is not null
+        on conflict (user_id) do update set
+            total_solutions = excluded.total_solutions,
+            accepted_solutions = excluded.accepted_solutions,
+            total_upvotes = excluded.total_upvotes,
+            total_bugs = excluded.total_bugs,
+            first_solution_at = excluded.first_solution_at,
+            last_solution_at = excluded.last_solution_at,
+            streak_last_day = excluded.streak_last_day,
+            streak_length = excluded.streak_length,
+            longest_streak = excluded.longest_streak,
+            recent_day = excluded.recent_day,
+            recent_counts = excluded.recent_counts,
+            updated_at = excluded.updated_at
+        returning 1
+    )
+    select count(*) into rebuilt from upserted;
+    return rebuilt;
+end;
+$$;
+
+
+create or replace function public.user_stats_on_solution()
+returns trigger
+language plpgsql
+as $$
+declare
+    st public.user_stats%rowtype;
+    d date;
+    shift integer;
+begin
+    if tg_op = 'DELETE' then
+        perform public.rebuild_user_stats(array[old.user_id::text]);
+        return null;
+    end if;
+
+    if tg_op = 'UPDATE' then
+        if new.user_id is distinct from old.user_id or new.created_at is distinct from old.created_at then
+            perform public.rebuild_user_stats(array[old.user_id::text, new.user_id::text]);
+        elsif new.status is distinct from old.status then
+            update public.user_stats
+               set accepted_solutions = greatest(accepted_solutions
+                       + (new.status = 'accepted')::integer
+                       - (old.status = 'accepted')::integer, 0),
+                   updated_at = now()
+             where user_id = new.user_id::text;
+        end if;
+        return null;
+    end if;
+
+    -- INSERT
+    if new.user_id is null then
+        -- No author to count it for (user_stats.user_id is the primary key)
+        return null;
+    end if;
+    d := (new.created_at::timestamptz at time zone 'utc')::date;
+    insert into public.user_stats (user_id) values (new.user_id::text) on conflict (user_id) do nothing;
+    select * into st from public.user_stats where user_id = new.user_id::text for update;
+
+    if st.streak_last_day is not null and d < st.streak_last_day then
+        -- Out of order: the streak and recent window need the full history
+        perform public.rebuild_user_stats(array[new.user_id::text]);
+        return null;
+    end if;
+
+    if st.streak_last_day is null or d > st.streak_last_day + 1 then
+        st.streak_length := 1;
+    elsif d = st.streak_last_day + 1 then
+        st.streak_length := st.streak_length + 1;
+    end if;
+
+    if st.recent_day is null then
+        st.recent_counts := array[1];
+    else
+        shift := d - st.recent_day;
+        if shift = 0 then
+            st.recent_counts[1] := coalesce(st.recent_counts[1], 0) + 1;
+        else
+            st.recent_counts := (array[1] || array_fill(0, array[least(shift - 1, 29)]) || st.recent_counts)[1:30];
+        end if;
+    end if;
+
+    update public.user_stats
+       set total_solutions = total_solutions + 1,
+           accepted_solutions = accepted_solutions + (new.status = 'accepted')::integer,
+           first_solution_at = least(first_solution_at, new.created_at::timestamptz),
+           last_solution_at = greatest(last_solution_at, new.created_at::timestamptz),
+           streak_last_day = d,
+           streak_length = st.streak_length,
+           longest_streak = greatest(longest_streak, st.streak_length),
+           recent_day = d,
+           recent_counts = st.recent_counts,
+           updated_at = now()
+     where user_id = new.user_id::text;
+    return null;
+end;
+$$;
+
+
+create or replace function public.user_stats_on_bug()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        if new.user_id is null then
+            return null;
+        end if;
+        insert into public.user_stats as us (user_id, total_bugs) values (new.user_id::text, 1)
+        on conflict (user_id) do update set total_bugs = us.total_bugs + 1, updated_at = now();
+    else
+        update public.user_stats
+           set total_bugs = greatest(total_bugs - 1, 0), updated_at = now()
+         where user_id = old.user_id::text;
+    end if;
+    return null;
+end;
+$$;
+
+
+-- Upvotes count toward the solution author. When a solution is deleted its
+-- votes cascade after it is gone and are skipped here; the solution's own
+-- delete trigger has already rebuilt its author from history.
+create or replace function public.user_stats_on_vote()
+returns trigger
+language plpgsql
+as $$
+declare
+    author text;
+    vote public.votes%rowtype;
+begin
+    if tg_op = 'INSERT' then
+        vote := new;
+    else
+        vote := old;
+    end if;
+    if vote.vote_type is distinct from 'upvote' then
+        return null;
+    end if;
+    select s.user_id::text into author from public.solutions s where s.id = vote.solution_id;
+    if author is null then
+        return null;
+    end if;
+
+    insert into public.user_stats as us (user_id, total_upvotes)
+    values (author, case when tg_op = 'INSERT' then 1 else 0 end)
+    on conflict (user_id) do update
+        set total_upvotes = greatest(us.total_upvotes + case when tg_op = 'INSERT' then 1 else -1 end, 0),
+            updated_at = now();
+    return null;
+end;
+$$;
+
+
+drop trigger if exists user_stats_solutions on public.solutions;
+create trigger user_stats_solutions
+    after insert or update of user_id, status, created_at or delete on public.solutions
+    for each row execute function public.user_stats_on_solution();
+
+drop trigger if exists user_stats_bugs on public.bugs;
+create trigger user_stats_bugs
+    after insert or delete on public.bugs
+    for each row execute function public.user_stats_on_bug();
+
+drop trigger if exists user_stats_votes on public.votes;
+create trigger user_stats_votes
+    after insert or delete on public.votes
+    for each row execute function public.user_stats_on_vote();
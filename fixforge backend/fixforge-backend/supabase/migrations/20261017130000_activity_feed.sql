@@ -0,0 +1,33 @@
+-- Materialized activity feed for GET /users/{id}/activities.
+--
+-- Rows are appended at write time by app/services/activity_feed.py (bug and
+-- solution submits, accepted solutions, profile/avatar updates, milestones)
+-- and for existing history by app/jobs/activity_backfill_job.py. event_key
+-- identifies the event ("bug-<id>", "<user>-avatar", ...), so a replayed
+-- flush or a backfill over live data inserts each event once.
+
+create table if not exists public.activities (
+    id uuid primary key default gen_random_uuid(),
+    user_id text not null,
+    type text not null,
+    title text,
+    description text,
+    badge text,
+    points integer not null default 0,
+    metadata jsonb not null default '{}'::jsonb,
+    event_key text,
+    created_at timestamptz not null default now()
+);
+
+alter table public.activities add column if not exists badge text;
+alter table public.activities add column if not exists points integer not null default 0;
+alter table public.activities add column if not exists metadata jsonb not null default '{}'::jsonb;
+alter table public.activities add column if not exists event_key text;
+
+-- on_conflict target for the batched inserts (nulls stay allowed for older rows)
+create unique index if not exists activities_event_key_key
+    on public.activities (event_key);
+
+-- One user's feed, newest first, keyset-paginated on (created_at, id)
+create index if not exists activities_user_id_created_at_id_idx
+    on public.activities (user_id, created_at desc, id desc);
@@ -0,0 +1,28 @@
+-- Store API keys as SHA-256 digests instead of plaintext.
+--
+-- app/services/api_keys.py hashes the x-api-key header and looks the digest
+-- up in key_hash (cached in-process). key_prefix keeps the first characters
+-- for display. Existing keys are hashed in place and their plaintext cleared.
+
+alter table public.api_keys add column if not exists key_hash text;
+alter table public.api_keys add column if not exists key_prefix text;
+
+update public.api_keys
+   set key_hash = encode(sha256(convert_to(key, 'UTF8')), 'hex'),
+       key_prefix = left(key, 7)
+ where key_hash is null
+   and key is not null;
+
+alter table public.api_keys alter column key drop not null;
+
+update public.api_keys
+   set key = null
+ where key_hash is not null
+   and key is not null;
+
+create unique index if not exists api_keys_key_hash_key
+    on public.api_keys (key_hash);
+
+-- GET /users/{id}/api-keys: the user's newest key
+create index if not exists api_keys_user_id_created_at_idx
+    on public.api_keys (user_id, created_at desc);
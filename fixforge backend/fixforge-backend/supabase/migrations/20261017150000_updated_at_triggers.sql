@@ -0,0 +1,41 @@
+-- Row versions for the weak ETags in app/utils/etag.py.
+--
+-- GET /bugs/, GET /getsolution and GET /api/bug_clusters/ hash each row's
+-- (id, updated_at) into their ETag, so updated_at has to move on every
+-- update, including the ones that don't set it (vote and comment counters,
+-- status changes, cluster positions). A before-update trigger stamps it.
+
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+alter table public.bugs add column if not exists updated_at timestamptz default now();
+alter table public.solutions add column if not exists updated_at timestamptz default now();
+alter table public.attachments add column if not exists updated_at timestamptz default now();
+alter table public.bug_clusters add column if not exists updated_at timestamptz default now();
+
+drop trigger if exists bugs_touch_updated_at on public.bugs;
+create trigger bugs_touch_updated_at
+    before update on public.bugs
+    for each row execute function public.touch_updated_at();
+
+drop trigger if exists solutions_touch_updated_at on public.solutions;
+create trigger solutions_touch_updated_at
+    before update on public.solutions
+    for each row execute function public.touch_updated_at();
+
+drop trigger if exists attachments_touch_updated_at on public.attachments;
+create trigger attachments_touch_updated_at
+    before update on public.attachments
+    for each row execute function public.touch_updated_at();
+
+drop trigger if exists bug_clusters_touch_updated_at on public.bug_clusters;
+create trigger bug_clusters_touch_updated_at
+    before update on public.bug_clusters
+    for each row execute function public.touch_updated_at();
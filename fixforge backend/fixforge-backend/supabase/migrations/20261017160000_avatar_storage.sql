@@ -0,0 +1,14 @@
+-- Avatars in blob storage instead of base64 in users.avatar.
+--
+-- Uploads are resized into WebP thumbnails stored under
+-- avatars/{user_id}/{avatar_hash}/{size}.webp (app/services/avatars.py);
+-- users.avatar keeps the URL of the largest one and avatar_hash the content
+-- hash in its path. Existing data: URLs are moved out of the rows by
+-- `python -m app.jobs.avatar_migration_job`.
+
+alter table public.users add column if not exists avatar_hash text;
+
+-- The bucket the thumbnails go to; public so the URLs work without signing
+insert into storage.buckets (id, name, public)
+values ('avatars', 'avatars', true)
+on conflict (id) do update set public = true;
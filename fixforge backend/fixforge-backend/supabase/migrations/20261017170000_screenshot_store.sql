@@ -0,0 +1,28 @@
+-- Content-addressed screenshots.
+--
+-- app/services/screenshots.py stores each distinct screenshot once, keyed
+-- by the SHA-256 of its bytes, as the original plus a downscaled JPEG for
+-- the AI suggestion endpoint, both under {hash[:2]}/{hash}/ in the
+-- screenshots bucket. bugs.screenshot_hash points at the row; bugs submitted
+-- earlier keep only bugs.screenshot (a URL) or an attachments row.
+
+create table if not exists public.screenshots (
+    content_hash   text primary key,
+    content_type   text not null,
+    size_bytes     integer not null,
+    width          integer not null,
+    height         integer not null,
+    original_path  text not null,
+    original_url   text not null,
+    ai_path        text not null,
+    ai_size_bytes  integer not null,
+    created_at     timestamptz not null default now()
+);
+
+alter table public.bugs add column if not exists screenshot text;
+alter table public.bugs add column if not exists screenshot_hash text;
+
+-- The stored URLs are public object URLs
+insert into storage.buckets (id, name, public)
+values ('screenshots', 'screenshots', true)
+on conflict (id) do update set public = true;
@@ -0,0 +1,19 @@
+-- Cache of AI fix suggestions (GET /aisuggested/{bug_id}).
+--
+-- prompt_hash is the SHA-256 of the requested model, the screenshot hash and
+-- the final prompt (bug title, description, code and RAG context), so a
+-- changed bug never hits an old row. app/services/ai_suggestions.py deletes
+-- a bug's older rows when it stores a new one. model_used is the model that
+-- actually answered (the fallback if the primary failed).
+
+create table if not exists public.ai_suggestions (
+    prompt_hash    text primary key,
+    bug_id         text not null,
+    suggestion     text not null,
+    model_used     text not null,
+    generation_ms  integer not null,
+    created_at     timestamptz not null default now()
+);
+
+create index if not exists ai_suggestions_bug_id_idx
+    on public.ai_suggestions (bug_id);
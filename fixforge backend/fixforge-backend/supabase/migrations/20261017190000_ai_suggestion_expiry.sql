@@ -0,0 +1,10 @@
+-- Per-row expiry for cached AI suggestions.
+--
+-- Answers from the fallback model are stored under the primary model's
+-- prompt_hash, so they must not live as long as primary answers: the
+-- endpoint gives them a short TTL and the cache ignores a row once
+-- expires_at has passed. Rows from before this column fall back to
+-- created_at + AI_SUGGESTION_TTL.
+
+alter table public.ai_suggestions
+    add column if not exists expires_at timestamptz;
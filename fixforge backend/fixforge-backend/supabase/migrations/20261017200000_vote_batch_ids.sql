@@ -0,0 +1,45 @@
+-- Exactly-once bug vote flushes.
+--
+-- apply_bug_votes adds deltas, so a flush that committed but whose response
+-- was lost (a timeout, a dropped connection) was counted twice when
+-- app/services/vote_buffer.py retried it. Each flush now carries a batch id,
+-- recorded in the same statement as the update; a batch whose id is already
+-- recorded changes nothing. Ids are kept for a day (a retry comes seconds
+-- later) and pruned as new batches arrive.
+
+create table if not exists public.vote_batches (
+    batch_id    text primary key,
+    applied_at  timestamptz not null default now()
+);
+
+create index if not exists vote_batches_applied_at_idx
+    on public.vote_batches (applied_at);
+
+drop function if exists public.apply_bug_votes(jsonb);
+
+-- p_deltas: [{"id": <bug id>, "votes": <delta>}, ...] (one entry per bug)
+-- p_batch_id: the flush's id; null applies the deltas unconditionally
+create or replace function public.apply_bug_votes(p_deltas jsonb, p_batch_id text default null)
+returns integer
+language sql
+as $$
+    with batch as (
+        insert into public.vote_batches (batch_id)
+        select p_batch_id where p_batch_id is not null
+        on conflict (batch_id) do nothing
+        returning 1
+    ),
+    pruned as (
+        delete from public.vote_batches
+         where applied_at < now() - interval '1 day'
+    ),
+    updated as (
+        update public.bugs b
+           set votes = greatest(coalesce(b.votes, 0) + d.votes, 0)
+          from jsonb_populate_recordset(null::public.bugs, p_deltas) d
+         where b.id = d.id
+           and (p_batch_id is null or exists (select 1 from batch))
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;